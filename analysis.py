@@ -0,0 +1,151 @@
+"""Exact analysis of a board as an absorbing Markov chain.
+
+Every cell the player can stand on is a transient state, the last cell included, and the end of the game is
+the absorbing state. From each cell the six dice outcomes are equally likely; a roll that lands on the start
+of a snake or ladder moves the player to its end cell, and a roll past the last cell ends the game (the same
+rules as engine.step). Landing exactly on the last cell doesn't end the game, so from there any roll does.
+
+With Q the transient-to-transient transition matrix and N = (I - Q)^-1 the fundamental matrix:
+
+    expected turns  t = N 1
+    variance        v = (2N - I) t - t^2
+    P(T <= n)       = 1 - (e_1 Q^n) 1
+
+The linear systems are solved directly instead of inverting N, so a 100-cell board takes well under a millisecond.
+Q has at most six entries per row, so boards with more than DENSE_LIMIT cells are solved with a sparse LU
+factorization from SciPy, which is only needed for those boards; a 1000x1000 board then takes a few seconds.
+SciPy is imported the first time such a board is analysed, so importing this module (and core) stays fast.
+"""
+import numpy as np
+
+from simulation import JumpTable
+
+# Boards with more cells than this are analysed with sparse matrices
+DENSE_LIMIT = 2000
+
+
+def transition_matrix(table: JumpTable) -> np.ndarray:
+    """
+    Builds the transient part Q of the transition matrix.
+
+    Row and column i stand for cell i + 1, for the cells 1 to number_of_cells. The probability of ending the
+    game from cell i + 1 in one turn is 1 - Q[i].sum(); the row of the last cell is all zeros.
+
+    table: The JumpTable of the board.
+    return: The number_of_cells x number_of_cells matrix Q.
+    """
+    transient = table.number_of_cells
+    cells = np.arange(1, transient + 1)
+    q = np.zeros((transient, transient))
+    for roll in range(1, 7):
+        moving = cells + roll <= table.number_of_cells
+        destination = table.destination[cells[moving] + roll]
+        np.add.at(q, (cells[moving] - 1, destination - 1), 1 / 6)
+    return q
+
+
+def _scipy_sparse():
+    """Imports scipy.sparse, which only boards with more than DENSE_LIMIT cells need."""
+    try:
+        from scipy import sparse
+    except ImportError:
+        raise ImportError(f"Boards with more than {DENSE_LIMIT} cells need SciPy: pip install scipy") from None
+    return sparse
+
+
+def sparse_transition_matrix(table: JumpTable) -> "scipy.sparse.csr_matrix":
+    """
+    Builds the same matrix Q as transition_matrix, as a SciPy sparse matrix for large boards.
+
+    table: The JumpTable of the board.
+    return: The number_of_cells x number_of_cells matrix Q in CSR format.
+    """
+    sparse = _scipy_sparse()
+    transient = table.number_of_cells
+    cells = np.arange(1, transient + 1)
+    targets = cells[:, None] + np.arange(1, 7)
+    moving = targets <= table.number_of_cells
+    destination = table.destination[targets]
+    rows = np.broadcast_to(cells[:, None], destination.shape)[moving] - 1
+    # Duplicate entries (two rolls reaching the same cell) are summed when converting to CSR
+    q = sparse.coo_matrix((np.full(rows.size, 1 / 6), (rows, destination[moving] - 1)), shape=(transient, transient))
+    return q.tocsr()
+
+
+class MarkovAnalysis:
+    """
+    Holds the exact game length statistics of a board.
+
+    Attributes:
+        expected_turns (np.ndarray): expected_turns[i] is the expected number of dice rolls to end the game from cell i + 1.
+        variance (np.ndarray): The variance of that number of dice rolls, per starting cell.
+    """
+    def __init__(self, table: JumpTable):
+        """
+        Builds the transition matrix of the board and solves for the expected number of turns and its variance.
+
+        table: The JumpTable of the board.
+        """
+        self.table = table
+        transient = table.number_of_cells
+        ones = np.ones(transient)
+        if table.number_of_cells <= DENSE_LIMIT:
+            self.q = transition_matrix(table)
+            fundamental_system = np.eye(transient) - self.q
+            self.expected_turns = np.linalg.solve(fundamental_system, ones)
+            # N t, needed for the second moment of the number of turns
+            second = np.linalg.solve(fundamental_system, self.expected_turns)
+        else:
+            sparse = _scipy_sparse()
+            from scipy.sparse.linalg import splu
+            self.q = sparse_transition_matrix(table)
+            # The LU factors are computed once and used for both systems
+            fundamental_system = splu((sparse.identity(transient, format='csc') - self.q).tocsc())
+            self.expected_turns = fundamental_system.solve(ones)
+            second = fundamental_system.solve(self.expected_turns)
+        self.variance = 2 * second - self.expected_turns - self.expected_turns ** 2
+
+    @classmethod
+    def from_board(cls, board) -> "MarkovAnalysis":
+        """
+        Analyses a Board with snakes and ladders on it.
+
+        board: The Board to analyse.
+        return: The MarkovAnalysis of the board.
+        """
+        return cls(JumpTable.from_board(board))
+
+    def expected_turns_from(self, cell_number: int = 1) -> float:
+        """Returns the expected number of dice rolls to end the game from cell_number, one from the last cell."""
+        if cell_number > self.table.number_of_cells:
+            return 0.0
+        return float(self.expected_turns[cell_number - 1])
+
+    def standard_deviation_from(self, cell_number: int = 1) -> float:
+        """Returns the standard deviation of the number of dice rolls to end the game from cell_number."""
+        if cell_number > self.table.number_of_cells:
+            return 0.0
+        return float(np.sqrt(max(self.variance[cell_number - 1], 0.0)))
+
+    def finish_probabilities(self, max_turns: int, cell_number: int = 1) -> np.ndarray:
+        """
+        Calculates the probability of ending the game within n turns, for every n up to max_turns.
+
+        max_turns: The largest number of turns to calculate the probability for.
+        cell_number: The cell the player starts from.
+        return: An array where element n is the probability of finishing within n turns.
+        """
+        cdf = np.ones(max_turns + 1)
+        if cell_number > self.table.number_of_cells:
+            return cdf
+        distribution = np.zeros(self.q.shape[0])
+        distribution[cell_number - 1] = 1.0
+        cdf[0] = 0.0
+        for turn in range(1, max_turns + 1):
+            distribution = distribution @ self.q
+            cdf[turn] = 1.0 - distribution.sum()
+        return cdf
+
+    def finish_probability(self, turns: int, cell_number: int = 1) -> float:
+        """Returns the probability of ending the game from cell_number within the given number of turns."""
+        return float(self.finish_probabilities(turns, cell_number)[turns])
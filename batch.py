@@ -0,0 +1,141 @@
+"""Batch board factory: generates and scores many boards in parallel and streams the results to disk.
+
+Each seed produces one board. Boards are built as CompactBoards (flat arrays, no pygame objects) and
+work is split across a ProcessPoolExecutor in chunks of seeds, so throughput scales with the number of cores.
+Results are written as JSON Lines, one board per line, in seed order as the chunks complete.
+
+Usage:
+    python batch.py --start 0 --stop 100000 --output boards.jsonl
+"""
+import argparse
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from core import CompactBoard, ROWS, COLUMNS, generate_entities
+from analysis import MarkovAnalysis
+
+
+def generate_board(seed: int, rows: int = ROWS, columns: int = COLUMNS) -> CompactBoard:
+    """
+    Generates a board with snakes and ladders the same way the game does, as a CompactBoard without any pygame objects.
+
+    seed: The seed of the board's random generator, so the same seed always gives the same board.
+    rows: The number of rows of the board.
+    columns: The number of columns of the board.
+    return: The generated board, with its graph and shortest distance calculated.
+    """
+    board = CompactBoard(rows, columns, seed=seed)
+    generate_entities(board)
+    board.create_board_graph()
+    board.calculate_shortest_path(start_cell_number=1, end_cell_number=rows * columns)
+    return board
+
+
+def entities_coverage(board: CompactBoard) -> float:
+    """
+    Calculates the fraction of the board's cells inside the rectangles spanned by the snakes and ladders.
+
+    board: The board with snakes and ladders on it.
+    return: The coverage, ranging from 0 to 1.
+    """
+    covered = np.zeros((board.rows, board.columns), dtype=bool)
+    for entity in board.snakes + board.ladders:
+        start_row, start_column = divmod(entity.start_cell.number - 1, board.columns)
+        end_row, end_column = divmod(entity.end_cell.number - 1, board.columns)
+        covered[min(start_row, end_row): max(start_row, end_row) + 1,
+                min(start_column, end_column): max(start_column, end_column) + 1] = True
+    return float(covered.mean())
+
+
+def score_board(seed: int, board: CompactBoard) -> dict:
+    """
+    Scores a generated board.
+
+    seed: The seed the board was generated with.
+    board: The generated board.
+    return: A dictionary with the board's entities and quality metrics.
+    """
+    analysis = MarkovAnalysis.from_board(board)
+    return {
+        "seed": seed,
+        "fingerprint": board.fingerprint(),
+        "rows": board.rows,
+        "columns": board.columns,
+        "shortest_distance": board.shortest_distance,
+        "expected_turns": round(analysis.expected_turns_from(1), 3),
+        "number_of_snakes": len(board.snakes),
+        "number_of_ladders": len(board.ladders),
+        "coverage": round(entities_coverage(board), 3),
+        "snakes": [[snake.start_cell.number, snake.end_cell.number] for snake in board.snakes],
+        "ladders": [[ladder.start_cell.number, ladder.end_cell.number] for ladder in board.ladders],
+    }
+
+
+def _init_worker() -> None:
+    # Board and Generator log every call, which would flood the output for thousands of boards
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def worker_pool(workers: int = None) -> ProcessPoolExecutor:
+    """
+    Creates a pool of processes whose workers only log warnings, shared by the tools that work on many boards.
+
+    workers: The number of worker processes. Defaults to the number of CPUs.
+    """
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+
+def split_chunks(items, chunk_size: int) -> list:
+    """Splits a range or sequence into consecutive chunks of chunk_size items, sent to a worker at a time."""
+    return [items[i: i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+
+def _generate_chunk(seeds: range, rows: int, columns: int) -> list:
+    """Generates and scores the boards for a chunk of seeds. Called in the worker processes."""
+    return [score_board(seed, generate_board(seed, rows, columns)) for seed in seeds]
+
+
+def generate_boards(seeds: range, output_path: str, rows: int = ROWS, columns: int = COLUMNS,
+                    workers: int = None, chunk_size: int = 256) -> int:
+    """
+    Generates and scores a board for every seed across a pool of processes and streams the results to a file.
+
+    seeds: The range of seeds to generate boards for.
+    output_path: The JSON Lines file the results are written to.
+    rows: The number of rows of the boards.
+    columns: The number of columns of the boards.
+    workers: The number of worker processes. Defaults to the number of CPUs.
+    chunk_size: The number of seeds sent to a worker at a time.
+    return: The number of boards written.
+    """
+    logging.info(f'Generating {len(seeds)} boards')
+    chunks = split_chunks(seeds, chunk_size)
+    written = 0
+    with open(output_path, "w") as output, worker_pool(workers) as executor:
+        for records in executor.map(_generate_chunk, chunks, [rows] * len(chunks), [columns] * len(chunks)):
+            for record in records:
+                output.write(json.dumps(record) + "\n")
+            written += len(records)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate and score Snakes and Ladders boards.")
+    parser.add_argument("--start", type=int, default=0, help="First seed.")
+    parser.add_argument("--stop", type=int, default=10000, help="Seed to stop before.")
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--columns", type=int, default=COLUMNS)
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes, defaults to the CPU count.")
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--output", default="boards.jsonl")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    count = generate_boards(range(args.start, args.stop), args.output, args.rows, args.columns,
+                            args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - start_time
+    print(f"Generated {count} boards in {elapsed:.1f} s ({count / elapsed:.0f} boards/s) -> {args.output}")
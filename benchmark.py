@@ -0,0 +1,377 @@
+"""Benchmark suite: times board generation, graph building, the shortest path search, sorting and rendering.
+
+Every benchmark runs on fixed board sizes and seeds (or list sizes), so two runs time exactly the same work.
+Each case is prepared outside the timed part. A single call of most cases takes well under a millisecond,
+too short for the clock to time reliably, so a case is first calibrated to the number of calls that takes
+at least MIN_RUN_SECONDS, and every timed run makes that many calls and records the time per call. The
+median over the runs is compared between runs of the suite. The rendering benchmarks draw on an off-screen
+display with the SDL dummy video driver, so the suite runs headless.
+
+Every run is appended to a JSON history with the environment and commit it ran on, and compared against a
+stored baseline run: a case whose median is more than --threshold times the baseline's is a regression,
+and the command exits with status 1, so it can gate a release.
+
+The baseline, benchmark_baseline.json next to this file, isn't part of the repository, because times can
+only be compared on the same machine: save it with --save-baseline on the version to compare against (e.g.
+the last release), on the machine the later runs are made on, and keep the machine otherwise idle while the
+suite runs.
+
+Usage:
+    python benchmark.py --save-baseline   # on the reference version
+    python benchmark.py                   # later: compare against the baseline
+    python benchmark.py --quick --filter draw
+"""
+import argparse
+from datetime import datetime, timezone
+from functools import lru_cache
+import gc
+import json
+import logging
+import os
+import platform
+import random as rd
+import statistics
+import subprocess
+import sys
+import time
+
+# The dummy video driver lets the rendering benchmarks run without a display; it has to be chosen before
+# pygame is initialized
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame as pg
+
+import sc
+from core import (Board, CompactBoard, Generator, LinkedList, ListNode, Leaderboard, Player, generate_coordinates,
+                  generate_entities)
+
+DEFAULT_HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_history.json")
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+BOARD_SIZES = ((10, 10), (20, 20), (50, 50))
+SEEDS = (0, 1, 2)
+LIST_SIZES = (100, 1000, 10000)
+# Fewer cases for a quick check
+QUICK_BOARD_SIZES = ((10, 10), (20, 20))
+QUICK_SEEDS = (0,)
+QUICK_LIST_SIZES = (100, 1000)
+DEFAULT_REPEATS = 15
+# Every timed run of a case makes enough calls to take at least this long
+MIN_RUN_SECONDS = 0.02
+# A case is a regression when its median is this many times the baseline's
+DEFAULT_THRESHOLD = 1.25
+
+
+def _board(rows: int, columns: int, seed: int, compact: bool = False):
+    """Creates an empty Board with its cells, or an empty CompactBoard."""
+    if compact:
+        return CompactBoard(rows, columns, seed=seed)
+    board = Board(rows, columns, seed=seed)
+    board.create_cells(generate_coordinates(rows, columns, board.cell_size, gap=board.gap))
+    return board
+
+
+@lru_cache(maxsize=None)
+def _generated_board(rows: int, columns: int, seed: int, compact: bool = False):
+    """Returns a board with its snakes and ladders generated, shared by the benchmarks that don't change it."""
+    board = _board(rows, columns, seed, compact)
+    generate_entities(board)
+    return board
+
+
+def _display() -> None:
+    """Creates the game's display, fonts and clock on first use."""
+    if sc.screen is None:
+        sc.init_display()
+
+
+@lru_cache(maxsize=None)
+def _screen_surface() -> pg.Surface:
+    """Returns a screen-sized surface to draw on, shared by all calls so they don't allocate one each."""
+    _display()
+    return pg.Surface((sc.SCREEN_WIDTH, sc.SCREEN_HEIGHT))
+
+
+def bench_smooth_placement(sizes, seeds, list_sizes):
+    """Generator._smooth_placement: placing the null matrices of the snakes on an empty board."""
+    for rows, columns in sizes:
+        for seed in seeds:
+            def prepare(rows=rows, columns=columns, seed=seed):
+                return Generator(CompactBoard(rows, columns, seed=seed))._smooth_placement
+            yield {"rows": rows, "columns": columns, "seed": seed}, prepare
+
+
+def bench_entities_coordinates(sizes, seeds, list_sizes):
+    """Generator._get_entities_coordinates: the placement and the ends of the entities it gives."""
+    for rows, columns in sizes:
+        for seed in seeds:
+            def prepare(rows=rows, columns=columns, seed=seed):
+                return Generator(CompactBoard(rows, columns, seed=seed))._get_entities_coordinates
+            yield {"rows": rows, "columns": columns, "seed": seed}, prepare
+
+
+def bench_create_board_graph(sizes, seeds, list_sizes):
+    """Board.create_board_graph and CompactBoard.create_board_graph on generated boards."""
+    for compact in (False, True):
+        for rows, columns in sizes:
+            for seed in seeds:
+                def prepare(rows=rows, columns=columns, seed=seed, compact=compact):
+                    return _generated_board(rows, columns, seed, compact).create_board_graph
+                yield ({"board": "CompactBoard" if compact else "Board", "rows": rows, "columns": columns,
+                        "seed": seed}, prepare)
+
+
+def bench_shortest_path(sizes, seeds, list_sizes):
+    """Board.calculate_shortest_path from the first to the last cell, with its distance-to-goal search."""
+    for rows, columns in sizes:
+        for seed in seeds:
+            def prepare(rows=rows, columns=columns, seed=seed):
+                board = _generated_board(rows, columns, seed)
+                if board.board_graph is None:
+                    board.create_board_graph()
+
+                def run():
+                    # The distances are calculated once per board, so forget them to time the search
+                    board.distance_to_goal = None
+                    return board.calculate_shortest_path(1, rows * columns)
+                return run
+            yield {"rows": rows, "columns": columns, "seed": seed}, prepare
+
+
+def bench_linked_list_sort(sizes, seeds, list_sizes):
+    """LinkedList.sort on distinct numbers in random order."""
+    for size in list_sizes:
+        for seed in seeds:
+            def prepare(size=size, seed=seed):
+                linked_list = LinkedList()
+                last_node = None
+                # Linked here directly, because LinkedList.add walks the whole list for every number
+                for value in rd.Random(seed).sample(range(size * 10), size):
+                    node = ListNode(value)
+                    if last_node is None:
+                        linked_list.head = node
+                    else:
+                        last_node.next = node
+                    last_node = node
+                return linked_list.sort
+            yield {"size": size, "seed": seed}, prepare
+
+
+def bench_update_cells(sizes, seeds, list_sizes):
+    """Board.update_cells: drawing the cells and their numbers onto a screen-sized surface."""
+    for rows, columns in sizes:
+        for seed in seeds:
+            def prepare(rows=rows, columns=columns, seed=seed):
+                board = _generated_board(rows, columns, seed)
+                surface = _screen_surface()
+                return lambda: board.update_cells(surface)
+            yield {"rows": rows, "columns": columns, "seed": seed}, prepare
+
+
+@lru_cache(maxsize=None)
+def _game_frame(rows: int, columns: int, seed: int):
+    """Sets up a game like main() does and returns a function drawing one frame of it."""
+    _display()
+    board = sc.create_board(rows, columns, seed)
+    board.set_color(sc.Color.WHITE.value)
+    generate_entities(board)
+    board.calculate_derived_data()
+    player = Player(position=board.cells_list[1].position)
+    player.set_size(max(4, board.cells_list[1].rect.width))
+    player.set_color(sc.Color.PLAYER_COLOR.value)
+    sc.start_game(player, board)
+    # Full leaderboards, as in a session that has gone on for a while
+    past_games_scores = Leaderboard(descending=True, values=range(100, 300, 20))
+    past_games_times = Leaderboard(values=range(30, 130, 10))
+    progress_bar = sc.ProgressBar((10, 10), (200, 20))
+    timer = sc.Timer()
+    return lambda: sc.draw_game_state(player, board, timer, past_games_scores, progress_bar, player.moves,
+                                      past_games_times)
+
+
+def bench_draw_game_state(sizes, seeds, list_sizes):
+    """A full draw_game_state frame with the board layer already built, as in the game loop."""
+    for rows, columns in sizes:
+        for seed in seeds:
+            def prepare(rows=rows, columns=columns, seed=seed):
+                return _game_frame(rows, columns, seed)
+            yield {"rows": rows, "columns": columns, "seed": seed}, prepare
+
+
+BENCHMARKS = {
+    "generator._smooth_placement": bench_smooth_placement,
+    "generator._get_entities_coordinates": bench_entities_coordinates,
+    "board.create_board_graph": bench_create_board_graph,
+    "board.calculate_shortest_path": bench_shortest_path,
+    "linked_list.sort": bench_linked_list_sort,
+    "board.update_cells": bench_update_cells,
+    "sc.draw_game_state": bench_draw_game_state,
+}
+
+
+def case_key(name: str, params: dict) -> str:
+    """Returns the name a case is stored and compared under, e.g. "linked_list.sort[size=100,seed=0]"."""
+    return f"{name}[{','.join(f'{key}={value}' for key, value in params.items())}]"
+
+
+def _time_calls(prepare, number: int) -> float:
+    """Prepares number calls of a case and returns the seconds they take together."""
+    calls = [prepare() for _ in range(number)]
+    # Like timeit, without the garbage collector, whose collections would land in some runs and not others
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start_time = time.perf_counter()
+        for call in calls:
+            call()
+        return time.perf_counter() - start_time
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def time_case(prepare, repeats: int, min_run_seconds: float = MIN_RUN_SECONDS) -> dict:
+    """
+    Times a case.
+
+    The number of calls per run goes up in 1, 2, 5, 10, 20, ... steps until a run takes at least
+    min_run_seconds, like timeit.Timer.autorange() (which can't prepare every call). These calibration
+    runs are the warm-up.
+
+    prepare: A function returning the function to time. It is called before every call, outside the timing,
+        so every call gets fresh state (a new Generator, an unsorted list, ...).
+    repeats: The number of timed runs.
+    min_run_seconds: The shortest time of a run.
+    return: The number of calls per run and the minimum, median and mean time per call of the runs in
+        milliseconds.
+    """
+    number = 1
+    while _time_calls(prepare, number) < min_run_seconds:
+        number = number * 5 // 2 if str(number)[0] == "2" else number * 2
+    times = [_time_calls(prepare, number) / number * 1000 for _ in range(repeats)]
+    return {"number": number, "min_ms": min(times), "median_ms": statistics.median(times),
+            "mean_ms": statistics.fmean(times)}
+
+
+def _commit() -> str:
+    """Returns the git commit of the code being benchmarked, or None outside a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(names=None, repeats: int = DEFAULT_REPEATS, quick: bool = False, name_filter: str = None) -> dict:
+    """
+    Runs the benchmarks.
+
+    names: The names of the benchmarks to run, all of BENCHMARKS by default.
+    repeats: The number of timed runs of every case.
+    quick: Whether to run only the small sizes and the first seed.
+    name_filter: Only the cases whose key contains this text are run, if given.
+    return: The run: when and where it ran and the times of every case by key.
+    """
+    sizes, seeds, list_sizes = ((QUICK_BOARD_SIZES, QUICK_SEEDS, QUICK_LIST_SIZES) if quick
+                                else (BOARD_SIZES, SEEDS, LIST_SIZES))
+    results = {}
+    for name in names or BENCHMARKS:
+        for params, prepare in BENCHMARKS[name](sizes, seeds, list_sizes):
+            key = case_key(name, params)
+            if name_filter and name_filter not in key:
+                continue
+            results[key] = {"benchmark": name, "params": params, **time_case(prepare, repeats)}
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pygame": pg.version.ver,
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+        },
+        "repeats": repeats,
+        "results": results,
+    }
+
+
+def append_to_history(run: dict, path: str = DEFAULT_HISTORY_PATH) -> None:
+    """Appends a run to the JSON history file, a list of runs, creating it if needed."""
+    history = []
+    if os.path.exists(path):
+        with open(path) as history_file:
+            history = json.load(history_file)
+    history.append(run)
+    with open(path, "w") as history_file:
+        json.dump(history, history_file, indent=1)
+
+
+def compare(run: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list:
+    """
+    Compares the medians of a run with a baseline run.
+
+    run: The run, as returned by run_benchmarks().
+    baseline: The baseline run.
+    threshold: The ratio of the medians above which a case is a regression (and below 1 / threshold of which
+        it is an improvement).
+    return: A (key, baseline median, median, ratio, status) tuple for every case of the run, where status is
+        "regression", "improvement", "ok" or "new" for cases the baseline doesn't have.
+    """
+    comparison = []
+    for key, result in run["results"].items():
+        baseline_result = baseline["results"].get(key)
+        if baseline_result is None:
+            comparison.append((key, None, result["median_ms"], None, "new"))
+            continue
+        ratio = result["median_ms"] / baseline_result["median_ms"] if baseline_result["median_ms"] else 1.0
+        if ratio > threshold:
+            status = "regression"
+        elif ratio < 1 / threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+        comparison.append((key, baseline_result["median_ms"], result["median_ms"], ratio, status))
+    return comparison
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Snakes and Ladders.")
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS), default=None)
+    parser.add_argument("--filter", default=None, help="Only run the cases whose name contains this text.")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--quick", action="store_true", help="Only the small sizes and one seed.")
+    parser.add_argument("--history", default=DEFAULT_HISTORY_PATH, help="JSON history the run is appended to.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="JSON baseline run to compare against.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Median ratio to the baseline above which a case is a regression.")
+    args = parser.parse_args()
+    # Board and Generator log every call
+    logging.getLogger().setLevel(logging.WARNING)
+
+    run = run_benchmarks(args.benchmarks, args.repeats, args.quick, args.filter)
+    append_to_history(run, args.history)
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    if baseline is None:
+        for key, result in run["results"].items():
+            print(f"{key:70} {result['median_ms']:10.3f} ms")
+    else:
+        print(f"Compared with the baseline of {baseline['timestamp']} (commit {baseline.get('commit')})")
+        for key, baseline_median, median, ratio, status in compare(run, baseline, args.threshold):
+            if ratio is None:
+                print(f"{key:70} {median:10.3f} ms  (new)")
+            else:
+                print(f"{key:70} {median:10.3f} ms  {baseline_median:10.3f} ms  x{ratio:5.2f}  {status}")
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(run, baseline_file, indent=1)
+        print(f"Saved the baseline to {args.baseline}")
+    elif baseline is not None:
+        regressions = [row for row in compare(run, baseline, args.threshold) if row[4] == "regression"]
+        if regressions:
+            print(f"{len(regressions)} regressions over x{args.threshold}")
+            sys.exit(1)
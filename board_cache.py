@@ -0,0 +1,122 @@
+"""A size-bounded LRU cache of the data derived from a board, keyed by the board's fingerprint.
+
+The graph, the distance and next-hop tables, the Markov analysis, the rules and the pre-rendered layer only
+depend on the size of the board and its snakes and ladders, which is exactly what Board.fingerprint() hashes.
+When a board is generated again (the same seed, or a board seen earlier in the session) its data is taken
+from the cache instead of being calculated and drawn again. The least recently used boards are evicted once
+the estimated size of the cached data goes over max_bytes.
+
+The cached objects are shared between the boards they are restored to and must not be modified in place.
+"""
+from collections import OrderedDict
+import logging
+import sys
+
+import numpy as np
+
+# Enough for a few hundred 10x10 boards with their layers, or a couple of 1000x1000 boards
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# The data stored for a board, as attributes of the board object
+ARTIFACTS = ('board_graph', 'distance_to_goal', 'next_hop', 'shortest_distance', 'markov_analysis', 'rules', 'layer')
+
+
+def _estimate_size(value) -> int:
+    """Estimates the memory used by a cached artifact in bytes."""
+    if value is None:
+        return 0
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        # A board graph: a list of up to six cell numbers per cell
+        return sys.getsizeof(value) + len(value) * (sys.getsizeof([0] * 6) + 6 * 28)
+    if hasattr(value, 'get_bytesize'):
+        # A pygame Surface
+        width, height = value.get_size()
+        return width * height * value.get_bytesize()
+    if hasattr(value, 'expected_turns'):
+        # A MarkovAnalysis, with a dense or sparse transition matrix
+        q = value.q
+        q_bytes = q.nbytes if isinstance(q, np.ndarray) else q.data.nbytes + q.indices.nbytes + q.indptr.nbytes
+        return q_bytes + value.expected_turns.nbytes + value.variance.nbytes + value.table.destination.nbytes * 3
+    if hasattr(value, 'is_snake'):
+        # The Rules of the engine: three lists of small ints and bools, which are shared objects
+        return 3 * sys.getsizeof(value.destination)
+    return sys.getsizeof(value)
+
+
+class BoardCache:
+    """
+    Holds the derived data of recently seen boards, keyed by fingerprint.
+
+    Attributes:
+        max_bytes (int): The largest estimated size of all cached data before boards are evicted.
+        total_bytes (int): The estimated size of the cached data.
+        hits (int): The number of boards restored from the cache.
+        misses (int): The number of boards that weren't in the cache.
+    """
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # fingerprint -> (artifacts, size), with the most recently used board last
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, fingerprint: str) -> bool:
+        return fingerprint in self._entries
+
+    def restore(self, board, fingerprint: str = None) -> bool:
+        """
+        Sets the cached data of a board with the same fingerprint on the board.
+
+        board: The Board or CompactBoard with its snakes and ladders placed.
+        fingerprint: The board's fingerprint, calculated if not given.
+        return: True if the data was found in the cache, False otherwise.
+        """
+        if fingerprint is None:
+            fingerprint = board.fingerprint()
+        entry = self._entries.get(fingerprint)
+        if entry is None:
+            self.misses += 1
+            return False
+        self._entries.move_to_end(fingerprint)
+        for name, value in entry[0].items():
+            setattr(board, name, value)
+        self.hits += 1
+        logging.info('Restored board data from the cache')
+        return True
+
+    def store(self, board, fingerprint: str = None) -> None:
+        """
+        Stores the derived data calculated for a board, replacing what was stored for it before.
+
+        Data larger than max_bytes on its own is not stored.
+
+        board: The Board or CompactBoard with its derived data calculated.
+        fingerprint: The board's fingerprint, calculated if not given.
+        """
+        if fingerprint is None:
+            fingerprint = board.fingerprint()
+        artifacts = {name: getattr(board, name) for name in ARTIFACTS if getattr(board, name, None) is not None}
+        size = sum(_estimate_size(value) for value in artifacts.values())
+        self._discard(fingerprint)
+        if size > self.max_bytes:
+            return
+        self._entries[fingerprint] = (artifacts, size)
+        self.total_bytes += size
+        # Evict the least recently used boards
+        while self.total_bytes > self.max_bytes:
+            self._discard(next(iter(self._entries)))
+
+    def _discard(self, fingerprint: str) -> None:
+        entry = self._entries.pop(fingerprint, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+    def clear(self) -> None:
+        """Removes all boards from the cache."""
+        self._entries.clear()
+        self.total_bytes = 0
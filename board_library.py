@@ -0,0 +1,420 @@
+"""A library of generated boards in memory-mapped NumPy files, shared by worker processes without copying.
+
+Every board is one fixed-width record: its seed, the seed of the board after it, its fingerprint, its shortest
+distance and expected number of turns, and the cell numbers at both ends of its snakes and ladders. Records
+are about 130 bytes for a 10x10 board, so millions of boards fit in a file that is opened in an instant: board i
+is at a known offset, and two hash indexes find a board by its fingerprint or its seed in a probe or two. The
+game reads the next board from a library instead of running the Generator when the library holds its seed.
+
+Unless a library is built without them, it also stores the jump table (the same tables as a JumpTable) and the
+distance and next-hop tables to the last cell of every board, with a row per board, so simulations don't
+build any table. Workers open the files with mmap_mode='r', so all processes read the same pages of the OS
+page cache: the memory used doesn't grow with the number of workers, no board is generated again, and
+sending the library to a worker only sends its path.
+
+Files (n boards of c cells):
+    library.json           version, rows, columns, count, slots (entities per record), tables
+    boards.npy             (n,) records of RECORD_FIELDS
+    fingerprint_index.npy  (2^k,) int64 hash table of board index + 1 by fingerprint, 0 for an empty slot
+    seed_index.npy         (2^k,) int64 hash table of board index + 1 by seed
+    destination.npy        (n, c + 7) the JumpTable destination of every board
+    score_delta.npy        (n, c + 7) int8
+    is_snake.npy           (n, c + 7) bool
+    distance_to_goal.npy   (n, c + 1) int32, -1 where the last cell can't be reached
+    next_hop.npy           (n, c + 1) int32
+
+Usage:
+    python board_library.py --start 0 --stop 100000 --output boards.lib
+    python board_library.py --chain --start 42 --stop 10042 --no-tables --output session.lib
+    library = BoardLibrary("boards.lib")
+    result = simulate_games(library.jump_table(0), 100_000)
+    board = library.load_board(library.find(fingerprint))
+"""
+import argparse
+from functools import lru_cache
+import json
+import logging
+import os
+import time
+
+import numpy as np
+
+from analysis import MarkovAnalysis
+from batch import generate_board, split_chunks, worker_pool
+from core import ROWS, COLUMNS, CompactBoard, create_board, generate_entities
+from engine import Rules
+from simulation import JumpTable, simulate_games
+
+# Version 3 counts the roll needed from the last cell in expected_turns
+VERSION = 3
+METADATA_FILE = "library.json"
+RECORDS_FILE = "boards.npy"
+# The hash indexes, each in a .npy file of its name
+INDEXES = ('fingerprint_index', 'seed_index')
+# The tables of every board, each in a .npy file of its name, left out of libraries built without tables
+TABLES = ('destination', 'score_delta', 'is_snake', 'distance_to_goal', 'next_hop')
+RECORD_FIELDS = ('seed', 'next_seed', 'fingerprint', 'shortest_distance', 'expected_turns', 'snakes', 'ladders',
+                 'entities')
+
+
+def record_slots(rows: int, columns: int) -> int:
+    """
+    Returns the number of entities a record has room for: the most snakes and ladders the Generator can place.
+
+    The snakes and the ladders each cover at most 70% of the cells, with at least 6 cells per entity.
+    """
+    return max(1, 2 * (int(rows * columns * 0.7) // 6))
+
+
+def record_dtype(number_of_cells: int, slots: int) -> np.dtype:
+    """
+    Returns the dtype of the board records of a library.
+
+    The entities are (start, end) cell number pairs: the snakes (head, tail) first, then the ladders
+    (bottom, top), and zeros in the slots left.
+    """
+    cell_type = np.uint16 if number_of_cells <= np.iinfo(np.uint16).max else np.uint32
+    return np.dtype([
+        ('seed', np.int64),
+        ('next_seed', np.int64),
+        ('fingerprint', np.uint8, (16,)),
+        ('shortest_distance', np.int32),
+        ('expected_turns', np.float32),
+        ('snakes', np.uint16),
+        ('ladders', np.uint16),
+        ('entities', cell_type, (slots, 2)),
+    ])
+
+
+def _table_specs(count: int, number_of_cells: int) -> dict:
+    """Returns the shape and dtype of every table of a library."""
+    table_size = number_of_cells + 7
+    index_type = np.int16 if table_size < np.iinfo(np.int16).max else np.int32
+    return {
+        'destination': ((count, table_size), index_type),
+        'score_delta': ((count, table_size), np.int8),
+        'is_snake': ((count, table_size), np.bool_),
+        'distance_to_goal': ((count, number_of_cells + 1), np.int32),
+        'next_hop': ((count, number_of_cells + 1), np.int32),
+    }
+
+
+def _fingerprint_keys(fingerprints: np.ndarray) -> np.ndarray:
+    """Returns the hash keys of (n, 16) fingerprint bytes: their first 8 bytes, as they are hashes already."""
+    return np.ascontiguousarray(fingerprints[:, :8]).view(np.uint64).ravel()
+
+
+def _seed_keys(seeds) -> np.ndarray:
+    """Returns the hash keys of seeds, mixed (splitmix64) so consecutive seeds don't fill consecutive slots."""
+    keys = np.asarray(seeds, dtype=np.int64).astype(np.uint64)
+    keys = (keys ^ (keys >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+    keys = (keys ^ (keys >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+    return keys ^ (keys >> np.uint64(31))
+
+
+def _build_index(keys: np.ndarray) -> np.ndarray:
+    """
+    Builds an open-addressing hash table of the boards with linear probing.
+
+    Board i is stored as i + 1 in the first free slot from key % size on, wrapping around. The table has at
+    least twice as many slots as boards, so a search usually ends after one or two probes.
+
+    keys: The hash key of every board.
+    return: The table, with 0 in the empty slots.
+    """
+    size = 1 << max(1, (2 * len(keys) - 1).bit_length())
+    mask = size - 1
+    # A list, because assigning NumPy elements one at a time is several times slower
+    table = [0] * size
+    for board, slot in enumerate((keys & np.uint64(mask)).tolist(), start=1):
+        while table[slot]:
+            slot = (slot + 1) & mask
+        table[slot] = board
+    return np.array(table, dtype=np.int64)
+
+
+class BoardLibrary:
+    """
+    Read-only access to a board library, with every array memory-mapped.
+
+    Pickling a library only pickles its path; the process it is unpickled in maps the files itself.
+
+    Attributes:
+        path (str): The directory of the library.
+        rows (int): The number of rows of the boards.
+        columns (int): The number of columns of the boards.
+        records (np.ndarray): The record of every board.
+        seeds, next_seeds, fingerprints, shortest_distance, expected_turns (np.ndarray): Views of the fields
+            of the records.
+        has_tables (bool): Whether the library stores the tables of its boards. Every name in TABLES is also
+            an attribute holding that memory-mapped table, or None without tables.
+    """
+    def __init__(self, path: str):
+        """
+        Opens a library built by build_library().
+
+        path: The directory of the library.
+        """
+        with open(os.path.join(path, METADATA_FILE)) as metadata_file:
+            metadata = json.load(metadata_file)
+        if metadata.get("version") != VERSION:
+            raise ValueError(f"Board libraries of version {metadata.get('version')} are not supported")
+        self.path = path
+        self.rows = metadata["rows"]
+        self.columns = metadata["columns"]
+        self.records = np.load(os.path.join(path, RECORDS_FILE), mmap_mode='r')
+        self.seeds = self.records['seed']
+        self.next_seeds = self.records['next_seed']
+        self.fingerprints = self.records['fingerprint']
+        self.shortest_distance = self.records['shortest_distance']
+        self.expected_turns = self.records['expected_turns']
+        self._fingerprint_index = np.load(os.path.join(path, "fingerprint_index.npy"), mmap_mode='r')
+        self._seed_index = np.load(os.path.join(path, "seed_index.npy"), mmap_mode='r')
+        self.has_tables = metadata["tables"]
+        for name in TABLES:
+            setattr(self, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') if self.has_tables else None)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __reduce__(self):
+        return _attach, (self.path,)
+
+    @staticmethod
+    def _search(index: np.ndarray, key: int, matches) -> int:
+        """Returns the first board in a hash index with a key for which matches(board) is True, or None."""
+        mask = len(index) - 1
+        slot = key & mask
+        while True:
+            board = int(index[slot])
+            if board == 0:
+                return None
+            if matches(board - 1):
+                return board - 1
+            slot = (slot + 1) & mask
+
+    def find(self, fingerprint: str) -> int:
+        """
+        Looks up a board by its fingerprint.
+
+        fingerprint: The fingerprint, as returned by Board.fingerprint().
+        return: The index of the first board with that fingerprint, or None if the library doesn't have it.
+        """
+        digest = bytes.fromhex(fingerprint)
+        key = int.from_bytes(digest[:8], "little")
+        return self._search(self._fingerprint_index, key, lambda board: self.fingerprints[board].tobytes() == digest)
+
+    def find_seed(self, seed: int) -> int:
+        """
+        Looks up a board by its seed.
+
+        return: The index of the first board with that seed, or None if the library doesn't have it.
+        """
+        key = int(_seed_keys([seed])[0])
+        return self._search(self._seed_index, key, lambda board: self.seeds[board] == seed)
+
+    def entities(self, index: int) -> tuple:
+        """Returns the (head, tail) pairs of the snakes and the (bottom, top) pairs of the ladders of a board."""
+        record = self.records[index]
+        snakes = int(record['snakes'])
+        entities = record['entities'][:snakes + int(record['ladders'])].tolist()
+        return entities[:snakes], entities[snakes:]
+
+    def load_board(self, index: int, board=None):
+        """
+        Puts a board of the library on a Board or CompactBoard without generating it.
+
+        The board gets the seed and next seed of the record, so its dice and the boards after it are the same
+        as if it had been generated from its seed.
+
+        index: The index of the board in the library.
+        board: An empty board of the library's size to put it on, e.g. one just cleared. A new board is
+            created if None.
+        return: The board. Its derived data still has to be calculated with calculate_derived_data().
+        """
+        seed = int(self.seeds[index])
+        if board is None:
+            board = create_board(self.rows, self.columns, seed)
+        elif (board.rows, board.columns) != (self.rows, self.columns):
+            raise ValueError(f"The library has {self.rows}x{self.columns} boards, not {board.rows}x{board.columns}")
+        else:
+            board.reseed(seed)
+        snakes, ladders = self.entities(index)
+        placed = [board.add_snake(start, end) for start, end in snakes]
+        placed += [board.add_ladder(start, end) for start, end in ladders]
+        if not all(placed):
+            raise ValueError(f"Board {index} of the library doesn't fit on a board with snakes or ladders")
+        board.next_seed = int(self.next_seeds[index])
+        return board
+
+    def jump_table(self, index: int) -> JumpTable:
+        """Returns the JumpTable of a board, as views of the mapped tables if the library has them."""
+        if self.has_tables:
+            return JumpTable.from_arrays(self.destination[index], self.score_delta[index], self.is_snake[index])
+        return JumpTable(self.rows * self.columns, *self.entities(index))
+
+    def rules(self, index: int) -> Rules:
+        """Returns the rules of a board for engine.step."""
+        return Rules.from_jump_table(self.jump_table(index))
+
+
+@lru_cache(maxsize=None)
+def _attach(path: str) -> BoardLibrary:
+    """Opens a library once per process, however many tasks it is sent to the process with."""
+    return BoardLibrary(path)
+
+
+def _build_chunk(path: str, start: int, seeds, rows: int, columns: int, tables: bool) -> None:
+    """Generates the boards of a chunk of seeds and writes them to their records. Called in the worker processes."""
+    records = np.load(os.path.join(path, RECORDS_FILE), mmap_mode='r+')
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r+') for name in TABLES} if tables else {}
+    slots = records.dtype['entities'].shape[0]
+    for index, seed in enumerate(seeds, start):
+        board = generate_board(seed, rows, columns)
+        table = JumpTable.from_board(board)
+        snakes = [(snake.start_cell.number, snake.end_cell.number) for snake in board.snakes]
+        ladders = [(ladder.start_cell.number, ladder.end_cell.number) for ladder in board.ladders]
+        if len(snakes) + len(ladders) > slots:
+            raise ValueError(f"The board of seed {seed} has more than {slots} snakes and ladders")
+        records['seed'][index] = seed
+        records['next_seed'][index] = board.next_seed
+        records['fingerprint'][index] = np.frombuffer(bytes.fromhex(board.fingerprint()), dtype=np.uint8)
+        records['shortest_distance'][index] = -1 if board.shortest_distance is None else board.shortest_distance
+        records['expected_turns'][index] = MarkovAnalysis(table).expected_turns_from(1)
+        records['snakes'][index] = len(snakes)
+        records['ladders'][index] = len(ladders)
+        if snakes or ladders:
+            records['entities'][index, :len(snakes) + len(ladders)] = snakes + ladders
+        if tables:
+            arrays['destination'][index] = table.destination
+            arrays['score_delta'][index] = table.score_delta
+            arrays['is_snake'][index] = table.is_snake
+            arrays['distance_to_goal'][index] = board.distance_to_goal
+            arrays['next_hop'][index] = board.next_hop
+    records.flush()
+    for array in arrays.values():
+        array.flush()
+
+
+def seed_chain(seed: int, count: int, rows: int = ROWS, columns: int = COLUMNS) -> list:
+    """
+    Returns the seeds of the boards of a game session started with a seed, the boards a player gets by
+    finishing or restarting one game after another.
+
+    The seed of each board is drawn after generating the board before it, so the boards are generated one
+    after another in this process.
+
+    seed: The seed of the first board.
+    count: The number of seeds.
+    rows: The number of rows of the boards.
+    columns: The number of columns of the boards.
+    return: The list of seeds, starting with seed.
+    """
+    seeds = []
+    board = CompactBoard(rows, columns, seed=seed)
+    while len(seeds) < count:
+        seeds.append(board.seed)
+        generate_entities(board)
+        board.clear(seed=board.next_seed)
+    return seeds
+
+
+def build_library(path: str, seeds, rows: int = ROWS, columns: int = COLUMNS, workers: int = None,
+                  chunk_size: int = 256, tables: bool = True) -> BoardLibrary:
+    """
+    Generates a board for every seed across a pool of processes and stores them as a library.
+
+    The files are created at their full size first and every worker writes its boards straight into them,
+    so no board is sent between processes. The hash indexes are built from the records at the end.
+
+    path: The directory of the library, created if needed. A library already in it is replaced.
+    seeds: The seeds of the boards in the order they are stored, a range or a list such as seed_chain() returns.
+    rows: The number of rows of the boards.
+    columns: The number of columns of the boards.
+    workers: The number of worker processes. Defaults to the number of CPUs.
+    chunk_size: The number of seeds sent to a worker at a time.
+    tables: Whether to store the jump, distance and next-hop tables of the boards besides their records.
+        Without them the library takes about a tenth of the space and jump tables are built from the records.
+    return: The library.
+    """
+    logging.info(f'Building a library of {len(seeds)} boards')
+    os.makedirs(path, exist_ok=True)
+    metadata_path = os.path.join(path, METADATA_FILE)
+    # Without its metadata a half-written library can't be opened
+    if os.path.exists(metadata_path):
+        os.remove(metadata_path)
+    number_of_cells = rows * columns
+    np.lib.format.open_memmap(os.path.join(path, RECORDS_FILE), mode='w+', shape=(len(seeds),),
+                              dtype=record_dtype(number_of_cells, record_slots(rows, columns))).flush()
+    for name in TABLES:
+        table_path = os.path.join(path, f"{name}.npy")
+        if tables:
+            shape, dtype = _table_specs(len(seeds), number_of_cells)[name]
+            np.lib.format.open_memmap(table_path, mode='w+', dtype=dtype, shape=shape).flush()
+        elif os.path.exists(table_path):
+            os.remove(table_path)
+    starts = range(0, len(seeds), chunk_size)
+    with worker_pool(workers) as executor:
+        list(executor.map(_build_chunk, [path] * len(starts), starts, split_chunks(seeds, chunk_size),
+                          [rows] * len(starts), [columns] * len(starts), [tables] * len(starts)))
+    records = np.load(os.path.join(path, RECORDS_FILE), mmap_mode='r')
+    np.save(os.path.join(path, "fingerprint_index.npy"), _build_index(_fingerprint_keys(records['fingerprint'])))
+    np.save(os.path.join(path, "seed_index.npy"), _build_index(_seed_keys(records['seed'])))
+    with open(metadata_path, "w") as metadata_file:
+        json.dump({"version": VERSION, "rows": rows, "columns": columns, "count": len(seeds),
+                   "slots": records.dtype['entities'].shape[0], "tables": tables}, metadata_file)
+    return BoardLibrary(path)
+
+
+def _simulate_chunk(library: BoardLibrary, indices: range, games: int, seed: int) -> list:
+    """Simulates the games on a chunk of boards. Called in the worker processes."""
+    return [simulate_games(library.jump_table(index), games, seed=(seed, index)) for index in indices]
+
+
+def simulate_library(library: BoardLibrary, games: int, indices: range = None, workers: int = None,
+                     chunk_size: int = 64, seed: int = 0) -> list:
+    """
+    Simulates games on the boards of a library across a pool of processes.
+
+    library: The library.
+    games: The number of games simulated on each board.
+    indices: The indices of the boards, all of them by default.
+    workers: The number of worker processes. Defaults to the number of CPUs.
+    chunk_size: The number of boards sent to a worker at a time.
+    seed: The seed of the simulations; board i is simulated with the seed (seed, i).
+    return: The SimulationResult of every board, in the order of indices.
+    """
+    if indices is None:
+        indices = range(len(library))
+    chunks = split_chunks(indices, chunk_size)
+    results = []
+    with worker_pool(workers) as executor:
+        for chunk_results in executor.map(_simulate_chunk, [library] * len(chunks), chunks,
+                                          [games] * len(chunks), [seed] * len(chunks)):
+            results.extend(chunk_results)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a memory-mapped library of Snakes and Ladders boards.")
+    parser.add_argument("--start", type=int, default=0, help="First seed.")
+    parser.add_argument("--stop", type=int, default=10000, help="Seed to stop before.")
+    parser.add_argument("--chain", action="store_true",
+                        help="Store the boards of a game session started with --start, as many as --stop - --start.")
+    parser.add_argument("--no-tables", action="store_true", help="Store only the board records.")
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--columns", type=int, default=COLUMNS)
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes, defaults to the CPU count.")
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--output", default="boards.lib")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    seeds = range(args.start, args.stop)
+    if args.chain:
+        logging.getLogger().setLevel(logging.WARNING)
+        seeds = seed_chain(args.start, len(seeds), args.rows, args.columns)
+    library = build_library(args.output, seeds, args.rows, args.columns, args.workers, args.chunk_size,
+                            tables=not args.no_tables)
+    elapsed = time.perf_counter() - start_time
+    print(f"Built a library of {len(library)} boards in {elapsed:.1f} s -> {args.output}")
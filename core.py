@@ -0,0 +1,1639 @@
+"""Headless game logic of Snakes and Ladders: the board, cells, entities, generator, player, linked list and leaderboard.
+
+This module doesn't initialize pygame or open a display, so simulation and analysis workers can import it
+in milliseconds. pygame is only imported when a surface or rect is first needed for drawing.
+"""
+# Created by 5590073
+import random as rd
+from abc import ABC, abstractmethod
+import numpy as np
+from enum import Enum
+from collections import deque
+from functools import lru_cache
+import bisect
+import hashlib
+import math
+import logging
+
+from analysis import MarkovAnalysis
+from engine import Rules
+
+
+# Define the number of rows, columns, cell size and gap between cells
+# Created by 5590073
+ROWS = 10
+COLUMNS = 10
+CELL_SIZE_PIXELS = 25
+GAP_PIXELS = 5
+
+# Defines an enumeration Color that represents different colors using RGB
+# Created by 5590073
+class Color(Enum):
+    WHITE = (255, 255, 255)
+    BLACK = (0, 0, 0)
+    PLAYER_COLOR = (200, 50, 50)
+    GREEN = (0, 255, 0)
+    RED = (255, 0, 0)
+
+
+PLAYER_START_POSITION = [255, 425]
+
+# The number of best scores and times shown on the screen
+LEADERBOARD_SIZE = 10
+# The number of moves the player can undo; older moves are forgotten
+UNDO_CAPACITY = 256
+
+# The top left corner of the board on the screen and the size of the screen area boards are scaled to fit
+BOARD_POSITION = (250, 150)
+BOARD_AREA_PIXELS = 300
+# Cells smaller than this don't get their number drawn on them
+MIN_LABELLED_CELL_PIXELS = 20
+
+
+def cell_geometry(rows: int, columns: int) -> tuple:
+    """
+    Calculates the size of a cell and the gap between cells so that a board of any size fits on the screen.
+
+    Boards up to 10x10 keep the original 25 pixel cells with 5 pixel gaps. Larger boards are scaled down to
+    the same screen area; once a cell would be smaller than 5 pixels the gaps are dropped and the cell size
+    becomes fractional, so cells of very large boards share pixels.
+
+    rows: The number of rows of the board.
+    columns: The number of columns of the board.
+    return: A tuple of (cell size, gap) in pixels.
+    """
+    largest_side = max(rows, columns)
+    if largest_side <= max(ROWS, COLUMNS):
+        return CELL_SIZE_PIXELS, GAP_PIXELS
+    pitch = BOARD_AREA_PIXELS / largest_side
+    if pitch >= 6:
+        gap = max(1, int(pitch) // 6)
+        return int(pitch) - gap, gap
+    return pitch, 0
+
+
+# Main game board class
+# Created by 5590073 and 5588113
+class Board():
+    """Represents the game board.
+
+    Attributes:
+        rows (int): The number of rows in the board.
+        columns (int): The number of columns in the board.
+        cell_size (float): The size of a cell in pixels, scaled down for boards larger than 10x10.
+        gap (int): The gap between cells in pixels.
+        cells_list (dict): A dictionary of cells with their respective positions.
+        surface (pygame.Surface): The surface representing the board.
+        snakes (list): A list of Snake objects on the board.
+        ladders (list): A list of Ladder objects on the board.
+        shortest_distance (int): The shortest distance between the start cell and end cell.
+        distance_to_goal (np.ndarray): distance_to_goal[i] is the shortest distance from cell i to the last cell.
+        next_hop (np.ndarray): next_hop[i] is the next cell on a shortest path from cell i to the last cell.
+        layer (pygame.Surface): The pre-rendered static picture of the board, None until it is first drawn.
+        seed (int): The seed of the board's random generators, so the same seed gives the same board and dice rolls.
+        rng (random.Random): The random generator used to generate the snakes and ladders.
+        dice_rng (random.Random): The random generator used to roll the dice on this board.
+        next_seed (int): The seed of the board played after this one, None until the board is generated.
+    """
+    # Created by 5590073
+    def __init__(self, rows: int, columns: int, cells_list=None, cell_size=None, gap=None, seed=None):
+        logging.info('Initializing Board')
+        self.rows = rows
+        self.columns = columns
+        self.reseed(seed)
+        # A new dictionary for every board, so boards don't share their cells
+        self.cells_list = cells_list if cells_list is not None else {}
+        # The cell size and gap default to the ones that fit the board on the screen
+        if cell_size is None or gap is None:
+            cell_size, gap = cell_geometry(rows, columns)
+        self.cell_size = cell_size
+        self.gap = gap
+        self.surface_size = _board_surface_size(rows, columns, cell_size, gap)
+        self.color = None
+        self._surface = None
+        self.snakes = []
+        self.ladders = []
+        self.shortest_distance = None
+        self.markov_analysis = None
+        self.rules = None
+        self.layer = None
+        self.board_graph = None
+        self.distance_to_goal = None
+        self.next_hop = None
+
+    @property
+    def surface(self) -> "pygame.Surface":
+        """The surface representing the board, created on first use so headless boards don't allocate it."""
+        if self._surface is None:
+            import pygame as pg
+            self._surface = pg.Surface(self.surface_size)
+            if self.color is not None:
+                self._surface.fill(self.color)
+        return self._surface
+    # Created by 5590073
+    def create_cells(self, coordinates_array) -> None:
+        """
+        Creates the cells for the board.
+
+        coordinates_array: An array of coordinates for the cells.
+        """
+        logging.info('Creating cells')
+        number_of_cells_on_board = self.rows * self.columns
+        cell_size_pixels = max(1, math.ceil(self.cell_size))
+        # Create a dictionary of cells (cells_list) with their respective positions from the coordinates_array
+        for i in range(1, number_of_cells_on_board + 1):
+            coordinates = coordinates_array[i - 1]
+            # Each cell is an object of the Cell class
+            self.cells_list[i] = Cell(size=[cell_size_pixels, cell_size_pixels], position=coordinates)
+            self.cells_list[i].set_color(Color.BLACK.value)
+            self.cells_list[i].number = i
+
+    def reseed(self, seed=None) -> int:
+        """
+        Creates new random generators for generating the board and rolling the dice.
+
+        seed: The seed of the generators. A random seed is picked if it is None, so every board has a seed
+            it can be reproduced from.
+        return: The seed.
+        """
+        if seed is None:
+            seed = rd.getrandbits(32)
+        self.seed = seed
+        self.rng = rd.Random(seed)
+        self.next_seed = None
+        # A separate stream, so rolling the dice doesn't change the boards generated after it
+        self.dice_rng = dice_generator(seed)
+        return seed
+
+    def clear(self, seed=None, keep_cells: bool = True) -> None:
+        """
+        Removes all snakes and ladders from the board, so a new board can be generated.
+
+        The cells never move between boards, so by default they are kept with their surfaces and only their
+        contents are emptied; restarting a game then allocates almost nothing. The derived data (graph,
+        shortest distance, Markov analysis, layer) has to be recalculated afterwards. It is only ever
+        replaced, never changed in place, so the data shared with a BoardCache stays valid.
+
+        seed: The seed for generating the next board, a random one if None.
+        keep_cells: False recreates all cells instead, e.g. after a cell was moved or recolored.
+        """
+        logging.info('Clearing board')
+        self.reseed(seed)
+        if keep_cells and len(self.cells_list) == self.rows * self.columns:
+            for cell in self.cells_list.values():
+                cell.contents = None
+        else:
+            self.cells_list = {}
+            self.create_cells(generate_coordinates(self.rows, self.columns, self.cell_size, gap=self.gap))
+        self.snakes = []
+        self.ladders = []
+        self.board_graph = None
+        self.distance_to_goal = None
+        self.next_hop = None
+        self.shortest_distance = None
+        self.markov_analysis = None
+        self.rules = None
+        self.layer = None
+
+    def add_snake(self, start_cell_number: int, end_cell_number: int) -> bool:
+        """
+        Places a snake from its head at start_cell_number to its tail at end_cell_number if both cells are empty.
+
+        return: True if the snake was placed, False otherwise.
+        """
+        snake = Snake(start_cell=self.cells_list[start_cell_number], end_cell=self.cells_list[end_cell_number])
+        if snake.put_on_board():
+            self.snakes.append(snake)
+            return True
+        return False
+
+    def add_ladder(self, start_cell_number: int, end_cell_number: int) -> bool:
+        """
+        Places a ladder from its bottom at start_cell_number to its top at end_cell_number if both cells are empty.
+
+        return: True if the ladder was placed, False otherwise.
+        """
+        ladder = Ladder(start_cell=self.cells_list[start_cell_number], end_cell=self.cells_list[end_cell_number])
+        if ladder.put_on_board():
+            self.ladders.append(ladder)
+            return True
+        return False
+    # Created by 5590073
+    def update_cells(self, screen) -> None:
+        """
+        Updates the cells on the board. This includes updating the surface of each cell and rendering the text on each cell.
+
+        Cells too small for their number are drawn without it, and when there are no gaps between the cells
+        (very large boards) they are drawn as a single block.
+
+        screen: The pygame.Surface object representing the screen.
+        """
+        import pygame as pg
+        from text_cache import render_text
+        if self.gap == 0:
+            first, last = self.cells_list[1].rect, self.cells_list[len(self.cells_list)].rect
+            pg.draw.rect(screen, Color.BLACK.value, first.union(last))
+            return
+        draw_labels = self.cell_size >= MIN_LABELLED_CELL_PIXELS
+        for i in range(1, len(self.cells_list) + 1):
+            # Update the surface (skin) of each cell on the screen
+            screen.blit(self.cells_list[i].surface, self.cells_list[i].rect)
+            if not draw_labels:
+                continue
+            # Render the text on each cell
+            text_surface = render_text(str(i), 15, Color.WHITE.value, False)
+            text_rect = text_surface.get_rect(center=self.cells_list[i].rect.center)
+            screen.blit(text_surface, text_rect)
+    # Created by 5590073
+    def set_color(self, color_array) -> None:
+        """
+        Sets the color of the board.
+
+        color_array: An array representing the color.
+        """
+        self.color = color_array
+        if self._surface is not None:
+            self._surface.fill(color_array)
+    
+    # Created by 5588113  
+    def create_board_graph(self) -> dict:
+        """Create a graph representing connections between cells.
+
+        The graph is stored in the board object.
+
+        return: A dictionary representing the graph.
+        """
+        logging.info('Creating board graph')
+        number_of_cells = len(self.cells_list)
+        board_graph = {}
+        for cell_number, cell in self.cells_list.items():
+            board_graph[cell_number] = []
+            # If ladder detected and node is not an end_cell, append ladder's end to the node
+            if cell.contents is not None and isinstance(cell.contents, Ladder) and cell_number != cell.contents.end_cell.number:
+                board_graph[cell_number].append(cell.contents.end_cell.number)
+            else:
+                for i in range(1, 7):  # Possible dice roll values
+                    next_cell_number = cell_number + i
+                    if next_cell_number <= number_of_cells:
+                        if self.cells_list[next_cell_number].contents is not None:
+                            next_cell_number = self.cells_list[next_cell_number].contents.end_cell.number
+                        board_graph[cell_number].append(next_cell_number)
+        self.board_graph = board_graph  # Store board graph in the board object
+        return board_graph
+
+    # Created by 5588113
+    def calculate_shortest_path(self, start_cell_number: int, end_cell_number: int) -> int:
+        """Calculate the shortest path between two cells using BFS.
+
+        When the end cell is the last cell the distance is read from the distance-to-goal table, which is
+        calculated first if needed, so the same search also serves the remaining moves lookups.
+
+        return: The number of steps of the shortest path, or None if there is no path.
+        """
+        if self.board_graph is None:
+            raise ValueError("Board graph not initialized. Call create_board_graph() first.")
+
+        if end_cell_number == len(self.cells_list):
+            if self.distance_to_goal is None:
+                self.calculate_distances_to_goal()
+            self.shortest_distance = self.remaining_moves(start_cell_number)
+            return self.shortest_distance
+
+        # Cells are marked as visited when they are enqueued, so each cell is enqueued only once
+        visited = {start_cell_number}
+        queue = deque([(start_cell_number, 0)])  # (cell_number, distance)
+        while queue:
+            cell_number, distance = queue.popleft()
+            if cell_number == end_cell_number:
+                self.shortest_distance = distance
+                return distance
+            for neighbor_cell in self.board_graph[cell_number]:
+                if neighbor_cell not in visited:
+                    visited.add(neighbor_cell)
+                    queue.append((neighbor_cell, distance + 1))
+        return None # No path found
+
+    def calculate_distances_to_goal(self) -> np.ndarray:
+        """Calculate the shortest distance from every cell to the last cell with one BFS backwards from the last cell.
+
+        Besides the distance, every cell gets the next cell on one of its shortest paths, so the remaining
+        number of steps and the optimal route from wherever the player stands are looked up without
+        searching again. Both tables are stored in the board object.
+
+        return: The distance_to_goal array, where distance_to_goal[i] is the number of steps from cell i
+            to the last cell, or -1 if the last cell can't be reached from it.
+        """
+        if self.board_graph is None:
+            raise ValueError("Board graph not initialized. Call create_board_graph() first.")
+        logging.info('Calculating distances to goal')
+        number_of_cells = len(self.cells_list)
+        # Reverse the edges, so the BFS can walk from the last cell to the cells leading to it
+        predecessors = [[] for _ in range(number_of_cells + 1)]
+        for cell_number, neighbor_cells in self.board_graph.items():
+            for neighbor_cell in neighbor_cells:
+                predecessors[neighbor_cell].append(cell_number)
+
+        distance = [-1] * (number_of_cells + 1)
+        next_hop = [0] * (number_of_cells + 1)
+        distance[number_of_cells] = 0
+        next_hop[number_of_cells] = number_of_cells
+        queue = deque([number_of_cells])
+        while queue:
+            cell_number = queue.popleft()
+            for previous_cell in predecessors[cell_number]:
+                # Marked when enqueued, so each cell is enqueued only once
+                if distance[previous_cell] == -1:
+                    distance[previous_cell] = distance[cell_number] + 1
+                    next_hop[previous_cell] = cell_number
+                    queue.append(previous_cell)
+
+        self.distance_to_goal = np.array(distance, dtype=np.int32)
+        self.next_hop = np.array(next_hop, dtype=np.int32)
+        return self.distance_to_goal
+
+    def remaining_moves(self, cell_number: int) -> int:
+        """Returns the minimum number of steps from a cell to the last cell, or None if it can't be reached."""
+        distance = int(self.distance_to_goal[cell_number])
+        return distance if distance >= 0 else None
+
+    def optimal_route(self, cell_number: int) -> list:
+        """
+        Returns the cells on a shortest path from a cell to the last cell.
+
+        cell_number: The cell the route starts from.
+        return: The cell numbers of the route, starting with cell_number and ending with the last cell,
+            or an empty list if the last cell can't be reached.
+        """
+        if self.distance_to_goal[cell_number] < 0:
+            return []
+        route = [cell_number]
+        while route[-1] != len(self.cells_list):
+            route.append(int(self.next_hop[route[-1]]))
+        return route
+
+    def calculate_expected_turns(self) -> MarkovAnalysis:
+        """Solve the board as a Markov chain for the expected number of turns from every cell.
+
+        The analysis is stored in the board object.
+
+        return: The MarkovAnalysis of the board.
+        """
+        logging.info('Calculating expected number of turns')
+        self.markov_analysis = MarkovAnalysis.from_board(self)
+        return self.markov_analysis
+
+    def calculate_derived_data(self, cache=None) -> None:
+        """
+        Calculates everything derived from the snakes and ladders: the graph, the distances to the last cell,
+        the Markov analysis and the rules the game is played with.
+
+        cache: A BoardCache. If it holds the data for a board with the same fingerprint, the data is taken
+            from it instead of being calculated, otherwise the calculated data is stored in it.
+        """
+        fingerprint = self.fingerprint()
+        if cache is not None and cache.restore(self, fingerprint):
+            return
+        self.create_board_graph()
+        self.calculate_shortest_path(start_cell_number=1, end_cell_number=len(self.cells_list))
+        self.calculate_expected_turns()
+        self.rules = Rules.from_jump_table(self.markov_analysis.table)
+        if cache is not None:
+            cache.store(self, fingerprint)
+
+    def fingerprint(self) -> str:
+        """
+        Returns a canonical fingerprint of the board, the same for any two boards of the same size with the
+        same snakes and ladders, however they were created.
+        """
+        snakes = sorted((snake.start_cell.number, snake.end_cell.number) for snake in self.snakes)
+        ladders = sorted((ladder.start_cell.number, ladder.end_cell.number) for ladder in self.ladders)
+        return board_fingerprint(self.rows, self.columns, snakes, ladders)
+
+
+def board_fingerprint(rows: int, columns: int, snakes, ladders) -> str:
+    """
+    Hashes the size of a board and its snakes and ladders into a fingerprint.
+
+    rows: The number of rows of the board.
+    columns: The number of columns of the board.
+    snakes: The (head, tail) cell number pairs, sorted by head.
+    ladders: The (bottom, top) cell number pairs, sorted by bottom.
+    return: The fingerprint as a hexadecimal string.
+    """
+    header = np.array([rows, columns, len(snakes), len(ladders)], dtype=np.int64)
+    data = np.concatenate([header, np.asarray(snakes, dtype=np.int64).ravel(),
+                           np.asarray(ladders, dtype=np.int64).ravel()])
+    return hashlib.blake2b(data.tobytes(), digest_size=16).hexdigest()
+
+
+# Created by 5590073
+def dice_generator(seed) -> rd.Random:
+    """Returns the random generator the dice of the board with the given seed are rolled with."""
+    return rd.Random(f"dice-{seed}")
+
+
+def roll_dice(rng=rd):
+    """Rolls a six-sided dice with the given random generator, e.g. a board's dice_rng; the random module by default."""
+    return rng.randint(1, 6)
+
+
+# Created by 5590073 and 5588113
+class Entity(ABC):
+    """Represents an entity on the board."""
+
+    def __init__(self, start_cell=None, end_cell=None, color=None):
+        # start_cell and end_cell contain the same object of the Cell class
+        self.start_cell = start_cell
+        self.end_cell = end_cell
+        self.color = color
+
+    @abstractmethod
+    def put_on_board(self):
+        """Places the entity on the board."""
+        pass
+
+    @abstractmethod
+    def draw(self, screen):
+        """Draws the entity on the screen."""
+        pass
+
+
+def _entity_line_width(cell_width: int) -> int:
+    """Returns the width of snake and ladder lines, 5 pixels on the normal board and thinner on small cells."""
+    return max(1, min(5, cell_width // 5))
+
+
+# Created by 5590073 and 5588113
+class Snake(Entity):
+    """Represents a snake on the board."""
+
+    def __init__(self, start_cell=None, end_cell=None):
+        super().__init__(start_cell, end_cell, Color.RED.value)
+
+    def draw(self, screen):
+        """Draws the snake on the screen."""
+        import pygame as pg
+        pg.draw.line(screen, self.color, self.start_cell.rect.center, self.end_cell.rect.center,
+                     _entity_line_width(self.start_cell.rect.width))
+
+    def put_on_board(self) -> bool:
+        """Places the snake on the board."""
+        # Check if the start and end cells are empty and not the same
+        if self.start_cell.contents == None and self.end_cell.contents == None and self.start_cell != self.end_cell:
+            self.start_cell.contents = self
+            self.end_cell.contents = self
+            return True
+
+        return False
+
+
+# Created by 5590073 and 5588113
+class Ladder(Entity):
+    """Represents a ladder on the board."""
+
+    def __init__(self, start_cell=None, end_cell=None):
+        super().__init__(start_cell, end_cell, Color.GREEN.value)
+
+    def draw(self, screen):
+        """Draws the ladder on the screen."""
+        import pygame as pg
+        pg.draw.line(screen, self.color, self.start_cell.rect.center, self.end_cell.rect.center,
+                     _entity_line_width(self.start_cell.rect.width))
+
+    def put_on_board(self) -> bool:
+        """Places the ladder on the board."""
+        # Check if the start and end cells are empty and not the same
+        if self.start_cell.contents == None and self.end_cell.contents == None and self.start_cell != self.end_cell:
+            self.start_cell.contents = self
+            self.end_cell.contents = self
+            return True
+
+        return False
+
+
+class FreeSpaceIndex:
+    """
+    Keeps track of where rectangles of given sizes still fit on the board matrix.
+
+    For every footprint (rows, columns) a boolean map holds whether a rectangle of that size with its top left
+    corner at each position covers only free cells. The maps are built once with a summed-area table and
+    updated locally when a rectangle is reserved, so finding a free place never needs a blind retry.
+
+    Attributes:
+        valid (dict): Maps a footprint to its boolean map of valid top left corners.
+        row_counts (dict): Maps a footprint to the number of valid top left corners left in each row of its map.
+        counts (dict): Maps a footprint to the total number of valid top left corners left.
+    """
+    def __init__(self, free: np.ndarray, footprints, rng=rd):
+        """
+        Builds the maps of valid positions for every footprint.
+
+        free: A boolean matrix which is True for the cells entities can be placed on.
+        footprints: The (rows, columns) sizes of the rectangles that will be placed.
+        rng: The random generator positions are sampled with.
+        """
+        self.rng = rng
+        rows, columns = free.shape
+        # summed_area[i, j] is the number of occupied cells above and left of (i, j)
+        summed_area = np.zeros((rows + 1, columns + 1), dtype=np.int32)
+        summed_area[1:, 1:] = (~free).cumsum(axis=0).cumsum(axis=1)
+        self.valid = {}
+        self.row_counts = {}
+        self.counts = {}
+        for height, width in set(footprints):
+            if height > rows or width > columns:
+                continue
+            occupied_in_window = (summed_area[height:, width:] - summed_area[:-height, width:]
+                                  - summed_area[height:, :-width] + summed_area[:-height, :-width])
+            self.valid[(height, width)] = occupied_in_window == 0
+            self.row_counts[(height, width)] = self.valid[(height, width)].sum(axis=1)
+            self.counts[(height, width)] = int(self.row_counts[(height, width)].sum())
+
+    def fits(self, footprint: tuple) -> bool:
+        """Returns True if a rectangle of the given size fits somewhere on the free cells."""
+        return self.counts.get(footprint, 0) > 0
+
+    def sample(self, footprint: tuple):
+        """
+        Picks a random position where a rectangle of the given size fits, uniformly among all such positions.
+
+        The row is found from the running total of the row counts and the column from that row alone, so a
+        sample costs one pass over a row and a column of the map instead of the whole map.
+
+        footprint: The (rows, columns) size of the rectangle.
+        return: The (row, column) of the top left corner, or None if the rectangle doesn't fit anywhere.
+        """
+        if not self.fits(footprint):
+            return None
+        running_total = np.cumsum(self.row_counts[footprint])
+        position = self.rng.randrange(self.counts[footprint])
+        row = int(np.searchsorted(running_total, position, side='right'))
+        position -= int(running_total[row - 1]) if row > 0 else 0
+        column = int(np.flatnonzero(self.valid[footprint][row])[position])
+        return row, column
+
+    def reserve(self, row: int, column: int, footprint: tuple) -> None:
+        """Marks a rectangle as occupied, removing every position that would overlap it from the maps."""
+        height, width = footprint
+        for other_footprint, valid in self.valid.items():
+            other_height, other_width = other_footprint
+            first_row = max(0, row - other_height + 1)
+            overlapping = valid[first_row: row + height, max(0, column - other_width + 1): column + width]
+            removed = overlapping.sum(axis=1)
+            self.row_counts[other_footprint][first_row: first_row + len(overlapping)] -= removed
+            self.counts[other_footprint] -= int(removed.sum())
+            overlapping[:] = False
+
+
+# Created by 5588113
+class Generator:
+    """This class manages the creation of snakes and ladders on the game board. It controls the percentage of the board
+        covered with entities and shapes their placement to keep the player engaged while maintaining randomness.
+        
+        E.g. preventing creation of entities that are too long or placed horizontally.
+    """
+    
+    # The number of times a board matrix is filled again when the coverage target is missed
+    placement_attempts = 10
+
+    def __init__(self, board: Board):
+        """Initialize the Generator.
+        
+        Args:
+            board (Board): The class Board attribute
+            
+        Attributes:
+            rows (int): Number of rows in the game board.
+            columns (int): Number of columns in the game board.
+            entity_matrices (list): A list to store matrices that incluede cells on which the entities are placed.
+            free_space (FreeSpaceIndex): Where each null matrix still fits on the board matrix being filled.
+            rng (random.Random): The random generator of the board.
+            
+        Data structures:
+            Dictionary/Hashmap
+            List/Array
+            2D List (matrix)
+            Summed-area table (FreeSpaceIndex)
+                
+        Methods:
+            _board_cells_to_matrix (protected): Converts the class Board's cells to a matrix.
+            _create_null_matrices (protected): Creates a set of null matrices ranging from 3x2 to 5x5 that reserve spaces for entities.
+            _put_null_matrix (protected): Indicates, whether a specific place can be reserved for an entity.
+            _smooth_placement (protected): Controls the entities coverage.
+            _fill_board_matrix (protected): Places null matrices until they cover the target number of cells.
+            _get_entities_coordinates (protected): Get values of opposite corners from entity matrices
+            
+            create_snakes_on_board (public): Receive coordinates for snakes and asign them with class Cell
+            create_ladders_on_board (pulic): Receive coordinates for ladders and asign them with class Cell
+            
+        Example private methods procedure:
+        
+            Board matrix (10x10), null matrices placed:
+
+                [[ 91  92  93  94  95  96  97  98  99 100]
+                [ 81  82  83  84  85  86  87  88  89  90]
+                [ 71  72   0   0   0  76  77  78  79  80]
+                [ 61  62   0   0   0  66  67  68  69   0]
+                [ 51  52   0   0   0  56  57  58  59   0]
+                [ 41  42   0   0   0   0   0  48  49   0]
+                [ 31  32  33  34  35   0   0  38  39  40]
+                [ 21  22   0   0   0   0   0  28  29  30]
+                [ 11  12   0   0   0  16  17  18  19  20]
+                [  1   2   0   0   0   6   7   8   9  10]]
+
+            Extracted entity Matrices according to null matrices positions:
+            
+                [ 75 ]   [ 70 ]   [ 23  24  25 ]   [ 73  74 ]   [ 46  47 ]
+                [ 65 ]   [ 60 ]   [ 13  14  15 ]   [ 63  64 ]   [ 36  37 ]
+                [ 55 ]   [ 50 ]   [  3   4   5 ]   [ 53  54 ]   [ 26  27 ]
+                [ 45 ]                             [ 43  44 ]
+            
+            Extracted coordinates list: [[45, 75], [50, 70], [5, 23] [43, 74], [26, 47]]
+        """
+        self.board = board
+        self.rows = board.rows
+        self.columns = board.columns
+        self.entity_matrices = []
+        self.free_space = None
+        # The board's own random generator, so the same seed gives the same board
+        self.rng = getattr(board, 'rng', rd)
+
+    def _board_cells_to_matrix(self) -> np.ndarray:
+        """
+        Convert board cells to a matrix.
+
+        Returns:
+            np.ndarray: The matrix representing the board cells.
+        """
+        # Called by: _smooth_placement()
+        # Cell numbers 1 to rows * columns, row by row from the bottom
+        board_matrix = np.arange(1, self.rows * self.columns + 1).reshape(self.rows, self.columns)
+        return np.flipud(board_matrix)
+
+    def _create_null_matrices(self) -> list:
+        """
+        Create a set of null matrices ranging from 3x2 to 5x5 that reserve spaces for entities.
+
+        Sizes that don't fit on the board are left out.
+        
+        Returns:
+            list: A list of null matrices.
+        """
+        # Called by: _smooth_placement()
+        null_matrices = []
+        for i in range(3, 6):
+            for j in range(2, 6):
+                if i <= self.rows and j <= self.columns:
+                    null_matrices.append(np.zeros((i, j)))
+        return null_matrices
+
+    def _put_null_matrix(self, board_matrix, null_matrix) -> bool:
+        """
+        Indicates whether a specific place can be reserved for an entity.
+
+        Args:
+            board_matrix (np.ndarray): The current state of the board matrix.
+            null_matrix (np.ndarray): The null matrix representing the entity to be placed.
+
+        Returns:
+            bool: True if the entity can be placed, False otherwise.
+        """
+        # Called by: _smooth_placement()
+        entity_rows, entity_columns = null_matrix.shape
+        # The free space index only offers places away from the start/end cell and other null matrices
+        position = self.free_space.sample((entity_rows, entity_columns))
+        if position is None:
+            return False
+        row_start, column_start = position
+
+        selected_cells = board_matrix[row_start: row_start + entity_rows, column_start: column_start + entity_columns]
+        # Form entitiy matrix and put it in the list
+        self.entity_matrices.append(selected_cells.copy())
+        board_matrix[row_start: row_start + entity_rows, column_start: column_start + entity_columns] = null_matrix
+        self.free_space.reserve(row_start, column_start, (entity_rows, entity_columns))
+        return True
+
+    def _smooth_placement(self) -> None:
+        """
+        Controls the entities coverage by adjusting the coverage percentage.
+
+        The board matrix is filled up to the coverage target by _fill_board_matrix. On small boards the
+        randomly placed null matrices can split the free space into pieces too small for any of them, so
+        the filling is repeated with a new random order, up to placement_attempts times, and the fullest
+        result is kept.
+
+        This method is called by:
+            - _get_entities_coordinates()
+        """
+        # Called by: create_snakes_on_board(), create_ladders_on_board()
+        total_elements = self.rows * self.columns
+        # Ensure 70% coverage
+        target_elements = int(total_elements * 0.7)
+        null_matrices = self._create_null_matrices()
+        if not null_matrices:
+            return
+        smallest_size = min(null_matrix.size for null_matrix in null_matrices)
+
+        first_entity = len(self.entity_matrices)
+        best_covered, best_entity_matrices = -1, []
+        for _ in range(self.placement_attempts):
+            del self.entity_matrices[first_entity:]
+            elements_covered = self._fill_board_matrix(null_matrices, target_elements)
+            if elements_covered > best_covered:
+                best_covered, best_entity_matrices = elements_covered, self.entity_matrices[first_entity:]
+            # No null matrix is small enough for the coverage left
+            if target_elements - elements_covered < smallest_size:
+                break
+        self.entity_matrices[first_entity:] = best_entity_matrices
+
+    def _fill_board_matrix(self, null_matrices: list, target_elements: int) -> int:
+        """
+        Places null matrices on a new board matrix until they cover the target number of cells.
+
+        Every null matrix size is placed once in random order, then random sizes that still fit are added
+        until the coverage reaches the target or no null matrix fits in the space left. Each placement covers
+        at least 6 cells, so this takes at most one placement per 6 cells of the board.
+
+        Args:
+            null_matrices (list): The null matrices to place.
+            target_elements (int): The number of cells to cover.
+
+        Returns:
+            int: The number of cells covered.
+        """
+        # Called by: _smooth_placement()
+        board_matrix = self._board_cells_to_matrix()
+        self.rng.shuffle(null_matrices)
+        # The start and end cells are never covered
+        free = ~np.isin(board_matrix, [1, self.rows * self.columns])
+        self.free_space = FreeSpaceIndex(free, [null_matrix.shape for null_matrix in null_matrices], self.rng)
+
+        elements_covered = 0
+        for null_matrix in null_matrices:
+            if elements_covered + null_matrix.size <= target_elements:
+                if self._put_null_matrix(board_matrix, null_matrix):
+                    elements_covered += null_matrix.size
+
+        while True:
+            fitting = [null_matrix for null_matrix in null_matrices
+                       if elements_covered + null_matrix.size <= target_elements
+                       and self.free_space.fits(null_matrix.shape)]
+            if not fitting:
+                break
+            null_matrix = self.rng.choice(fitting)
+            self._put_null_matrix(board_matrix, null_matrix)
+            elements_covered += null_matrix.size
+        return elements_covered
+
+    def _get_entities_coordinates(self) -> list:
+        """
+        Get values of opposite corners from entity matrices.
+
+        Returns:
+            list: A list containing coordinates of entities' corners.
+        """
+        entities_coordinates = []
+        self._smooth_placement()
+
+        for entity_matrix in self.entity_matrices:
+            rows, columns = entity_matrix.shape
+
+            if columns == 1:
+                # Get the top and bottom corner coordinates for entities with single column
+                top_corner = entity_matrix[0, 0]
+                bottom_corner = entity_matrix[rows - 1, 0]
+            else:
+                # For entities with multiple columns, select a random column for the top corner
+                top_row = 0
+                bottom_row = rows - 1
+                selected_column = self.rng.choice([0, columns - 1])
+                top_corner = entity_matrix[top_row, selected_column]
+
+                # Depending on the selected column, get the corresponding bottom corner coordinate
+                if selected_column == 0:
+                    bottom_corner = entity_matrix[bottom_row, selected_column - 1]
+                else:
+                    bottom_corner = entity_matrix[bottom_row, 0]
+
+            entities_coordinates.append([bottom_corner, top_corner])
+
+        return entities_coordinates
+    
+    def create_snakes_on_board(self, board: Board) -> None:
+        """
+        Create snakes on the game board based on the coordinates obtained from _get_entities_coordinates.
+
+        Args:
+            board (Board): The game board (Board or CompactBoard) where the snakes will be placed.
+        """
+        logging.info('Creating snakes on the game board')
+        snakes_coordinates = self._get_entities_coordinates
+        for cells in self._get_entities_coordinates():
+            bottom_coordinate, top_coordinate = cells
+            
+            board.add_snake(top_coordinate, bottom_coordinate)
+
+    def create_ladders_on_board(self, board: Board) -> None:
+        """
+        Create ladders on the game board based on the coordinates obtained from _get_entities_coordinates.
+
+        Args:
+            board (Board): The game board (Board or CompactBoard) where the ladders will be placed.
+        """
+        logging.info('Creating ladders on the game board')
+        for cells in self._get_entities_coordinates():
+            bottom_coordinate, top_coordinate = cells
+            
+            board.add_ladder(bottom_coordinate, top_coordinate)
+
+
+def generate_entities(board) -> None:
+    """
+    Generates the snakes and ladders of an empty board from its seed, the same way for every board, and then
+    draws the seed of the next board from the board's generator, so a whole session of boards follows from
+    the first seed.
+
+    board: The Board or CompactBoard, cleared or just created.
+    """
+    generator = Generator(board=board)
+    generator.create_snakes_on_board(board=board)
+    generator.create_ladders_on_board(board=board)
+    board.next_seed = board.rng.getrandbits(32)
+
+
+# Created by 5590073, edited by 5555194
+class Player():
+    """
+        Represents the player on the board. The game itself is played on a GameState (see engine.py) which
+        the player shows with set_state().
+
+        state: the GameState the player shows
+        _score : the total score of the player (private)
+        num_snakes: how many snakes the player encounters during the game (if 0 points will double in the end)
+        moves: will later be the dice value when rolled
+        number_steps_made: how many steps the player has made
+        history: a bounded log of the player's previous states that can be undone and redone
+        rect: the rectangle representing the player
+        rect.topleft: the top left corner of the rectangle (for positining)
+        surface: the surface representing the player (like a skin)
+    """
+
+    # Created by 5590073 edited by 5555194
+    def __init__(self, position=[0, 0], current_cell=None, tot_score=100, moves=0):
+        self.size = [CELL_SIZE_PIXELS, CELL_SIZE_PIXELS]
+        self.color = None
+        self._surface = None
+        self._rect = None
+        self.position = position
+        self.current_cell = current_cell
+        self._score = tot_score
+        self.moves = moves
+        self.num_snakes = 0
+        self.number_steps_made = 0
+        self.state = None
+        self.history = MoveLog(UNDO_CAPACITY)
+
+    @property
+    def surface(self) -> "pygame.Surface":
+        """The surface representing the player, created on first use so headless games don't allocate it."""
+        if self._surface is None:
+            import pygame as pg
+            self._surface = pg.Surface(self.size)
+            if self.color is not None:
+                self._surface.fill(self.color)
+        return self._surface
+
+    @property
+    def rect(self) -> "pygame.Rect":
+        """The rectangle representing the player, kept at the player's position."""
+        if self._rect is None:
+            import pygame as pg
+            self._rect = pg.Rect(self.position, self.size)
+        else:
+            self._rect.topleft = self.position
+        return self._rect
+    # Created by 5590073
+    def set_position(self, position_array):
+        self.position = position_array
+    # Created by 5590073
+    def set_color(self, color_array):
+        self.color = color_array
+        if self._surface is not None:
+            self._surface.fill(color_array)
+
+    def set_size(self, size: int) -> None:
+        """Sets the width and height of the player in pixels, e.g. to match the cells of a large board."""
+        self.size = [size, size]
+        self._surface = None
+        self._rect = None
+
+    def set_state(self, state: "GameState", cell) -> None:
+        """
+        Shows a state of the game: puts the player on the state's cell and copies its score, roll, number of
+        snakes and number of steps.
+
+        state: The GameState.
+        cell: The Cell (or CellView) with the state's cell number.
+        """
+        self.state = state
+        self.current_cell = cell
+        self.position = cell.position
+        self._score = state.score
+        self.moves = state.roll
+        self.num_snakes = state.snakes
+        self.number_steps_made = state.steps
+
+    def play(self, state: "GameState", cell) -> None:
+        """
+        Moves on to the state after a move, remembering the current one so the move can be undone.
+
+        state: The GameState after the move.
+        cell: The Cell (or CellView) with the new state's cell number.
+        """
+        self.history.push(self.state)
+        self.set_state(state, cell)
+
+    def undo(self, board) -> bool:
+        """
+        Undo the last move made by the player.
+
+        board: The board the player is on.
+        return: True if a move was undone, False if there was nothing to undo.
+        """
+        state = self.history.undo(self.state)
+        if state is None:
+            return False
+        # Restore the previous state including position, score, moves, number of steps made, number of snakes encountered and current cell
+        self.set_state(state, board.cells_list[state.cell])
+        return True
+
+    def redo(self, board) -> bool:
+        """
+        Redo the last move undone by the player.
+
+        board: The board the player is on.
+        return: True if a move was redone, False if there was nothing to redo.
+        """
+        state = self.history.redo(self.state)
+        if state is None:
+            return False
+        self.set_state(state, board.cells_list[state.cell])
+        return True
+
+    # Created by 5555194
+    # A method to get the player's score
+    def get_score(self) -> int:
+        return self._score
+
+
+class MoveLog:
+    """
+    A fixed-capacity ring buffer of game states for undo and redo.
+
+    The slots are allocated once, so the memory stays the same however long the session is. When the log is
+    full the oldest move is forgotten. Pushing, undoing and redoing are all O(1); pushing a new move forgets
+    the moves that could be redone.
+
+    Attributes:
+        capacity (int): The largest number of moves that can be undone.
+    """
+    __slots__ = ('capacity', '_states', '_start', '_undoable', '_redoable')
+
+    def __init__(self, capacity: int = UNDO_CAPACITY):
+        self.capacity = capacity
+        self._states = [None] * capacity
+        self._start = 0  # The index of the oldest state
+        self._undoable = 0  # The number of states that can be undone to, after _start
+        self._redoable = 0  # The number of states that can be redone to, after the undoable ones
+
+    def push(self, state) -> None:
+        """Records the state before a move."""
+        if self.capacity == 0:
+            return
+        self._states[(self._start + self._undoable) % self.capacity] = state
+        if self._undoable == self.capacity:
+            # Forget the oldest move
+            self._start = (self._start + 1) % self.capacity
+        else:
+            self._undoable += 1
+        self._redoable = 0
+
+    def undo(self, current):
+        """
+        Steps back one move.
+
+        current: The current state, kept to be redone.
+        return: The state before the last move, or None if there is none.
+        """
+        if self._undoable == 0:
+            return None
+        self._undoable -= 1
+        self._redoable += 1
+        index = (self._start + self._undoable) % self.capacity
+        # The slot of the state undone to holds the state to redo to from then on
+        state, self._states[index] = self._states[index], current
+        return state
+
+    def redo(self, current):
+        """
+        Steps forward one undone move.
+
+        current: The current state, kept to be undone again.
+        return: The state after the last undone move, or None if there is none.
+        """
+        if self._redoable == 0:
+            return None
+        index = (self._start + self._undoable) % self.capacity
+        self._undoable += 1
+        self._redoable -= 1
+        state, self._states[index] = self._states[index], current
+        return state
+
+    def clear(self) -> None:
+        """Forgets all moves, e.g. when a new game starts."""
+        self._states[:] = [None] * self.capacity
+        self._start = self._undoable = self._redoable = 0
+
+    def __len__(self) -> int:
+        """The number of moves that can be undone."""
+        return self._undoable
+
+
+# The board consists of cells, which are the squares
+# Created by 5590073
+class Cell():
+    """
+    Represents a cell on the game board.
+
+    Attributes:
+        surface (pygame.Surface): The surface representing the cell.
+        rect (pygame.Rect): The rectangle representing the cell.
+        position (list): The position of the cell on the board.
+        contents (Entity): The entity (if any) contained in the cell.
+        number (int): The number of the cell.
+        size: The size of the cell in pixels.
+    """
+    def __init__(self, size=[CELL_SIZE_PIXELS, CELL_SIZE_PIXELS], position=[0, 0], contents=None):
+        """
+        Initializes the Cell with the given size, position, and contents.
+
+        The surface and rect are only created when they are first used for drawing, so boards can be
+        generated and analysed without allocating any pygame objects.
+        """
+        self.size = size
+        self.color = None
+        self._surface = None
+        self._rect = None
+        self.position = position
+        self.contents = contents
+        self.number = None
+
+    @property
+    def surface(self) -> "pygame.Surface":
+        """The surface representing the cell, created on first use."""
+        if self._surface is None:
+            import pygame as pg
+            self._surface = pg.Surface(self.size)
+            if self.color is not None:
+                self._surface.fill(self.color)
+        return self._surface
+
+    @property
+    def rect(self) -> "pygame.Rect":
+        """The rectangle representing the cell, created on first use."""
+        if self._rect is None:
+            import pygame as pg
+            self._rect = pg.Rect(self.position, self.size)
+        return self._rect
+
+    def set_color(self, color_array):
+        """
+        Sets the color of the cell.
+
+        color_array: An array representing the color.
+        """
+        self.color = color_array
+        if self._surface is not None:
+            self._surface.fill(color_array)
+
+    def set_position(self, position_array):
+        """
+        Sets the position of the cell.
+
+        position_array: An array representing the position.
+        """
+        self.position = position_array
+        if self._rect is not None:
+            self._rect.topleft = position_array
+
+
+# Created by 5590073
+def generate_coordinates(rows: int, columns: int, cell_size: float, start_x: int = None, start_y: int = None,
+                         gap: int = GAP_PIXELS) -> list[list[int]]:
+    """
+    Generates a list of coordinates for a grid of cells.
+
+    The function calculates the x and y coordinates for each cell in a grid, given the number of rows and columns,
+    the size of each cell, and the starting x and y coordinates. The coordinates are calculated in pixels.
+
+    rows: The number of rows in the grid.
+    columns: The number of columns in the grid.
+    cell_size: The size of each cell in pixels, fractional for very large boards.
+    start_x: The x-coordinate of the start in the grid. Defaults to just inside the left edge of the board (255).
+    start_y: The y-coordinate of the start in the grid. Defaults to the bottom row of the board (425 for 10x10).
+    gap: The gap between cells in pixels. Defaults to 5.
+    return: A list of [x, y] coordinates for each cell in the grid.
+    """
+    logging.info('Generating coordinates')
+    return _coordinates_array(rows, columns, cell_size, start_x, start_y, gap).tolist()
+
+
+def _coordinates_array(rows: int, columns: int, cell_size: float, start_x: int = None, start_y: int = None,
+                       gap: int = GAP_PIXELS) -> np.ndarray:
+    """Returns the coordinates of generate_coordinates as a (rows * columns) x 2 array of ints."""
+    pitch = cell_size + gap
+    if start_x is None:
+        start_x = BOARD_POSITION[0] + gap
+    if start_y is None:
+        start_y = BOARD_POSITION[1] + gap + round(pitch * (rows - 1))
+    cells = np.arange(rows * columns)
+    coordinates = np.empty((rows * columns, 2), dtype=np.int32)
+    coordinates[:, 0] = start_x + np.round(pitch * (cells % columns))
+    coordinates[:, 1] = start_y - np.round(pitch * (cells // columns))
+    return coordinates
+
+
+def _board_surface_size(rows: int, columns: int, cell_size: float, gap: int) -> tuple:
+    """Returns the size in pixels of the board surface that holds all cells with a gap around them."""
+    pitch = cell_size + gap
+    return (math.ceil(columns * pitch) + gap, math.ceil(rows * pitch) + gap)
+
+@lru_cache(maxsize=16)
+def _cell_positions(rows: int, columns: int, cell_size: float, gap: int) -> np.ndarray:
+    """
+    Returns the pixel positions of the cells of a board as a read-only array shared by all boards of that size.
+
+    Row i holds the [x, y] position of cell i; row 0 is unused.
+    """
+    positions = np.zeros((rows * columns + 1, 2), dtype=np.int32)
+    positions[1:] = _coordinates_array(rows, columns, cell_size, gap=gap)
+    positions.flags.writeable = False
+    return positions
+
+
+class CompactBoard:
+    """Represents the game board as flat NumPy arrays instead of a dictionary of Cell objects.
+
+    It offers the same interface as Board, so Generator, create_board_graph, the shortest path, the Markov
+    analysis, the player movement and the drawing code run on it directly. Cells, snakes and ladders are
+    returned as small views created on access, and the cell positions are shared between all boards of the
+    same size, so a board takes a few hundred bytes of arrays instead of a hundred Cell objects.
+
+    Attributes:
+        rows (int): The number of rows in the board.
+        columns (int): The number of columns in the board.
+        positions (np.ndarray): positions[i] is the [x, y] pixel position of cell i.
+        destination (np.ndarray): destination[i] is the cell the player ends up on after landing on cell i.
+        entity_type (np.ndarray): entity_type[i] is EMPTY, SNAKE or LADDER for the entity occupying cell i.
+        partner (np.ndarray): partner[i] is the other end of the entity occupying cell i.
+        cells_list (CompactCells): A read-only mapping of cell numbers to CellView objects.
+    """
+    EMPTY = 0
+    SNAKE = 1
+    LADDER = 2
+
+    __slots__ = ('rows', 'columns', 'seed', 'rng', 'dice_rng', 'next_seed', 'cell_size', 'gap', 'positions', 'destination', 'entity_type', 'partner', 'cells_list',
+                 'surface_size', 'color', '_surface', 'cell_surface', 'board_graph', 'distance_to_goal', 'next_hop',
+                 'shortest_distance', 'markov_analysis', 'rules', 'layer')
+
+    def __init__(self, rows: int, columns: int, cell_size=None, gap=None, seed=None):
+        self.rows = rows
+        self.columns = columns
+        self.reseed(seed)
+        # The cell size and gap default to the ones that fit the board on the screen
+        if cell_size is None or gap is None:
+            cell_size, gap = cell_geometry(rows, columns)
+        self.cell_size = cell_size
+        self.gap = gap
+        number_of_cells = rows * columns
+        self.positions = _cell_positions(rows, columns, cell_size, gap)
+        index_type = np.int16 if number_of_cells < np.iinfo(np.int16).max else np.int32
+        self.destination = np.arange(number_of_cells + 1, dtype=index_type)
+        self.partner = np.zeros(number_of_cells + 1, dtype=index_type)
+        self.entity_type = np.zeros(number_of_cells + 1, dtype=np.int8)
+        self.cells_list = CompactCells(self)
+        self.surface_size = _board_surface_size(rows, columns, cell_size, gap)
+        self.color = None
+        self._surface = None
+        self.cell_surface = None
+        self.board_graph = None
+        self.distance_to_goal = None
+        self.next_hop = None
+        self.shortest_distance = None
+        self.markov_analysis = None
+        self.rules = None
+        self.layer = None
+
+    # The board surface, drawing, shortest path and Markov analysis work the same as for Board
+    surface = Board.surface
+    set_color = Board.set_color
+    update_cells = Board.update_cells
+    calculate_shortest_path = Board.calculate_shortest_path
+    calculate_distances_to_goal = Board.calculate_distances_to_goal
+    remaining_moves = Board.remaining_moves
+    optimal_route = Board.optimal_route
+    calculate_expected_turns = Board.calculate_expected_turns
+    calculate_derived_data = Board.calculate_derived_data
+    reseed = Board.reseed
+
+    def _add_entity(self, entity_type: int, start_cell_number: int, end_cell_number: int) -> bool:
+        """Places an entity if both cells are empty and not the same, like Entity.put_on_board."""
+        if (start_cell_number == end_cell_number or self.entity_type[start_cell_number] != self.EMPTY
+                or self.entity_type[end_cell_number] != self.EMPTY):
+            return False
+        self.entity_type[start_cell_number] = entity_type
+        self.entity_type[end_cell_number] = entity_type
+        self.partner[start_cell_number] = end_cell_number
+        self.partner[end_cell_number] = start_cell_number
+        self.destination[start_cell_number] = end_cell_number
+        return True
+
+    def add_snake(self, start_cell_number: int, end_cell_number: int) -> bool:
+        """Places a snake from its head at start_cell_number to its tail at end_cell_number if both cells are empty."""
+        return self._add_entity(self.SNAKE, start_cell_number, end_cell_number)
+
+    def clear(self, seed=None) -> None:
+        """Removes all snakes and ladders from the board in place, so a new board can be generated from seed."""
+        logging.info('Clearing board')
+        self.reseed(seed)
+        self.destination[:] = np.arange(len(self.destination))
+        self.partner[:] = 0
+        self.entity_type[:] = self.EMPTY
+        self.board_graph = None
+        self.distance_to_goal = None
+        self.next_hop = None
+        self.shortest_distance = None
+        self.markov_analysis = None
+        self.rules = None
+        self.layer = None
+
+    def add_ladder(self, start_cell_number: int, end_cell_number: int) -> bool:
+        """Places a ladder from its bottom at start_cell_number to its top at end_cell_number if both cells are empty."""
+        return self._add_entity(self.LADDER, start_cell_number, end_cell_number)
+
+    def entity_at(self, cell_number: int):
+        """Returns a SnakeView or LadderView for the entity occupying a cell, or None if the cell is empty."""
+        entity_type = self.entity_type[cell_number]
+        if entity_type == self.EMPTY:
+            return None
+        start, end = cell_number, int(self.partner[cell_number])
+        if self.destination[cell_number] == cell_number:
+            # The cell is the end of the entity
+            start, end = end, start
+        view_class = SnakeView if entity_type == self.SNAKE else LadderView
+        return view_class(self, start, end)
+
+    def _entities(self, entity_type: int, view_class) -> list:
+        starts = np.flatnonzero((self.entity_type == entity_type) & (self.destination != np.arange(len(self.destination))))
+        return [view_class(self, int(start), int(self.destination[start])) for start in starts]
+
+    def fingerprint(self) -> str:
+        """Returns the same fingerprint as Board.fingerprint, read straight from the arrays."""
+        starts = np.flatnonzero(self.destination != np.arange(len(self.destination)))
+        ends = self.destination[starts]
+        is_snake = self.entity_type[starts] == self.SNAKE
+        return board_fingerprint(self.rows, self.columns,
+                                 np.column_stack([starts[is_snake], ends[is_snake]]),
+                                 np.column_stack([starts[~is_snake], ends[~is_snake]]))
+
+    @property
+    def snakes(self) -> list:
+        """A list of SnakeView objects for the snakes on the board."""
+        return self._entities(self.SNAKE, SnakeView)
+
+    @property
+    def ladders(self) -> list:
+        """A list of LadderView objects for the ladders on the board."""
+        return self._entities(self.LADDER, LadderView)
+
+    def create_board_graph(self) -> dict:
+        """Create a graph representing connections between cells from the jump table.
+
+        It gives the same graph as Board.create_board_graph. The graph is stored in the board object.
+
+        return: A dictionary representing the graph.
+        """
+        logging.info('Creating board graph')
+        number_of_cells = self.rows * self.columns
+        destination = self.destination.tolist()
+        is_ladder_start = ((self.entity_type == self.LADDER)
+                           & (self.destination != np.arange(number_of_cells + 1))).tolist()
+        board_graph = {}
+        for cell_number in range(1, number_of_cells + 1):
+            if is_ladder_start[cell_number]:
+                board_graph[cell_number] = [destination[cell_number]]
+            else:
+                board_graph[cell_number] = destination[cell_number + 1: min(cell_number + 6, number_of_cells) + 1]
+        self.board_graph = board_graph
+        return board_graph
+
+
+class CompactCells:
+    """A read-only mapping of cell numbers to CellView objects, standing in for Board.cells_list."""
+    __slots__ = ('board',)
+
+    def __init__(self, board: CompactBoard):
+        self.board = board
+
+    def __len__(self) -> int:
+        return self.board.rows * self.board.columns
+
+    def __getitem__(self, cell_number: int) -> "CellView":
+        if not 1 <= cell_number <= len(self):
+            raise KeyError(cell_number)
+        return CellView(self.board, cell_number)
+
+    def __iter__(self):
+        return iter(range(1, len(self) + 1))
+
+    def keys(self):
+        return range(1, len(self) + 1)
+
+    def items(self):
+        return ((cell_number, CellView(self.board, cell_number)) for cell_number in self.keys())
+
+
+class CellView:
+    """
+    A lightweight stand-in for Cell that reads a cell of a CompactBoard.
+
+    Two views are equal when they refer to the same cell of the same board.
+    """
+    __slots__ = ('board', 'number')
+
+    def __init__(self, board: CompactBoard, number: int):
+        self.board = board
+        self.number = number
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, CellView) and other.board is self.board and other.number == self.number
+
+    def __hash__(self) -> int:
+        return hash((id(self.board), self.number))
+
+    @property
+    def position(self) -> list:
+        """The [x, y] position of the cell in pixels."""
+        return self.board.positions[self.number].tolist()
+
+    @property
+    def contents(self):
+        """The entity (if any) contained in the cell."""
+        return self.board.entity_at(self.number)
+
+    @property
+    def rect(self) -> "pygame.Rect":
+        """The rectangle representing the cell."""
+        import pygame as pg
+        size = max(1, math.ceil(self.board.cell_size))
+        return pg.Rect(self.position, (size, size))
+
+    @property
+    def surface(self) -> "pygame.Surface":
+        """The surface of the cell, one black surface shared by all cells of the board."""
+        if self.board.cell_surface is None:
+            import pygame as pg
+            size = max(1, math.ceil(self.board.cell_size))
+            self.board.cell_surface = pg.Surface((size, size))
+            self.board.cell_surface.fill(Color.BLACK.value)
+        return self.board.cell_surface
+
+
+class _EntityView:
+    """Object API for an entity stored in the arrays of a CompactBoard."""
+    __slots__ = ('board', 'start', 'end')
+
+    def __init__(self, board: CompactBoard, start: int, end: int):
+        self.board = board
+        self.start = start
+        self.end = end
+
+    def __eq__(self, other) -> bool:
+        return type(other) is type(self) and other.board is self.board and other.start == self.start
+
+    def __hash__(self) -> int:
+        return hash((id(self.board), self.start))
+
+    @property
+    def start_cell(self) -> CellView:
+        return CellView(self.board, self.start)
+
+    @property
+    def end_cell(self) -> CellView:
+        return CellView(self.board, self.end)
+
+    def put_on_board(self) -> bool:
+        """Views are always on their board already; new entities are placed with CompactBoard.add_snake/add_ladder."""
+        return False
+
+
+class SnakeView(_EntityView, Snake):
+    """A snake of a CompactBoard, usable wherever a Snake is expected."""
+    __slots__ = ()
+    color = Color.RED.value
+
+
+class LadderView(_EntityView, Ladder):
+    """A ladder of a CompactBoard, usable wherever a Ladder is expected."""
+    __slots__ = ()
+    color = Color.GREEN.value
+
+
+def create_board(rows: int = ROWS, columns: int = COLUMNS, seed=None):
+    """
+    Creates an empty board of any size with its cells, ready for the Generator.
+
+    Boards up to the default 10x10 are Boards with a Cell object per cell; larger boards are CompactBoards,
+    so a 1000x1000 board takes a few megabytes of arrays instead of a million Cell objects.
+
+    rows: The number of rows of the board.
+    columns: The number of columns of the board.
+    seed: The seed of the board's random generators, a random one if None.
+    return: The Board or CompactBoard.
+    """
+    if rows * columns <= ROWS * COLUMNS:
+        board = Board(rows, columns, seed=seed)
+        board.create_cells(generate_coordinates(rows, columns, board.cell_size, gap=board.gap))
+        return board
+    return CompactBoard(rows, columns, seed=seed)
+
+
+# Created by 5588113
+class ListNode:
+    """A class to represent a node in a linked list."""
+
+    def __init__(self, data: int):
+        """
+        Initialize a node with the given data.
+
+        Parameters:
+            data (any): The data to be stored in the node.
+        """
+        self.data = data
+        self.next = None
+
+
+# Created by 5588113
+class LinkedList:
+    """A class to represent a linked list."""
+
+    def __init__(self):
+        """Initialize an empty linked list with a head node."""
+        self.head = None
+    
+    def add(self, data: int) -> None:
+        """
+        Add a new node with the given data to the end of the linked list.
+
+        Parameters:
+            data (any): The data to be stored in the new node.
+        """
+        new_node = ListNode(data)
+        if self.head is None:
+            self.head = new_node
+            return
+        last_node = self.head
+        while last_node.next:
+            last_node = last_node.next
+        last_node.next = new_node
+    
+    def _partition(self, start: int, end: int, ascended: bool) -> int:
+        """
+        Partition the linked list segment around a quicksort pivot element.
+
+        Parameters:
+            start (Node): The start node of the segment to partition.
+            end (Node): The end node of the segment to partition.
+            ascended (bool): If True, sort in ascending order; otherwise, sort in descending order.
+
+        Returns:
+            Node: The pivot node after partitioning.
+        """
+        # Called by _quicksort
+        pivot = start.data
+        low = start
+        high = start.next
+        
+        while high != end:
+            if ascended:
+                if high.data < pivot:
+                    low = low.next
+                    low.data, high.data = high.data, low.data
+            else:
+                if high.data > pivot:
+                    low = low.next
+                    low.data, high.data = high.data, low.data
+            high = high.next
+        
+        low.data, start.data = start.data, low.data
+        return low
+    
+    def _quicksort(self, start: int, end: int, ascended: bool) -> None:
+        """
+        Sort a linked list segment using the quick sort algorithm.
+
+        Parameters:
+            start (Node): The start node of the segment to sort.
+            end (Node): The end node of the segment to sort.
+            ascended (bool): If True, sort in ascending order; otherwise, sort in descending order.
+        """
+        # Called by sort()
+        if start != end:
+            pivot = self._partition(start, end, ascended)
+            # Recursive call
+            self._quicksort(start, pivot, ascended)
+            self._quicksort(pivot.next, end, ascended)
+    
+    def sort(self, ascended: bool = True):
+        """
+        Sort the linked list in ascending or descending order using quick sort.
+
+        Parameters:
+            ascended (bool): If True, sort in ascending order; otherwise, sort in descending order.
+        """
+        if self.head is None:
+            return
+        last_node = self.head
+        while last_node.next:
+            last_node = last_node.next
+        self._quicksort(self.head, last_node.next, ascended)
+
+
+class Leaderboard:
+    """
+    Keeps the best K values of past games in order as they are added, e.g. the highest scores or the fastest times.
+
+    Values are inserted at their place with a binary search and the list is cut to K entries, so adding a game
+    costs O(K) and reading the board in order needs no sorting, however many games were played.
+
+    Attributes:
+        capacity (int): The number of values kept (K).
+        descending (bool): True if higher values are better (scores), False if lower values are (times).
+        games (int): The number of values added, including the ones that didn't make it onto the leaderboard.
+        version (int): Increased every time the leaderboard changes, so a drawn copy can tell when it is out of date.
+    """
+
+    def __init__(self, capacity: int = LEADERBOARD_SIZE, descending: bool = False, values=()):
+        """
+        Initialize an empty leaderboard, or one holding the best of the given values.
+
+        Parameters:
+            capacity (int): The number of values kept.
+            descending (bool): If True, higher values rank first; otherwise, lower values rank first.
+            values (iterable): Values to start with, e.g. loaded from the game history.
+        """
+        self.capacity = capacity
+        self.descending = descending
+        self.games = 0
+        self.version = 0
+        # _keys holds the values negated for descending leaderboards, so both are searched in ascending order
+        self._keys = []
+        self._values = []
+        for value in values:
+            self.add(value)
+
+    def add(self, value) -> bool:
+        """
+        Add a value, keeping it only if it ranks among the best K.
+
+        Equal values rank in the order they were added.
+
+        Parameters:
+            value (int): The score or time of a finished game.
+
+        Returns:
+            bool: True if the value made it onto the leaderboard.
+        """
+        self.games += 1
+        key = -value if self.descending else value
+        position = bisect.bisect_right(self._keys, key)
+        if position >= self.capacity:
+            return False
+        self._keys.insert(position, key)
+        self._values.insert(position, value)
+        if len(self._values) > self.capacity:
+            self._keys.pop()
+            self._values.pop()
+        self.version += 1
+        return True
+
+    def best(self):
+        """Returns the best value, or None if the leaderboard is empty."""
+        return self._values[0] if self._values else None
+
+    def __iter__(self):
+        """Iterates over the values from best to worst."""
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
@@ -0,0 +1,221 @@
+"""The rules of Snakes and Ladders as a deterministic step function, without pygame or any board objects.
+
+A game is a chain of GameState objects: step(state, roll) returns the state after a dice roll and never
+changes the state it is given, so undoing a move is going back to the previous state, and bots, tests and
+tournaments can play full games at hundreds of thousands of steps per second. The rules:
+
+    - the player starts on cell 1 with a score of 100,
+    - a roll moves the player forward by its value,
+    - landing on the bottom of a ladder climbs it for +5 points, landing on the head of a snake slides
+      down it for -5 points; each jump counts as a step of its own,
+    - a roll that goes past the last cell moves the player to the last cell and ends the game,
+    - a game that ends without a snake hit doubles its score.
+
+Landing exactly on the last cell doesn't end the game; the next roll does.
+
+The vectorized Monte Carlo simulation in simulation.py follows the same rules; check_simulation() plays games
+with both and checks that they agree.
+
+Usage:
+    rules = Rules.from_board(board)
+    state = step(new_game(rules), roll_dice(board.dice_rng))
+
+    python engine.py --seed 123   # check the simulation against step
+"""
+import argparse
+import logging
+import math
+import random as rd
+import statistics
+import sys
+
+from simulation import JumpTable, simulate_games
+
+# The score every game starts with
+START_SCORE = 100
+
+
+class Rules:
+    """
+    The snakes and ladders of a board as lookup lists indexed by cell number, shared by all states on the board.
+
+    Attributes:
+        last_cell (int): The number of the last cell on the board.
+        destination (list): The cell the player ends up on after landing on a cell.
+        score_delta (list): The score change for landing on a cell (+5 ladder, -5 snake, 0 otherwise).
+        is_snake (list): True for the cells which hold the head of a snake.
+    """
+    __slots__ = ('last_cell', 'destination', 'score_delta', 'is_snake')
+
+    def __init__(self, last_cell: int, destination: list, score_delta: list, is_snake: list):
+        self.last_cell = last_cell
+        self.destination = destination
+        self.score_delta = score_delta
+        self.is_snake = is_snake
+
+    @classmethod
+    def from_jump_table(cls, table: JumpTable) -> "Rules":
+        """Creates the rules from the jump table of a board."""
+        cells = slice(0, table.number_of_cells + 1)
+        # Plain lists, because indexing a NumPy array one element at a time is several times slower
+        return cls(table.number_of_cells, table.destination[cells].tolist(), table.score_delta[cells].tolist(),
+                   table.is_snake[cells].tolist())
+
+    @classmethod
+    def from_board(cls, board) -> "Rules":
+        """Creates the rules from the snakes and ladders of a Board or CompactBoard."""
+        return cls.from_jump_table(JumpTable.from_board(board))
+
+
+class GameState:
+    """
+    The state of a game after some dice rolls. States are never changed once created.
+
+    Attributes:
+        rules (Rules): The rules of the board the game is played on.
+        cell (int): The number of the cell the player is on.
+        score (int): The score.
+        snakes (int): The number of snakes the player hit.
+        steps (int): The number of steps made: one per roll plus one per snake or ladder.
+        roll (int): The last roll, 0 before the first one.
+        finished (bool): Whether the game has ended.
+    """
+    __slots__ = ('rules', 'cell', 'score', 'snakes', 'steps', 'roll', 'finished')
+
+    def __init__(self, rules: Rules, cell: int = 1, score: int = START_SCORE, snakes: int = 0, steps: int = 0,
+                 roll: int = 0, finished: bool = False):
+        self.rules = rules
+        self.cell = cell
+        self.score = score
+        self.snakes = snakes
+        self.steps = steps
+        self.roll = roll
+        self.finished = finished
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, GameState) and other.rules is self.rules and other.cell == self.cell
+                and other.score == self.score and other.snakes == self.snakes and other.steps == self.steps
+                and other.roll == self.roll and other.finished == self.finished)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (f"GameState(cell={self.cell}, score={self.score}, snakes={self.snakes}, steps={self.steps}, "
+                f"roll={self.roll}, finished={self.finished})")
+
+
+def new_game(rules: Rules) -> GameState:
+    """Returns the state at the start of a game: on cell 1 with the starting score."""
+    return GameState(rules)
+
+
+def step(state: GameState, roll: int) -> GameState:
+    """
+    Plays a dice roll.
+
+    state: The state before the roll.
+    roll: The value of the dice, from 1 to 6.
+    return: The state after the roll, or the same state if the game has already ended.
+    """
+    if state.finished:
+        return state
+    rules = state.rules
+    cell = state.cell + roll
+    if cell > rules.last_cell:
+        # Special bonus (if player doesn't encounter any snakes score is doubled)
+        score = state.score * 2 if state.snakes == 0 else state.score
+        return GameState(rules, rules.last_cell, score, state.snakes, state.steps + 1, roll, True)
+    destination = rules.destination[cell]
+    if destination == cell:
+        return GameState(rules, cell, state.score, state.snakes, state.steps + 1, roll)
+    return GameState(rules, destination, state.score + rules.score_delta[cell],
+                     state.snakes + rules.is_snake[cell], state.steps + 2, roll)
+
+
+def play(state: GameState, rolls) -> GameState:
+    """
+    Plays dice rolls until the game ends or the rolls run out.
+
+    state: The state to start from.
+    rolls: An iterable of dice values, e.g. iter(lambda: roll_dice(rng), None) for endless random rolls.
+    return: The last state.
+    """
+    if state.finished:
+        return state
+    for roll in rolls:
+        state = step(state, roll)
+        if state.finished:
+            break
+    return state
+
+
+def check_simulation(board, games: int = 100_000, simulated_games: int = 1_000_000, seed: int = 0,
+                     tolerance: float = 3.5) -> dict:
+    """
+    Checks that simulate_games() plays by the rules of step(), by comparing their mean turns and steps on a board.
+
+    board: A Board or CompactBoard with snakes and ladders on it.
+    games: The number of games played with step().
+    simulated_games: The number of games played with simulate_games().
+    seed: The seed of the dice of both.
+    tolerance: The largest difference between the means allowed, in standard errors of the difference.
+    return: A dictionary of "turns" and "steps" to the mean of step(), the mean of the simulation, the
+        difference in standard errors and whether it is within the tolerance.
+    """
+    table = JumpTable.from_board(board)
+    rules = Rules.from_jump_table(table)
+    dice = rd.Random(seed)
+    samples = {"turns": [], "steps": []}
+    for _ in range(games):
+        state = new_game(rules)
+        turns = 0
+        while not state.finished:
+            state = step(state, dice.randint(1, 6))
+            turns += 1
+        samples["turns"].append(turns)
+        samples["steps"].append(state.steps)
+    result = simulate_games(table, simulated_games, seed=seed)
+    simulated = {"turns": (result.turns_histogram, result.mean_turns()),
+                 "steps": (result.steps_histogram, result.mean_steps())}
+    checks = {}
+    for name, values in samples.items():
+        histogram, simulated_mean = simulated[name]
+        simulated_variance = _histogram_variance(histogram, simulated_mean)
+        standard_error = math.sqrt(statistics.variance(values) / len(values)
+                                   + simulated_variance / max(1, histogram.sum()))
+        mean = statistics.fmean(values)
+        difference = abs(mean - simulated_mean) / standard_error if standard_error else 0.0
+        checks[name] = (mean, simulated_mean, difference, difference <= tolerance)
+    return checks
+
+
+def _histogram_variance(histogram, mean: float) -> float:
+    """Returns the variance of the values counted by a bincount histogram."""
+    total = histogram.sum()
+    if total == 0:
+        return 0.0
+    values = range(len(histogram))
+    return float(sum(count * (value - mean) ** 2 for value, count in zip(values, histogram)) / total)
+
+
+if __name__ == "__main__":
+    from core import ROWS, COLUMNS
+    from batch import generate_board
+
+    parser = argparse.ArgumentParser(description="Check the Monte Carlo simulation against the rules engine.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the board and the dice.")
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--columns", type=int, default=COLUMNS)
+    parser.add_argument("--games", type=int, default=100_000, help="Games played with step().")
+    parser.add_argument("--simulated-games", type=int, default=1_000_000, help="Games played by the simulation.")
+    args = parser.parse_args()
+    # Board and Generator log every call
+    logging.getLogger().setLevel(logging.WARNING)
+
+    checks = check_simulation(generate_board(args.seed, args.rows, args.columns), args.games,
+                              args.simulated_games, args.seed)
+    for name, (mean, simulated_mean, difference, passed) in checks.items():
+        print(f"{name}: step {mean:.3f}, simulation {simulated_mean:.3f}, "
+              f"{difference:.1f} standard errors apart, {'ok' if passed else 'MISMATCH'}")
+    if not all(passed for *_, passed in checks.values()):
+        sys.exit(1)
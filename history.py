@@ -0,0 +1,161 @@
+"""Persistent history of finished games in a local SQLite database.
+
+Every finished game is stored with its score, time, steps, the number of snakes hit and the board it was
+played on. Writes are queued and committed by a background thread in batches, so finishing a game never
+waits for the disk. The scores and times are indexed, so the top-N queries used to fill the leaderboards
+at startup read only N rows however many games have been recorded.
+
+Usage:
+    history = GameHistory()
+    history.record(score=210, time=42, steps=18, snakes=0, seed=1234, rows=10, columns=10)
+    best_scores = history.top_scores(10)
+    history.close()
+"""
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# The database is kept next to the game
+DEFAULT_DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    finished_at REAL NOT NULL,
+    score INTEGER NOT NULL,
+    time INTEGER NOT NULL,
+    steps INTEGER NOT NULL,
+    snakes INTEGER NOT NULL,
+    seed INTEGER,
+    rows INTEGER NOT NULL,
+    columns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_by_score ON games (score DESC);
+CREATE INDEX IF NOT EXISTS games_by_time ON games (time);
+"""
+
+_INSERT = ("INSERT INTO games (finished_at, score, time, steps, snakes, seed, rows, columns) "
+           "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+
+# Put on the queue to stop the writer thread
+_STOP = None
+
+
+class GameHistory:
+    """
+    Records finished games in a SQLite database and answers top-N queries.
+
+    Attributes:
+        path (str): The path of the database file.
+        batch_size (int): The largest number of games committed in one transaction.
+        flush_interval (float): The longest time in seconds a recorded game waits before it is committed.
+    """
+    def __init__(self, path: str = DEFAULT_DATABASE_PATH, batch_size: int = 64, flush_interval: float = 1.0):
+        """
+        Opens the database, creating it and its indexes if needed, and starts the writer thread.
+
+        path: The path of the database file.
+        batch_size: The largest number of games committed in one transaction.
+        flush_interval: The longest time in seconds a recorded game waits before it is committed.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # SQLite connections belong to the thread that opened them, so the queries use this one and the
+        # writer thread opens its own
+        self._connection = sqlite3.connect(path)
+        # Write-ahead logging lets the queries read while the writer thread commits
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+        self._connection.commit()
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_batches, name="game-history-writer", daemon=True)
+        self._writer.start()
+
+    def record(self, score: int, time: int, steps: int, snakes: int, seed: int = None,
+               rows: int = 10, columns: int = 10) -> None:
+        """
+        Queues a finished game to be written to the database. Returns immediately.
+
+        score: The final score.
+        time: The time the game took in seconds.
+        steps: The number of steps made.
+        snakes: The number of snakes hit.
+        seed: The seed of the board the game was played on.
+        rows: The number of rows of the board.
+        columns: The number of columns of the board.
+        """
+        self._queue.put((_now(), score, time, steps, snakes, seed, rows, columns))
+
+    def _write_batches(self) -> None:
+        """Runs in the writer thread: commits the queued games in batches until close() is called."""
+        connection = sqlite3.connect(self.path)
+        # With write-ahead logging this still can't corrupt the database, only lose the last commits on a power cut
+        connection.execute("PRAGMA synchronous=NORMAL")
+        try:
+            stopping = False
+            while not stopping:
+                batch = [self._queue.get()]
+                deadline = time.monotonic() + self.flush_interval
+                # Collect more games until the batch is full or the oldest game has waited long enough
+                while batch[-1] is not _STOP and len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                if batch[-1] is _STOP:
+                    stopping = True
+                games = [game for game in batch if game is not _STOP]
+                try:
+                    if games:
+                        with connection:
+                            connection.executemany(_INSERT, games)
+                except sqlite3.Error as e:
+                    logging.warning(f"Could not save {len(games)} games to the history: {e}")
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+        finally:
+            connection.close()
+
+    def flush(self) -> None:
+        """Waits until all recorded games are written to the database."""
+        self._queue.join()
+
+    def top_scores(self, n: int) -> list:
+        """Returns the n highest scores, highest first, in the order they were recorded for equal scores."""
+        rows = self._connection.execute("SELECT score FROM games ORDER BY score DESC, id LIMIT ?", (n,))
+        return [score for score, in rows]
+
+    def top_times(self, n: int) -> list:
+        """Returns the n fastest times, fastest first, in the order they were recorded for equal times."""
+        rows = self._connection.execute("SELECT time FROM games ORDER BY time, id LIMIT ?", (n,))
+        return [game_time for game_time, in rows]
+
+    def count(self) -> int:
+        """Returns the number of games written to the database."""
+        return self._connection.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def close(self) -> None:
+        """Writes the remaining games, stops the writer thread and closes the database."""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        self._connection.close()
+
+    def __enter__(self) -> "GameHistory":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _now() -> float:
+    # record() has a parameter called time, so it can't call time.time() itself
+    return time.time()
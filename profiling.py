@@ -0,0 +1,118 @@
+"""On-demand profiles of the running game: cProfile over a number of frames and a tracemalloc snapshot diff.
+
+A capture starts when it is asked for (the F5 debug key in the game) and ends after a number of frames, or
+when it is asked for again. It saves two files: the raw cProfile stats, which can be opened with pstats or
+snakeviz, and a text report of the functions that took the most time and the lines whose allocations grew
+the most during the capture. Memory that keeps growing while nothing new happens on the screen shows up at
+the top of the allocation diff. Only the thread the capture was started on is profiled.
+
+Usage:
+    capture = ProfileCapture(frames=300)
+    capture.start()
+    for each frame:
+        ...
+        if capture.count_frame():
+            capture.save("profile.prof", "profile.txt")
+"""
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+
+# About 5 seconds of frames at 60 FPS
+DEFAULT_FRAMES = 300
+
+
+class ProfileCapture:
+    """
+    A cProfile and tracemalloc capture over a number of frames.
+
+    Attributes:
+        frames (int): The number of frames a capture lasts.
+        top (int): The number of functions and allocation sites in the report.
+        active (bool): Whether a capture is running.
+        frames_captured (int): The number of frames of the running or last capture.
+    """
+    def __init__(self, frames: int = DEFAULT_FRAMES, top: int = 25):
+        self.frames = frames
+        self.top = top
+        self.active = False
+        self.frames_captured = 0
+        self._profiler = None
+        self._snapshot = None
+        self._started_tracing = False
+        self._start_time = None
+
+    def start(self) -> None:
+        """Starts a capture: takes the first memory snapshot and starts profiling."""
+        if self.active:
+            return
+        self.active = True
+        self.frames_captured = 0
+        # Tracing only the capture keeps its overhead out of the rest of the session
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        self._snapshot = tracemalloc.take_snapshot()
+        self._start_time = time.perf_counter()
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def count_frame(self) -> bool:
+        """
+        Counts a frame of the running capture.
+
+        return: True when the capture has lasted its number of frames and should be saved, False otherwise
+            or when no capture is running.
+        """
+        if not self.active:
+            return False
+        self.frames_captured += 1
+        return self.frames_captured >= self.frames
+
+    def save(self, profile_path: str, report_path: str) -> None:
+        """
+        Ends the running capture and saves it. The capture ends even if the files can't be written.
+
+        profile_path: The file the cProfile stats are saved to.
+        report_path: The file the text report is saved to.
+        """
+        if not self.active:
+            return
+        self._profiler.disable()
+        elapsed = time.perf_counter() - self._start_time
+        snapshot = tracemalloc.take_snapshot()
+        try:
+            self._profiler.dump_stats(profile_path)
+            with open(report_path, "w") as report:
+                report.write(self.report(snapshot, elapsed))
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        """Ends the running capture without saving it: stops profiling and the tracing it started."""
+        if not self.active:
+            return
+        self._profiler.disable()
+        if self._started_tracing:
+            tracemalloc.stop()
+        self.active = False
+        self._profiler = None
+        self._snapshot = None
+
+    def report(self, snapshot: tracemalloc.Snapshot, elapsed: float) -> str:
+        """Formats the slowest functions and the largest allocation growth of the running capture."""
+        stats_text = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=stats_text)
+        stats.sort_stats("cumulative").print_stats(self.top)
+        # The snapshots include the memory of tracemalloc itself, which isn't the game's
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        growth = snapshot.filter_traces(filters).compare_to(self._snapshot.filter_traces(filters), "lineno")
+        lines = [f"Profile of {self.frames_captured} frames over {elapsed:.2f} s",
+                 "",
+                 f"Top {self.top} functions by cumulative time:",
+                 stats_text.getvalue(),
+                 f"Top {self.top} allocation sites by growth during the capture:"]
+        lines.extend(str(difference) for difference in growth[:self.top])
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,374 @@
+"""Compact binary recordings of game sessions, and playing them back headless or on the screen.
+
+A recording holds everything needed to play a session again: the size of the board, the seed of the first
+board and every key press handled by the game (dice rolls with their value, undo, redo and restart). The
+seeds of the following boards are drawn from the first one, so they are not stored. An event takes one
+byte, plus a byte or two of timing for the first event of a frame, so a game is well under a hundred bytes.
+
+Format (little-endian):
+    header: b"SLRP", version (u8), rows (u16), columns (u16), seed of the first board (i64)
+    events: one byte each
+        1-6    a dice roll of that value
+        0x10   undo
+        0x11   redo
+        0x12   restart
+        0xFF   end of the recording
+        An event handled in the same frame as the previous one has the 0x80 bit set. The first event of a
+        frame is followed by the milliseconds since the previous frame with events, as a varint.
+A file holds any number of recordings one after another; the game appends one per session.
+
+Recordings are read from a stream in chunks, so files of any size can be checked without loading them,
+and the rules of the boards seen recently are kept, so replaying games on the same boards costs only the moves.
+
+Usage:
+    python replay.py replays.slr                       # replays every recording headless
+    python replay.py replays.slr --visual --speed 4    # shows the first recording four times faster
+"""
+import argparse
+from functools import lru_cache
+from itertools import islice
+import logging
+import os
+import struct
+import time
+
+from core import UNDO_CAPACITY, CompactBoard, MoveLog, dice_generator, generate_entities, roll_dice
+from engine import Rules, new_game, step
+
+# The game appends a recording of every session to this file next to the game
+DEFAULT_REPLAY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replays.slr")
+
+MAGIC = b"SLRP"
+# Version 1 recordings were made before the rules moved to engine.py, when undoing a move didn't undo its
+# snake or ladder, so they don't play back the same
+VERSION = 2
+HEADER = struct.Struct("<4sBHHq")
+
+# Event codes; dice rolls are their value
+UNDO = 0x10
+REDO = 0x11
+RESTART = 0x12
+END = 0xFF
+# Set on events handled in the same frame as the previous one
+SAME_FRAME = 0x80
+
+ROLLS = range(1, 7)
+EVENTS = frozenset([*ROLLS, UNDO, REDO, RESTART])
+
+# The recorded events are written to the file once this many bytes are waiting
+_FLUSH_BYTES = 4096
+
+
+class ReplayError(ValueError):
+    """Raised when a recording is damaged or doesn't play the same way with the current game rules."""
+
+
+def _write_varint(buffer: bytearray, value: int) -> None:
+    """Appends a non-negative integer in 7-bit groups, lowest first, with the 0x80 bit set on all but the last."""
+    while value >= 0x80:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data) -> int:
+    """Reads an integer written by _write_varint from an iterator of bytes."""
+    value = 0
+    shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value
+        shift += 7
+    raise ReplayError("The recording ends in the middle of an event")
+
+
+class ReplayRecorder:
+    """
+    Records the key presses of a session and appends them to a file as one recording.
+
+    The events are buffered and written in blocks, so recording costs a few bytes of memory per key press.
+
+    Attributes:
+        path (str): The file the recording is appended to.
+    """
+    def __init__(self, rows: int, columns: int, seed: int, path: str = DEFAULT_REPLAY_PATH):
+        """
+        Opens the file and starts a recording.
+
+        rows: The number of rows of the board.
+        columns: The number of columns of the board.
+        seed: The seed of the first board.
+        path: The file the recording is appended to.
+        """
+        try:
+            header = HEADER.pack(MAGIC, VERSION, rows, columns, seed)
+        except struct.error:
+            raise ValueError(f"A {rows}x{columns} board with seed {seed} can't be recorded") from None
+        self.path = path
+        self._file = open(path, "a+b")
+        # A session that crashed left its recording without an end, so end it before starting this one
+        if self._file.seek(0, os.SEEK_END) > 0:
+            self._file.seek(-1, os.SEEK_END)
+            if self._file.read(1)[0] != END:
+                self._file.write(bytes([END]))
+        self._buffer = bytearray(header)
+        self._last_frame_time = time.monotonic()
+        self._frame_has_events = False
+
+    def new_frame(self) -> None:
+        """Starts the events of a new frame. Called every frame before its events are handled."""
+        self._frame_has_events = False
+
+    def record(self, event: int) -> None:
+        """
+        Records an event handled in the current frame.
+
+        event: A dice roll (1 to 6), UNDO, REDO or RESTART.
+        """
+        if self._frame_has_events:
+            self._buffer.append(event | SAME_FRAME)
+        else:
+            now = time.monotonic()
+            self._buffer.append(event)
+            _write_varint(self._buffer, round((now - self._last_frame_time) * 1000))
+            self._last_frame_time = now
+            self._frame_has_events = True
+        if len(self._buffer) >= _FLUSH_BYTES:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the buffered events to the file."""
+        self._file.write(self._buffer)
+        self._file.flush()
+        self._buffer.clear()
+
+    def close(self) -> None:
+        """Ends the recording and closes the file."""
+        if self._file.closed:
+            return
+        self._buffer.append(END)
+        self.flush()
+        self._file.close()
+
+
+class Replay:
+    """
+    A recorded session.
+
+    Attributes:
+        rows (int): The number of rows of the board.
+        columns (int): The number of columns of the board.
+        seed (int): The seed of the first board.
+        frames (list): (milliseconds since the previous frame, event codes) for every frame with events.
+    """
+    __slots__ = ('rows', 'columns', 'seed', 'frames')
+
+    def __init__(self, rows: int, columns: int, seed: int, frames: list):
+        self.rows = rows
+        self.columns = columns
+        self.seed = seed
+        self.frames = frames
+
+    def __len__(self) -> int:
+        """The number of events."""
+        return sum(len(events) for _, events in self.frames)
+
+
+def _stream_bytes(stream, chunk_size: int):
+    """Yields the bytes of a binary stream one by one, reading it in chunks."""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield from chunk
+
+
+def read_replays(stream, chunk_size: int = 1 << 16):
+    """
+    Reads the recordings in a binary stream one after another.
+
+    stream: A binary file or any object with a read(size) method.
+    chunk_size: The number of bytes read at a time.
+    return: A generator of Replay objects.
+    """
+    data = _stream_bytes(stream, chunk_size)
+    while True:
+        header = bytes(islice(data, HEADER.size))
+        if not header:
+            return
+        if len(header) < HEADER.size:
+            raise ReplayError("The stream ends in the middle of a recording header")
+        magic, version, rows, columns, seed = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ReplayError("Not a recording")
+        if version != VERSION:
+            raise ReplayError(f"Recordings of version {version} are not supported")
+        frames = []
+        events = None
+        # A recording cut off by a crash simply ends at the end of the stream
+        for byte in data:
+            if byte == END:
+                break
+            event = byte & ~SAME_FRAME
+            if event not in EVENTS:
+                raise ReplayError(f"Unknown event {byte:#04x}")
+            if byte & SAME_FRAME and events is not None:
+                events.append(event)
+            else:
+                events = bytearray([event])
+                frames.append((_read_varint(data), events))
+        yield Replay(rows, columns, seed, [(delay, bytes(events)) for delay, events in frames])
+
+
+def read_replay_file(path: str) -> list:
+    """Reads all recordings of a file."""
+    with open(path, "rb") as file:
+        return list(read_replays(file))
+
+
+class ReplayResult:
+    """
+    The outcome of playing a recording.
+
+    Attributes:
+        games (list): (seed, score, steps, snakes hit) of every finished game, in the order they were finished.
+        cell (int): The number of the cell the player ended on.
+        score (int): The score of the unfinished game the session ended with.
+    """
+    __slots__ = ('games', 'cell', 'score')
+
+    def __init__(self, games: list, cell: int, score: int):
+        self.games = games
+        self.cell = cell
+        self.score = score
+
+
+@lru_cache(maxsize=1024)
+def _board_rules(rows: int, columns: int, seed: int) -> tuple:
+    """
+    Generates the board of a seed the same way the game does.
+
+    return: The rules of the board and the seed of the board after it.
+    """
+    board = CompactBoard(rows, columns, seed=seed)
+    generate_entities(board)
+    return Rules.from_board(board), board.next_seed
+
+
+class _Session:
+    """The boards, dice and moves of a session being replayed headless."""
+    __slots__ = ('rows', 'columns', 'seed', 'next_seed', 'dice', 'state', 'history', 'games')
+
+    def __init__(self, rows: int, columns: int, seed: int):
+        self.rows = rows
+        self.columns = columns
+        self.history = MoveLog(UNDO_CAPACITY)
+        self.games = []
+        self.start(seed)
+
+    def start(self, seed: int) -> None:
+        """Starts a game on the board of a seed."""
+        rules, self.next_seed = _board_rules(self.rows, self.columns, seed)
+        self.seed = seed
+        self.dice = dice_generator(seed)
+        self.history.clear()
+        self.state = new_game(rules)
+
+    def restart(self) -> None:
+        """Starts a game on the next board, recording the current one if it was finished."""
+        if self.state.finished:
+            self.games.append((self.seed, self.state.score, self.state.steps, self.state.snakes))
+        self.start(self.next_seed)
+
+
+def play_headless(replay: Replay, verify_dice: bool = True) -> ReplayResult:
+    """
+    Plays a recording through the game rules as fast as possible, without pygame.
+
+    The events are handled exactly as handle_events() handles them in the game, frame by frame, including the
+    restart the game posts for itself when the player finishes.
+
+    replay: The recording.
+    verify_dice: Whether to check that every recorded roll is the roll the board's dice give.
+    return: The finished games and the final state of the player.
+    """
+    session = _Session(replay.rows, replay.columns, replay.seed)
+    # The restarts posted when the player finishes, handled at the start of the next frame
+    posted_restarts = 0
+    for _, events in replay.frames:
+        for _ in range(posted_restarts):
+            session.restart()
+        posted_restarts = 0
+        for event in events:
+            state = session.state
+            if event in ROLLS:
+                if verify_dice:
+                    roll = roll_dice(session.dice)
+                    if roll != event:
+                        raise ReplayError(f"A roll of {event} was recorded on board {session.seed}, "
+                                          f"the dice give {roll}")
+                # Once the game has ended rolls change nothing until the restart
+                if not state.finished:
+                    session.history.push(state)
+                    session.state = step(state, event)
+                    posted_restarts += session.state.finished
+            elif event == RESTART:
+                session.restart()
+            # Undo works when the player is not at the start cell
+            elif event == UNDO and state.cell != 1:
+                session.state = session.history.undo(state) or state
+            elif event == REDO:
+                session.state = session.history.redo(state) or state
+    # The game handles the last posted restarts in the frame after the recording's last events
+    for _ in range(posted_restarts):
+        session.restart()
+    return ReplayResult(session.games, session.state.cell, session.state.score)
+
+
+def verify_replays(stream, verify_dice: bool = True):
+    """
+    Plays every recording of a stream headless.
+
+    return: A generator of (index, ReplayResult or ReplayError) for every recording.
+    """
+    for index, replay in enumerate(read_replays(stream)):
+        try:
+            yield index, play_headless(replay, verify_dice)
+        except ReplayError as e:
+            yield index, e
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play recorded Snakes and Ladders sessions.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_REPLAY_PATH, help="File of recordings.")
+    parser.add_argument("--visual", action="store_true", help="Show a recording in the game window.")
+    parser.add_argument("--index", type=int, default=0, help="The recording shown with --visual.")
+    parser.add_argument("--speed", type=float, default=1.0, help="Speed multiplier of --visual.")
+    parser.add_argument("--no-verify-dice", dest="verify_dice", action="store_false",
+                        help="Don't check the recorded rolls against the boards' dice.")
+    args = parser.parse_args()
+
+    if args.visual:
+        import sc
+        with open(args.path, "rb") as file:
+            replay = next(islice(read_replays(file), args.index, None), None)
+        if replay is None:
+            parser.error(f"{args.path} has no recording {args.index}")
+        sc.main(rows=replay.rows, columns=replay.columns, playback=sc.ReplayPlayback(replay, args.speed))
+    else:
+        # The rules log every move, which would flood the output for thousands of recordings
+        logging.getLogger().setLevel(logging.WARNING)
+        start_time = time.perf_counter()
+        recordings = games = failures = 0
+        with open(args.path, "rb") as file:
+            for index, result in verify_replays(file, args.verify_dice):
+                recordings += 1
+                if isinstance(result, ReplayError):
+                    failures += 1
+                    print(f"Recording {index}: {result}")
+                else:
+                    games += len(result.games)
+        elapsed = time.perf_counter() - start_time
+        print(f"Replayed {recordings} recordings with {games} finished games in {elapsed:.2f} s "
+              f"({recordings / max(elapsed, 1e-9):.0f} recordings/s), {failures} failed")
@@ -1,570 +1,77 @@
 # Created by 5590073
 try:
     import pygame as pg
-    import random as rd
-    from abc import ABC, abstractmethod
-    import numpy as np
     import time
     from enum import Enum
-    from collections import deque
+    import math
     import os
     import logging
+    import sqlite3
+    from concurrent.futures import ThreadPoolExecutor
+    from core import (ROWS, COLUMNS, CELL_SIZE_PIXELS, GAP_PIXELS, PLAYER_START_POSITION, BOARD_POSITION,
+                      LEADERBOARD_SIZE, Color, Board, roll_dice, Entity, Snake, Ladder, Generator, Player, Cell,
+                      generate_coordinates, create_board, generate_entities, CompactBoard, ListNode, LinkedList, Leaderboard)
+    from analysis import MarkovAnalysis
+    from engine import new_game, step
+    from board_cache import BoardCache
+    from board_library import BoardLibrary
+    from history import GameHistory
+    from stage_timings import StageTimings
+    from profiling import ProfileCapture
+    import replay
+    from text_cache import get_font, render_text
 except ImportError as e:
     print(f"Import error: {e}")
     print("Make sure you have installed the required libraries from our user guide!")
     print("You can install the required libraries using the command: !pip install library_name in a code cell.")
-    os._exit(0)
+    raise
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(message)s')
 
-# Initialize the pygame module with screen size, caption and color
-# Created by 5590073
-try:
-    pg.init()
-except pg.error as e:
-    print(f"Error initializing pygame: {e}")
-    print("Make sure you have installed pygame!")
-    os._exit(0)
-
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
-screen = pg.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pg.display.set_caption("Snakes and Ladders")
-
-# Define the number of rows, columns, cell size and gap between cells
-# Created by 5590073
-ROWS = 10
-COLUMNS = 10
-CELL_SIZE_PIXELS = 25
-GAP_PIXELS = 5
-
-# Defines an enumeration Color that represents different colors using RGB
-# Created by 5590073
-class Color(Enum):
-    WHITE = (255, 255, 255)
-    BLACK = (0, 0, 0)
-    PLAYER_COLOR = (200, 50, 50)
-    GREEN = (0, 255, 0)
-    RED = (255, 0, 0)
-
-
-PLAYER_START_POSITION = [255, 425]
-
-
-# Main game board class
-# Created by 5590073 and 5588113
-class Board():
-    """Represents the game board.
-
-    Attributes:
-        rows (int): The number of rows in the board.
-        columns (int): The number of columns in the board.
-        cells_list (dict): A dictionary of cells with their respective positions.
-        surface (pygame.Surface): The surface representing the board.
-        snakes (list): A list of Snake objects on the board.
-        ladders (list): A list of Ladder objects on the board.
-        shortest_distance (int): The shortest distance between the start cell and end cell.
-    """
-    # Created by 5590073
-    def __init__(self, rows: int, columns: int, cells_list={}, cell_size=CELL_SIZE_PIXELS, gap=GAP_PIXELS):
-        logging.info('Initializing Board')
-        self.rows = rows
-        self.columns = columns
-        self.cells_list = cells_list
-        self.surface = pg.Surface((rows * (cell_size + gap) + gap, rows * (cell_size + gap) + gap))
-        self.snakes = []
-        self.ladders = []
-        self.shortest_distance = None
-    # Created by 5590073
-    def create_cells(self, coordinates_array) -> None:
-        """
-        Creates the cells for the board.
-
-        coordinates_array: An array of coordinates for the cells.
-        """
-        logging.info('Creating cells')
-        number_of_cells_on_board = self.rows * self.columns
-        # Create a dictionary of cells (cells_list) with their respective positions from the coordinates_array
-        for i in range(1, number_of_cells_on_board + 1):
-            coordinates = coordinates_array[i - 1]
-            # Each cell is an object of the Cell class
-            self.cells_list[i] = Cell(position=coordinates)
-            self.cells_list[i].set_color(Color.BLACK.value)
-            self.cells_list[i].number = i
-    # Created by 5590073
-    def update_cells(self) -> None:
-        """
-        Updates the cells on the board. This includes updating the surface of each cell and rendering the text on each cell.
-        """
-        font = pg.font.Font(None, 15)
-        for i in range(1, len(self.cells_list) + 1):
-            # Update the surface (skin) of each cell on the screen
-            screen.blit(self.cells_list[i].surface, self.cells_list[i].rect)
-            # Render the text on each cell
-            text_surface = font.render(str(i), False, Color.WHITE.value)
-            text_rect = text_surface.get_rect(center=self.cells_list[i].rect.center)
-            screen.blit(text_surface, text_rect)
-    # Created by 5590073
-    def set_color(self, color_array) -> None:
-        """
-        Sets the color of the board.
-
-        color_array: An array representing the color.
-        """
-        self.surface.fill(color_array)
-    
-    # Created by 5588113  
-    def create_board_graph(self) -> dict:
-        """Create a graph representing connections between cells.
-
-        The graph is stored in the board object.
-
-        return: A dictionary representing the graph.
-        """
-        logging.info('Creating board graph')
-        board_graph = {}
-        for cell_number, cell in self.cells_list.items():
-            board_graph[cell_number] = []
-            # If ladder detected and node is not an end_cell, append ladder's end to the node
-            if cell.contents is not None and isinstance(cell.contents, Ladder) and cell_number != cell.contents.end_cell.number:
-                board_graph[cell_number].append(cell.contents.end_cell.number)
-            else:
-                for i in range(1, 7):  # Possible dice roll values
-                    next_cell_number = cell_number + i
-                    if next_cell_number <= 100:
-                        if self.cells_list[next_cell_number].contents is not None:
-                            next_cell_number = self.cells_list[next_cell_number].contents.end_cell.number
-                        board_graph[cell_number].append(next_cell_number)
-        self.board_graph = board_graph  # Store board graph in the board object
-        return board_graph
-
-    # Created by 5588113
-    def calculate_shortest_path(self, start_cell_number: int, end_cell_number: int) -> None:
-        """Calculate the shortest path between two cells using BFS."""
-        if self.board_graph is None:
-            raise ValueError("Board graph not initialized. Call create_board_graph() first.")
-
-        visited = set()
-        queue = deque([(start_cell_number, 0)])  # (cell_number, distance)
-        while queue:
-            cell_number, distance = queue.popleft()
-            if cell_number == end_cell_number:
-                self.shortest_distance = distance
-                return
-            visited.add(cell_number)
-            for neighbor_cell in self.board_graph[cell_number]:
-                if neighbor_cell not in visited:
-                    queue.append((neighbor_cell, distance + 1))
-        return # No path found
-
-
-# Created by 5590073
-def roll_dice():
-    return rd.randint(1, 6)
-
-
-# Created by 5590073 and 5588113
-class Entity(ABC):
-    """Represents an entity on the board."""
-
-    def __init__(self, start_cell=None, end_cell=None, color=None):
-        # start_cell and end_cell contain the same object of the Cell class
-        self.start_cell = start_cell
-        self.end_cell = end_cell
-        self.color = color
-
-    @abstractmethod
-    def put_on_board(self):
-        """Places the entity on the board."""
-        pass
-
-    @abstractmethod
-    def draw(self):
-        """Draws the entity on the screen."""
-        pass
-
-
-# Created by 5590073 and 5588113
-class Snake(Entity):
-    """Represents a snake on the board."""
-
-    def __init__(self, start_cell=None, end_cell=None):
-        super().__init__(start_cell, end_cell, Color.RED.value)
-
-    def draw(self):
-        """Draws the snake on the screen."""
-        pg.draw.line(screen, self.color, self.start_cell.rect.center, self.end_cell.rect.center, 5)
-
-    def put_on_board(self) -> bool:
-        """Places the snake on the board."""
-        # Check if the start and end cells are empty and not the same
-        if self.start_cell.contents == None and self.end_cell.contents == None and self.start_cell != self.end_cell:
-            self.start_cell.contents = self
-            self.end_cell.contents = self
-            return True
-
-        return False
-
-
-# Created by 5590073 and 5588113
-class Ladder(Entity):
-    """Represents a ladder on the board."""
-
-    def __init__(self, start_cell=None, end_cell=None):
-        super().__init__(start_cell, end_cell, Color.GREEN.value)
-
-    def draw(self):
-        """Draws the ladder on the screen."""
-        pg.draw.line(screen, self.color, self.start_cell.rect.center, self.end_cell.rect.center, 5)
-
-    def put_on_board(self) -> bool:
-        """Places the ladder on the board."""
-        # Check if the start and end cells are empty and not the same
-        if self.start_cell.contents == None and self.end_cell.contents == None and self.start_cell != self.end_cell:
-            self.start_cell.contents = self
-            self.end_cell.contents = self
-            return True
-
-        return False
-
-
-# Created by 5588113
-class Generator:
-    """This class manages the creation of snakes and ladders on the game board. It controls the percentage of the board
-        covered with entities and shapes their placement to keep the player engaged while maintaining randomness.
-        
-        E.g. preventing creation of entities that are too long or placed horizontally.
-    """
-    
-    def __init__(self, board: Board):
-        """Initialize the Generator.
-        
-        Args:
-            board (Board): The class Board attribute
-            
-        Attributes:
-            rows (int): Number of rows in the game board.
-            columns (int): Number of columns in the game board.
-            entity_matrices (list): A list to store matrices that incluede cells on which the entities are placed.
-            
-        Data structures:
-            Dictionary/Hashmap
-            List/Array
-            2D List (matrix)
-                
-        Methods:
-            _board_cells_to_matrix (protected): Converts the class Board's cells to a matrix.
-            _create_null_matrices (protected): Creates a set of null matrices ranging from 3x2 to 5x5 that reserve spaces for entities.
-            _put_null_matrix (protected): Indicates, whether a specific place can be reserved for an entity.
-            _smooth_placement (protected): Controls the entities coverage.
-            _get_entities_coordinates (protected): Get values of opposite corners from entity matrices
-            
-            create_snakes_on_board (public): Receive coordinates for snakes and asign them with class Cell
-            create_ladders_on_board (pulic): Receive coordinates for ladders and asign them with class Cell
-            
-        Example private methods procedure:
-        
-            Board matrix (10x10), null matrices placed:
-
-                [[ 91  92  93  94  95  96  97  98  99 100]
-                [ 81  82  83  84  85  86  87  88  89  90]
-                [ 71  72   0   0   0  76  77  78  79  80]
-                [ 61  62   0   0   0  66  67  68  69   0]
-                [ 51  52   0   0   0  56  57  58  59   0]
-                [ 41  42   0   0   0   0   0  48  49   0]
-                [ 31  32  33  34  35   0   0  38  39  40]
-                [ 21  22   0   0   0   0   0  28  29  30]
-                [ 11  12   0   0   0  16  17  18  19  20]
-                [  1   2   0   0   0   6   7   8   9  10]]
-
-            Extracted entity Matrices according to null matrices positions:
-            
-                [ 75 ]   [ 70 ]   [ 23  24  25 ]   [ 73  74 ]   [ 46  47 ]
-                [ 65 ]   [ 60 ]   [ 13  14  15 ]   [ 63  64 ]   [ 36  37 ]
-                [ 55 ]   [ 50 ]   [  3   4   5 ]   [ 53  54 ]   [ 26  27 ]
-                [ 45 ]                             [ 43  44 ]
-            
-            Extracted coordinates list: [[45, 75], [50, 70], [5, 23] [43, 74], [26, 47]]
-        """
-        self.board = board
-        self.rows = board.rows
-        self.columns = board.columns
-        self.entity_matrices = []
-
-    def _board_cells_to_matrix(self) -> np.ndarray:
-        """
-        Convert board cells to a matrix.
-
-        Returns:
-            np.ndarray: The matrix representing the board cells.
-        """
-        # Called by: _smooth_placement()
-        board_matrix = np.zeros((self.rows, self.columns), dtype=int)
-        for key, value in self.board.cells_list.items():
-            row = (key - 1) // self.columns
-            column = (key - 1) % self.columns
-            board_matrix[row, column] = key
-        return np.flipud(board_matrix)
-
-    def _create_null_matrices(self) -> list:
-        """
-        Create a set of null matrices ranging from 3x2 to 5x5 that reserve spaces for entities.
-        
-        Returns:
-            list: A list of null matrices.
-        """
-        # Called by: _smooth_placement()
-        null_matrices = []
-        for i in range(3, 6):
-            for j in range(2, 6):
-                null_matrices.append(np.zeros((i, j)))
-        return null_matrices
-
-    def _put_null_matrix(self, board_matrix, null_matrix) -> bool:
-        """
-        Indicates whether a specific place can be reserved for an entity.
-
-        Args:
-            board_matrix (np.ndarray): The current state of the board matrix.
-            null_matrix (np.ndarray): The null matrix representing the entity to be placed.
-
-        Returns:
-            bool: True if the entity can be placed, False otherwise.
-        """
-        # Called by: _smooth_placement()
-        entity_rows, entity_columns = null_matrix.shape
-        row_start = rd.randint(0, self.rows - entity_rows)
-        column_start = rd.randint(0, self.columns - entity_columns)
-        restricted_cells = [0, 1, self.rows * self.columns]
-
-        selected_cells = board_matrix[row_start: row_start + entity_rows, column_start: column_start + entity_columns]
-        # Avoid placing null matrix on start/end cell and on other null matrices
-        if np.all(selected_cells != 0) and not np.any(np.isin(selected_cells, restricted_cells)):
-            # Form entitiy matrix and put it in the list if placed succesfully
-            self.entity_matrices.append(selected_cells.copy())
-            board_matrix[row_start: row_start + entity_rows, column_start: column_start + entity_columns] = null_matrix
-            return True 
-
-        return False 
-
-    def _smooth_placement(self) -> None:
-        """
-        Controls the entities coverage by adjusting the coverage percentage.
-
-        This method is called by:
-            - _get_entities_coordinates()
-        """
-        # Called by: create_snakes_on_board(), create_ladders_on_board()
-        board_matrix = self._board_cells_to_matrix()
-        total_elements = board_matrix.size
-        # Ensure 70% coverage
-        target_elements = int(total_elements * 0.7)
-        null_matrices = self._create_null_matrices()
-        rd.shuffle(null_matrices)
-
-        elements_covered = 0
-        for null_matrix in null_matrices:
-            if elements_covered + null_matrix.size <= target_elements:
-                if self._put_null_matrix(board_matrix, null_matrix):
-                    elements_covered += null_matrix.size
-            else:
-                break
-
-    def _get_entities_coordinates(self) -> list:
-        """
-        Get values of opposite corners from entity matrices.
-
-        Returns:
-            list: A list containing coordinates of entities' corners.
-        """
-        entities_coordinates = []
-        self._smooth_placement()
-
-        for entity_matrix in self.entity_matrices:
-            rows, columns = entity_matrix.shape
-
-            if columns == 1:
-                # Get the top and bottom corner coordinates for entities with single column
-                top_corner = entity_matrix[0, 0]
-                bottom_corner = entity_matrix[rows - 1, 0]
-            else:
-                # For entities with multiple columns, select a random column for the top corner
-                top_row = 0
-                bottom_row = rows - 1
-                selected_column = rd.choice([0, columns - 1])
-                top_corner = entity_matrix[top_row, selected_column]
-
-                # Depending on the selected column, get the corresponding bottom corner coordinate
-                if selected_column == 0:
-                    bottom_corner = entity_matrix[bottom_row, selected_column - 1]
-                else:
-                    bottom_corner = entity_matrix[bottom_row, 0]
-
-            entities_coordinates.append([bottom_corner, top_corner])
-
-        return entities_coordinates
-    
-    def create_snakes_on_board(self, board: Board) -> None:
-        """
-        Create snakes on the game board based on the coordinates obtained from _get_entities_coordinates.
-
-        Args:
-            board (Board): The game board where the snakes will be placed.
-        """
-        logging.info('Creating snakes on the game board')
-        snakes_coordinates = self._get_entities_coordinates
-        for cells in self._get_entities_coordinates():
-            bottom_coordinate, top_coordinate = cells
-            
-            snake = Snake(start_cell=board.cells_list[top_coordinate], end_cell=board.cells_list[bottom_coordinate])
-            if snake.put_on_board():
-                board.snakes.append(snake)
-
-    def create_ladders_on_board(self, board: Board) -> None:
-        """
-        Create ladders on the game board based on the coordinates obtained from _get_entities_coordinates.
 
-        Args:
-            board (Board): The game board where the ladders will be placed.
-        """
-        logging.info('Creating ladders on the game board')
-        for cells in self._get_entities_coordinates():
-            bottom_coordinate, top_coordinate = cells
-            
-            ladder = Ladder(start_cell=board.cells_list[bottom_coordinate], end_cell=board.cells_list[top_coordinate])
-            if ladder.put_on_board():
-                board.ladders.append(ladder)
-
-
-
-# Created by 5590073, edited by 5555194
-class Player():
-    """
-        Represents the player on the board
-
-        _score : the total score of the player (private)
-        num_snakes: how many snakes the player encounters during the game (if 0 points will double in the end)
-        moves: will later be the dice value when rolled
-        number_steps_made: how many steps the player has made
-        history_stack: a stack to keep track of the player's move history
-        rect: the rectangle representing the player
-        rect.topleft: the top left corner of the rectangle (for positining)
-        surface: the surface representing the player (like a skin)
-    """
-
-    # Created by 5590073 edited by 5555194
-    def __init__(self, position=[0, 0], current_cell=None, tot_score=100, moves=0):
-        self.surface = pg.Surface([CELL_SIZE_PIXELS, CELL_SIZE_PIXELS])
-        self.rect = self.surface.get_rect()
-        self.rect.topleft = position
-        self.position = position
-        self.current_cell = current_cell
-        self._score = tot_score
-        self.moves = moves
-        self.num_snakes = 0
-        self.number_steps_made = 0
-        self.history_stack = []
-    # Created by 5590073
-    def set_position(self, position_array):
-        self.position = position_array
-        self.rect.topleft = position_array
-    # Created by 5590073
-    def set_color(self, color_array):
-        self.surface.fill(color_array)
-
-    def undo(self):
-        """
-        Undo the last move made by the player.
-        """
-        if self.history_stack:
-            # Restore the previous state including position, score, moves, number of steps made, number of snakes encountered and current cell
-            self.position, self._score, self.moves, self.number_steps_made, self.num_snakes, self.current_cell = self.history_stack.pop()
-            self.rect.topleft = self.position
-
-    # Created by 5555194 and 5590073
-    # Score will update each time the player encounters an entity
-    def react_to_entity(self, entity) -> None:
-        logging.info('Player reacting to entity')
-        if isinstance(entity, Snake):
-            self.position = change_position_to_cell(self, entity.end_cell)
-            self.snake_encountered()
-            self.update_score(-5)
-        elif isinstance(entity, Ladder):
-            self.position = change_position_to_cell(self, entity.end_cell)
-            self.update_score(+5)
-        return None
-    # Created by 5555194
-    # A method to get the player's score
-    def get_score(self) -> int:
-        return self._score
-    # Created by 5555194
-    # A method to update the player's score during the game to for display in the end
-    def update_score(self, points: int = 0) -> int:
-        logging.info('Updating Player score')
-        self._score += points
-        return self._score
-    # Created by 5555194
-    # A method to keep count of how many snakes were encountered (bonus)
-    def snake_encountered(self) -> None:
-        logging.info('Player encountered a snake')
-        self.num_snakes += 1
-        return None
-    # Created by 5555194
-    # A method to reset the num_snakes variable back to zero
-    def reset_num_snakes(self) -> None:
-        logging.info('Resetting number of snakes encountered')
-        self.num_snakes = 0
-        return None
-    # Created by 5555194
-    # A method to reset the player's score back to 100
-    def reset_score(self) -> None:
-        logging.info('Resetting Player score')
-        self._score = 100
-        return None
+# The display, fonts and clock are created by init_display() when main() runs, so importing this module
+# doesn't initialize SDL or open a window
+screen = None
+font = None
+font_surface = None
+clock = None
+# The derived data and layers of the boards generated in this session, so regenerating one costs nothing
+derived_data_cache = BoardCache()
+# How long each stage of the game loop takes, measured in debug mode while the overlay is shown (F3)
+stage_timings = StageTimings()
+# Where debug mode saves the stage timings and profiles
+DEBUG_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "debug")
+# The profile of the next frames, captured in debug mode when F5 is pressed
+profile_capture = ProfileCapture()
+# The key presses of a recording being played back, kept apart from the keyboard which is ignored meanwhile
+REPLAY_KEYDOWN = pg.event.custom_type()
+# The keys of the recorded events other than dice rolls
+REPLAY_KEYS = {replay.UNDO: pg.K_u, replay.REDO: pg.K_y, replay.RESTART: pg.K_r}
 
 
-# The board consists of cells, which are the squares
 # Created by 5590073
-class Cell():
+def init_display() -> None:
     """
-    Represents a cell on the game board.
-
-    Attributes:
-        surface (pygame.Surface): The surface representing the cell.
-        rect (pygame.Rect): The rectangle representing the cell.
-        position (list): The position of the cell on the board.
-        contents (Entity): The entity (if any) contained in the cell.
-        number (int): The number of the cell.
-        size: The size of the cell in pixels.
+    Initializes pygame and creates the screen, the welcome text and the clock.
     """
-    def __init__(self, size=[CELL_SIZE_PIXELS, CELL_SIZE_PIXELS], position=[0, 0], contents=None):
-        """
-        Initializes the Cell with the given size, position, and contents.
-        """
-        self.surface = pg.Surface(size)
-        self.rect = self.surface.get_rect()
-        self.rect.topleft = position
-        self.position = position
-        self.contents = contents
-        self.number = None
-
-    def set_color(self, color_array):
-        """
-        Sets the color of the cell.
-
-        color_array: An array representing the color.
-        """
-        self.surface.fill(color_array)
-
-    def set_position(self, position_array):
-        """
-        Sets the position of the cell.
+    global screen, font, font_surface, clock
+    # Initialize the pygame module with screen size, caption and color
+    try:
+        pg.init()
+    except pg.error as e:
+        print(f"Error initializing pygame: {e}")
+        print("Make sure you have installed pygame!")
+        os._exit(0)
 
-        position_array: An array representing the position.
-        """
-        self.position = position_array
-        self.rect.topleft = position_array
+    screen = pg.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pg.display.set_caption("Snakes and Ladders")
+    # Create a font object to render the welcome text on the screen
+    font = get_font(36)
+    font_surface = render_text("Welcome to the Snakes and Ladders", 36, Color.WHITE.value, False)
+    clock = pg.time.Clock()
 
 
 # Created by 5590073
@@ -599,12 +106,14 @@ class ProgressBar:
         Draws the progress bar on the screen.
 
         screen: The pygame.Surface object representing the screen.
+        return: The area of the screen the progress bar was drawn on.
         """
         # Draw the background
         # * unpacks the tuple into individual arguments
-        pg.draw.rect(screen, self.bg_color, (*self.position, *self.size))
+        background_rect = pg.draw.rect(screen, self.bg_color, (*self.position, *self.size))
         # Draw the progress bar
         pg.draw.rect(screen, self.color, (*self.position, self.size[0] * self.progress, self.size[1]))
+        return background_rect
 
 
 # Created by 5590073
@@ -627,14 +136,25 @@ class Timer:
         # Return the elapsed time in seconds (int)
         return int(time.time() - self.start_time)
 
+    def get_milliseconds_to_next_second(self) -> int:
+        """
+        Returns how long it takes until the displayed elapsed time changes.
+
+        The time in milliseconds (int), at least 1.
+        """
+        elapsed = time.time() - self.start_time
+        return max(1, int((1 - (elapsed % 1)) * 1000))
+
     def draw(self):
         """
         Draws the timer on the screen.
+
+        return: The area of the screen the timer was drawn on.
         """
-        font = pg.font.Font(None, 15)
-        text_surface = font.render(f"Timer: {self.get_elapsed_time()}", True, Color.WHITE.value)
+        text_surface = render_text(f"Timer: {self.get_elapsed_time()}", 15, Color.WHITE.value, True)
         text_rect = text_surface.get_rect(topright=(SCREEN_WIDTH - 10, 10))
         screen.blit(text_surface, text_rect)
+        return text_rect
 
     def reset(self):
         """
@@ -644,70 +164,76 @@ class Timer:
 
 
 # Created by 5590073
-def generate_coordinates(rows: int, columns: int, cell_size: int, start_x: int = 255, start_y: int = 425) -> list[list[int]]:
+def draw_shortest_distance(value: int = 0) -> pg.Rect:
     """
-    Generates a list of coordinates for a grid of cells.
+    Draws the shortest possible number of steps from start to end.
 
-    The function calculates the x and y coordinates for each cell in a grid, given the number of rows and columns,
-    the size of each cell, and the starting x and y coordinates. The coordinates are calculated in pixels.
+    This function creates a text surface with the minimum possible number of steps, 
+    positions it at the top right corner of the screen, and then blits this surface onto the screen.
 
-    rows: The number of rows in the grid.
-    columns: The number of columns in the grid.
-    cell_size: The size of each cell in pixels.
-    start_x: The x-coordinate of the start in the grid. Defaults to 255.
-    start_y: The y-coordinate of the start in the grid. Defaults to 425.
-    return: A list of [x, y] coordinates for each cell in the grid.
+    value: The minimum possible number of steps. Defaults to 0.
+    return: The area of the screen the text was drawn on.
     """
-    logging.info('Generating coordinates')
-    cells_coordinates = []
-    for row in range(rows):
-        for col in range(columns):
-            x = start_x + (cell_size + GAP_PIXELS) * col
-            y = start_y - (cell_size + GAP_PIXELS) * row
-            cells_coordinates.append([x, y])
-    return cells_coordinates
+    text_surface = render_text(f"Minimum possible number of steps: {value}", 15,
+                               Color.WHITE.value, True)  # Create a surface with the text
+    text_rect = text_surface.get_rect(
+        topright=(SCREEN_WIDTH - 10, 20))  # Position the text at the top right corner of the screen
+    screen.blit(text_surface, text_rect)  # Blit the text surface onto the screen
+    return text_rect
 
-# Created by 5590073
-def change_position_to_cell(player: Player, cell: Cell) -> tuple[int, int]:
+
+def draw_expected_turns(markov_analysis: MarkovAnalysis, cell_number: int = 1) -> pg.Rect:
     """
-    Changes the position of the player to the position of a specified cell.
+    Draws the expected number of turns left to finish the game from the player's cell.
 
-    This function updates the player's rectangle's top-left position, the player's position attribute, 
-    and the player's current cell attribute to match the specified cell.
+    The value is looked up from the Markov analysis calculated when the board was created, so drawing it
+    every frame doesn't solve anything again.
 
-    player: The Player object whose position is to be changed.
-    cell: The Cell object to which the player's position is to be changed.
-    return: A tuple representing the new top-left position of the player's rectangle.
+    markov_analysis: The MarkovAnalysis of the board.
+    cell_number: The number of the cell the player is on. Defaults to 1.
+    return: The area of the screen the text was drawn on.
     """
-    # Save the current state of the player before moving to a new cell
-    player.history_stack.append((player.position, player._score, player.moves, player.number_steps_made, player.num_snakes, player.current_cell))
-    player.number_steps_made += 1
-    # Move the player to the new cell
-    player.rect.topleft = cell.rect.topleft
-    player.position = cell.position
-    player.current_cell = cell
-    return player.rect.topleft
+    if markov_analysis is None:
+        return None
+    expected = markov_analysis.expected_turns_from(cell_number)
+    deviation = markov_analysis.standard_deviation_from(cell_number)
+    text_surface = render_text(f"Expected number of turns left: {expected:.1f} (+/- {deviation:.1f})", 15,
+                               Color.WHITE.value, True)  # Create a surface with the text
+    text_rect = text_surface.get_rect(
+        topright=(SCREEN_WIDTH - 10, 30))  # Position the text below the minimum number of steps
+    screen.blit(text_surface, text_rect)  # Blit the text surface onto the screen
+    return text_rect
 
-# Created by 5590073
-def draw_shortest_distance(value: int = 0) -> None:
+
+def draw_remaining_moves(board: Board, cell_number: int = 1) -> pg.Rect:
     """
-    Draws the shortest possible number of steps from start to end.
+    Draws the minimum number of steps left from the player's cell and the next cell of the optimal route.
 
-    This function creates a text surface with the minimum possible number of steps, 
-    positions it at the top right corner of the screen, and then blits this surface onto the screen.
+    Both are looked up from the board's distance-to-goal and next-hop tables, so following the player after
+    every roll and undo doesn't run a search.
 
-    value: The minimum possible number of steps. Defaults to 0.
+    board: The Board object with its distances to the goal calculated.
+    cell_number: The number of the cell the player is on. Defaults to 1.
+    return: The area of the screen the text was drawn on.
     """
-    font = pg.font.Font(None, 15)  # Create a font object
-    text_surface = font.render(f"Minimum possible number of steps: {value}", True,
-                               Color.WHITE.value)  # Create a surface with the text
+    if board.distance_to_goal is None:
+        return None
+    remaining = board.remaining_moves(cell_number)
+    if remaining is None:
+        text = "Minimum steps left: -"
+    elif remaining == 0:
+        text = "Minimum steps left: 0"
+    else:
+        text = f"Minimum steps left: {remaining} (next cell: {int(board.next_hop[cell_number])})"
+    text_surface = render_text(text, 15, Color.WHITE.value, True)  # Create a surface with the text
     text_rect = text_surface.get_rect(
-        topright=(SCREEN_WIDTH - 10, 20))  # Position the text at the top right corner of the screen
+        topright=(SCREEN_WIDTH - 10, 40))  # Position the text below the expected number of turns
     screen.blit(text_surface, text_rect)  # Blit the text surface onto the screen
+    return text_rect
 
 
 # Created by 5590073
-def draw_score(value: int = 0) -> None:
+def draw_score(value: int = 0) -> pg.Rect:
     """
     Draws the current score on the screen.
 
@@ -715,16 +241,17 @@ def draw_score(value: int = 0) -> None:
     and then blits this surface onto the screen.
 
     The current score. Defaults to 0.
+    return: The area of the screen the text was drawn on.
     """
-    font = pg.font.Font(None, 15)  # Create a font object
-    text_surface = font.render(f"Score: {value}", True, Color.WHITE.value)  # Create a surface with the text
+    text_surface = render_text(f"Score: {value}", 15, Color.WHITE.value, True)  # Create a surface with the text
     text_rect = text_surface.get_rect(
-        topright=(SCREEN_WIDTH - 10, 30))  # Position the text in the top right corner of the screen
+        topright=(SCREEN_WIDTH - 10, 50))  # Position the text in the top right corner of the screen
     screen.blit(text_surface, text_rect)  # Blit the text surface onto the screen
+    return text_rect
 
 
 # Created by 5555194
-def draw_dice_value(value: int = 0) -> None:
+def draw_dice_value(value: int = 0) -> pg.Rect:
     """
     Draws the current dice value on the screen.
 
@@ -732,16 +259,16 @@ def draw_dice_value(value: int = 0) -> None:
     and then blits this surface onto the screen.
 
     value: The current dice value. Defaults to 0.
+    return: The area of the screen the text was drawn on.
     """
-    font = pg.font.Font(None, 20)  # Create a font object
-    text_surface = font.render(f"Press SPACE to roll the dice: {value}", True,
-                               Color.WHITE.value)  # Create a surface with the text
+    text_surface = render_text(f"Press SPACE to roll the dice: {value}", 20,
+                               Color.WHITE.value, True)  # Create a surface with the text
     text_rect = text_surface.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 + 180))  # Position the text at the mid right
     screen.blit(text_surface, text_rect)  # Blit the text surface onto the screen
-    return None
+    return text_rect
 
 # Created by 5590073
-def draw_number_steps_made(player) -> None:
+def draw_number_steps_made(player) -> pg.Rect:
     """
     Draws the number of steps made by the player on the screen.
 
@@ -749,257 +276,545 @@ def draw_number_steps_made(player) -> None:
     and then blits this surface onto the screen.
 
     player: The Player object representing the player.
+    return: The area of the screen the text was drawn on.
     """
-    font = pg.font.Font(None, 15)  # Create a font object
-    text_surface = font.render(f"Number of steps made: {player.number_steps_made}", True,
-                               Color.WHITE.value)  # Create a surface with the text
+    text_surface = render_text(f"Number of steps made: {player.number_steps_made}", 15,
+                               Color.WHITE.value, True)  # Create a surface with the text
     text_rect = text_surface.get_rect(topleft=(10, 50))  # Position the text at the mid right
     screen.blit(text_surface, text_rect)  # Blit the text surface onto the screen
-    return None
+    return text_rect
 
 # Created by 5555194
-def draw_restart() -> None:
+def draw_restart() -> pg.Rect:
     """
     Draws a restart message on the screen.
 
     This function creates a text surface with the message "Press R to restart", positions it at the middle of the screen, 
     and then blits this surface onto the screen.
+    return: The area of the screen the text was drawn on.
     """
-    font = pg.font.Font(None, 20)  # Create a font object
-    text_surface = font.render(f"Press R to restart", True,
-                               Color.WHITE.value)  # Create a surface with the text
+    text_surface = render_text(f"Press R to restart", 20,
+                               Color.WHITE.value, True)  # Create a surface with the text
     text_rect = text_surface.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 + 200))  # Position the text at the mid right
     screen.blit(text_surface, text_rect)  # Blit the text surface onto the screen
-    return None
+    return text_rect
 
 # Created by 5590073
-def draw_undo() -> None:
+def draw_undo() -> pg.Rect:
     """
     Draws an undo message on the screen.
 
-    This function creates a text surface with the message "Press U to undo the last move", positions it at the middle of the screen, 
+    This function creates a text surface with the message "Press U to undo, Y to redo the last move", positions it at the middle of the screen, 
     and then blits this surface onto the screen.
+    return: The area of the screen the text was drawn on.
     """
-    font = pg.font.Font(None, 20)  # Create a font object
-    text_surface = font.render(f"Press U to undo the last move", True,
-                               Color.WHITE.value)  # Create a surface with the text
+    text_surface = render_text(f"Press U to undo, Y to redo the last move", 20,
+                               Color.WHITE.value, True)  # Create a surface with the text
     text_rect = text_surface.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 + 220))  # Position the text at the mid right
     screen.blit(text_surface, text_rect)  # Blit the text surface onto the screen
-    return None
-
-
-# Created by 5588113
-class ListNode:
-    """A class to represent a node in a linked list."""
-
-    def __init__(self, data: int):
-        """
-        Initialize a node with the given data.
-
-        Parameters:
-            data (any): The data to be stored in the node.
-        """
-        self.data = data
-        self.next = None
-
-
-# Created by 5588113
-class LinkedList:
-    """A class to represent a linked list."""
-
-    def __init__(self):
-        """Initialize an empty linked list with a head node."""
-        self.head = None
-    
-    def add(self, data: int) -> None:
-        """
-        Add a new node with the given data to the end of the linked list.
-
-        Parameters:
-            data (any): The data to be stored in the new node.
-        """
-        new_node = ListNode(data)
-        if self.head is None:
-            self.head = new_node
-            return
-        last_node = self.head
-        while last_node.next:
-            last_node = last_node.next
-        last_node.next = new_node
-    
-    def _partition(self, start: int, end: int, ascended: bool) -> int:
-        """
-        Partition the linked list segment around a quicksort pivot element.
-
-        Parameters:
-            start (Node): The start node of the segment to partition.
-            end (Node): The end node of the segment to partition.
-            ascended (bool): If True, sort in ascending order; otherwise, sort in descending order.
-
-        Returns:
-            Node: The pivot node after partitioning.
-        """
-        # Called by _quicksort
-        pivot = start.data
-        low = start
-        high = start.next
-        
-        while high != end:
-            if ascended:
-                if high.data < pivot:
-                    low = low.next
-                    low.data, high.data = high.data, low.data
-            else:
-                if high.data > pivot:
-                    low = low.next
-                    low.data, high.data = high.data, low.data
-            high = high.next
-        
-        low.data, start.data = start.data, low.data
-        return low
-    
-    def _quicksort(self, start: int, end: int, ascended: bool) -> None:
-        """
-        Sort a linked list segment using the quick sort algorithm.
-
-        Parameters:
-            start (Node): The start node of the segment to sort.
-            end (Node): The end node of the segment to sort.
-            ascended (bool): If True, sort in ascending order; otherwise, sort in descending order.
-        """
-        # Called by sort()
-        if start != end:
-            pivot = self._partition(start, end, ascended)
-            # Recursive call
-            self._quicksort(start, pivot, ascended)
-            self._quicksort(pivot.next, end, ascended)
-    
-    def sort(self, ascended: bool = True):
-        """
-        Sort the linked list in ascending or descending order using quick sort.
-
-        Parameters:
-            ascended (bool): If True, sort in ascending order; otherwise, sort in descending order.
-        """
-        if self.head is None:
-            return
-        last_node = self.head
-        while last_node.next:
-            last_node = last_node.next
-        self._quicksort(self.head, last_node.next, ascended)
+    return text_rect
 
 
 # Created by 5590073 and 5588113, edited by 5555194
-def draw_past_games_scores(past_games_scores: LinkedList, *args, **kwargs) -> None:
+def draw_past_games_scores(past_games_scores: Leaderboard, *args, **kwargs) -> pg.Rect:
     """
     Draws the past game scores on the screen.
 
-    This function sorts the scores in descending order and displays them at the top right corner of the screen.
+    The leaderboard keeps the best scores in descending order as they are added, so they are drawn
+    at the top right corner of the screen without sorting.
 
-    past_games_scores: A list of past game scores.
+    past_games_scores: The leaderboard of past game scores.
+    return: The area of the screen the scores were drawn on.
     """
-    font = pg.font.Font(None, 15)  # Create a font object
-    y_position = 40
+    y_position = 60
+    drawn_area = pg.Rect(SCREEN_WIDTH - 10, y_position, 0, 0)
     head_color = kwargs.get('head_color', Color.GREEN.value)  # Get the head color from kwargs
-    
-    # Apply quicksort the linked list
-    past_games_scores.sort(ascended=False)
 
     # Draw the scores
-    current_node = past_games_scores.head
-    i = 1
-    while current_node:
-        score = current_node.data  # Retrieve the data from the node
+    for i, score in enumerate(past_games_scores, start=1):
         # Assign head color 
         if i == 1:
             color = head_color
         else:
             color = Color.WHITE.value
-        text_surface = font.render(f"Best score {i}: {score}", True, color)  # Use the appropriate color
+        text_surface = render_text(f"Best score {i}: {score}", 15, color, True)  # Use the appropriate color
         text_rect = text_surface.get_rect(topright=(SCREEN_WIDTH - 10, y_position))
         screen.blit(text_surface, text_rect)
+        drawn_area.union_ip(text_rect)
         y_position += 10
-        current_node = current_node.next
-        i += 1
+    return drawn_area
 
 
 # Created by 5590073 and 5588113
-def draw_past_games_times(past_games_times: LinkedList, *args, **kwargs) -> None:
+def draw_past_games_times(past_games_times: Leaderboard, *args, **kwargs) -> pg.Rect:
     """
     Draws the past game times on the screen.
 
-    This function sorts the times in ascending order and displays them at the top left corner of the screen.
+    The leaderboard keeps the best times in ascending order as they are added, so they are drawn
+    at the top left corner of the screen without sorting.
 
-    past_games_times: A list of past game times.
+    past_games_times: The leaderboard of past game times.
+    return: The area of the screen the times were drawn on.
     """
-    font = pg.font.Font(None, 15)  # Create a font object
     y_position = 80
+    drawn_area = pg.Rect(10, y_position, 0, 0)
     head_color = kwargs.get('head_color', Color.GREEN.value)  # Get the head color from kwargs
-    
-    # Apply quicksort the linked list
-    past_games_times.sort(ascended=True)
 
     # Draw the times
-    current_node = past_games_times.head
-    i = 1
-    while current_node:
-        time = current_node.data  # Retrieve the data from the node
+    for i, time in enumerate(past_games_times, start=1):
         # Assign head color 
         if i == 1:
             color = head_color
         else:
             color = Color.WHITE.value
-        text_surface = font.render(f"Best time {i}: {time}", True, color)  # Use the appropriate color
+        text_surface = render_text(f"Best time {i}: {time}", 15, color, True)  # Use the appropriate color
         text_rect = text_surface.get_rect(topleft=(10, y_position))
         screen.blit(text_surface, text_rect)
+        drawn_area.union_ip(text_rect)
         y_position += 10
-        current_node = current_node.next
-        i += 1
+    return drawn_area
 
 
-# Create a font object to render the welcome text on the screen
+def board_latency_text(prefetcher) -> str:
+    """
+    Describes whether the next board is ready, how long the last board took to prepare in the background and
+    how long the last restart took.
+
+    prefetcher: The BoardPrefetcher of the game.
+    """
+    text = "Next board: " + ("ready" if prefetcher.ready() else "preparing")
+    if prefetcher.prepare_seconds is not None:
+        text += f", last prepared in {prefetcher.prepare_seconds * 1000:.1f} ms"
+    if prefetcher.restart_seconds is not None:
+        text += f", last restart took {prefetcher.restart_seconds * 1000:.1f} ms"
+    return text
+
+
+def draw_board_latency(text: str = None) -> pg.Rect:
+    """
+    Draws the latency of preparing the boards in debug mode at the bottom left corner of the screen.
+
+    text: The text from board_latency_text(), or None outside debug mode.
+    return: The area of the screen the text was drawn on, or None if nothing was drawn.
+    """
+    if text is None:
+        return None
+    text_surface = render_text(text, 15, Color.WHITE.value, True)
+    text_rect = text_surface.get_rect(bottomleft=(10, SCREEN_HEIGHT - 10))
+    screen.blit(text_surface, text_rect)
+    return text_rect
+
+
+class StageTimingsOverlay:
+    """
+    The lines of the stage timings overlay, refreshed at most every interval seconds, so the overlay doesn't
+    change (and render its text again) every frame.
+
+    Attributes:
+        timings (StageTimings): The timings shown.
+        interval (float): The time in seconds between refreshes.
+    """
+    def __init__(self, timings: StageTimings, interval: float = 0.5):
+        self.timings = timings
+        self.interval = interval
+        self._lines = ()
+        self._refresh_time = 0.0
+
+    def lines(self) -> tuple:
+        """Returns the lines of the overlay: a header and the p50, p95 and p99 of every stage."""
+        now = time.monotonic()
+        if now - self._refresh_time >= self.interval:
+            self._refresh_time = now
+            self._lines = ("Stage timings (ms): p50 / p95 / p99",) + tuple(
+                f"{stage}: {stats['p50']:.2f} / {stats['p95']:.2f} / {stats['p99']:.2f}"
+                for stage, stats in self.timings.summary().items())
+        return self._lines
+
+
+stage_timings_overlay = StageTimingsOverlay(stage_timings)
+
+
+def draw_stage_timings(lines: tuple = None) -> pg.Rect:
+    """
+    Draws the stage timings overlay on the left of the screen, below the best times.
+
+    lines: The lines from StageTimingsOverlay.lines(), or None when the overlay is hidden.
+    return: The area of the screen the overlay was drawn on, or None if nothing was drawn.
+    """
+    if lines is None:
+        return None
+    y_position = 190
+    drawn_area = pg.Rect(10, y_position, 0, 0)
+    for line in lines:
+        text_surface = render_text(line, 12, Color.WHITE.value, True)
+        text_rect = text_surface.get_rect(topleft=(10, y_position))
+        screen.blit(text_surface, text_rect)
+        drawn_area.union_ip(text_rect)
+        y_position += 9
+    return drawn_area
+
+
+def debug_output_path(name: str, extension: str) -> str:
+    """
+    Returns a timestamped path in DEBUG_DIRECTORY for a debug file, creating the directory if needed.
+
+    name: The kind of file, e.g. "timings".
+    extension: The file extension without the dot.
+    """
+    os.makedirs(DEBUG_DIRECTORY, exist_ok=True)
+    return os.path.join(DEBUG_DIRECTORY, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.{extension}")
+
+
+def export_stage_timings() -> None:
+    """Saves the stage timings as CSV and JSON files in DEBUG_DIRECTORY."""
+    try:
+        csv_path, json_path = debug_output_path("timings", "csv"), debug_output_path("timings", "json")
+        stage_timings.export_csv(csv_path)
+        stage_timings.export_json(json_path)
+        logging.info(f'Saved the stage timings to {csv_path} and {json_path}')
+    except OSError as e:
+        logging.warning(f'The stage timings could not be saved: {e}')
+
+
+def save_profile_capture() -> None:
+    """Ends the running profile capture and saves its cProfile stats and report in DEBUG_DIRECTORY."""
+    try:
+        profile_path, report_path = debug_output_path("profile", "prof"), debug_output_path("profile", "txt")
+        profile_capture.save(profile_path, report_path)
+        logging.info(f'Saved the profile of {profile_capture.frames_captured} frames to {profile_path} '
+                     f'and {report_path}')
+    except OSError as e:
+        # Otherwise the capture would keep running and its save would be retried every frame
+        profile_capture.stop()
+        logging.warning(f'The profile could not be saved: {e}')
+
+
+class RenderMode(Enum):
+    """How the main loop puts frames on the display."""
+    FULL = "full"  # Redraw and flip the whole screen every frame at 60 FPS
+    DIRTY = "dirty"  # Update only the changed parts of the screen and sleep while nothing changes
+
+
+class DirtyRegions:
+    """
+    Tracks which parts of the screen changed between frames.
+
+    Every drawn element is marked with the value it shows and the area it was drawn on. An element is dirty
+    when either of them differs from the previous frame, and then both its old and new areas are updated.
+
+    Attributes:
+        previous (dict): The value and area of each element in the last frame.
+        current (dict): The value and area of each element in the frame being drawn.
+    """
+    def __init__(self):
+        self.previous = {}
+        self.current = {}
+
+    def mark(self, name: str, value, rect) -> None:
+        """
+        Records an element drawn in the current frame.
+
+        name: The name of the element.
+        value: What the element shows, compared with the previous frame.
+        rect: The area of the screen the element was drawn on.
+        """
+        self.current[name] = (value, pg.Rect(rect))
+
+    def collect(self) -> list:
+        """
+        Finishes the current frame.
+
+        return: A list of the areas of the screen that changed since the previous frame.
+        """
+        dirty_rects = []
+        for name, (value, rect) in self.current.items():
+            previous = self.previous.get(name)
+            if previous is None:
+                dirty_rects.append(rect)
+            elif previous[0] != value or previous[1] != rect:
+                dirty_rects.append(rect)
+                dirty_rects.append(previous[1])
+        for name, (value, rect) in self.previous.items():
+            if name not in self.current:
+                dirty_rects.append(rect)
+        self.previous = self.current
+        self.current = {}
+        return dirty_rects
+
+
+class ReplayPlayback:
+    """
+    Plays a recording back in the game window by posting its key presses at the recorded times.
+
+    The events of one recorded frame are posted together and at most one recorded frame is posted per
+    displayed frame, so the game handles them in the same frames as when they were recorded.
+
+    Attributes:
+        replay (Replay): The recording.
+        speed (float): How many times faster than recorded the events are posted.
+    """
+    def __init__(self, replay: "replay.Replay", speed: float = 1.0):
+        if speed <= 0:
+            raise ValueError("The speed of a playback must be positive")
+        self.replay = replay
+        self.speed = speed
+        self._index = 0
+        self._due_time = None
+
+    def finished(self) -> bool:
+        """Whether all recorded events have been posted."""
+        return self._index == len(self.replay.frames)
+
+    def milliseconds_to_next_frame(self) -> int:
+        """The time until the next recorded frame is due, or -1 if there is none."""
+        if self.finished():
+            return -1
+        if self._due_time is None:
+            return 0
+        return max(0, math.ceil((self._due_time - time.monotonic()) * 1000))
+
+    def post_due_events(self) -> None:
+        """Posts the events of the next recorded frame if it is due."""
+        now = time.monotonic()
+        if self.finished():
+            return
+        if self._due_time is None:
+            # The first frame is timed from the start of the playback
+            self._due_time = now + self.replay.frames[0][0] / 1000 / self.speed
+        if now < self._due_time:
+            return
+        for event in self.replay.frames[self._index][1]:
+            if event in replay.ROLLS:
+                pg.event.post(pg.event.Event(REPLAY_KEYDOWN, key=pg.K_SPACE, roll=event))
+            else:
+                pg.event.post(pg.event.Event(REPLAY_KEYDOWN, key=REPLAY_KEYS[event]))
+        self._index += 1
+        if not self.finished():
+            self._due_time = now + self.replay.frames[self._index][0] / 1000 / self.speed
+        else:
+            logging.info('Playback finished')
+
+
+def _prepare_board(rows: int, columns: int, seed: int, library=None) -> tuple:
+    """
+    Generates or loads the board of a seed and calculates its derived data. Called on the prefetch thread.
+
+    return: The CompactBoard and the time it took in seconds.
+    """
+    start_time = time.perf_counter()
+    board = CompactBoard(rows, columns, seed=seed)
+    populate_board(board, library)
+    board.calculate_derived_data()
+    return board, time.perf_counter() - start_time
+
+
+class BoardPrefetcher:
+    """
+    Prepares the next board on a background thread while the current game is played, so a restart only swaps
+    it in instead of generating and analyzing it.
+
+    The seed of the next board is known as soon as the current board is generated, so the next board is
+    usually ready long before the game ends. It is prepared as a CompactBoard without any pygame objects;
+    swapping it in copies its snakes and ladders onto the game's board and hands its derived data over
+    through the BoardCache, which only the main thread uses, unless the cache already holds the board.
+
+    Attributes:
+        library (BoardLibrary): The library boards are read from when it holds them, or None.
+        seed (int): The seed of the board being prepared, None if there is none.
+        prepare_seconds (float): How long the last swapped-in board took to prepare on the thread.
+        restart_seconds (float): How long the last restart took on the main thread, waiting included.
+    """
+    def __init__(self, library: BoardLibrary = None):
+        self.library = library
+        self.seed = None
+        self.prepare_seconds = None
+        self.restart_seconds = None
+        self._future = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="board-prefetch")
+
+    def prefetch(self, board) -> None:
+        """
+        Starts preparing the board after the given one, unless it is already being prepared.
+
+        board: The board being played, with its next seed drawn.
+        """
+        if board.next_seed is None or board.next_seed == self.seed:
+            return
+        if self._future is not None:
+            self._future.cancel()
+        self.seed = board.next_seed
+        self._future = self._executor.submit(_prepare_board, board.rows, board.columns, self.seed, self.library)
+
+    def ready(self) -> bool:
+        """Whether the board being prepared is ready to be swapped in."""
+        return self._future is not None and self._future.done()
+
+    def swap_into(self, board, cache: BoardCache) -> bool:
+        """
+        Puts the prepared board on an empty board with its seed, waiting for it if it isn't ready yet.
+
+        board: The Board object representing the game board, just cleared with the next seed.
+        cache: The BoardCache the derived data is handed over through.
+        return: True if the board was swapped in, False if no board was prepared for its seed or preparing
+            it failed; the caller generates the board then.
+        """
+        if self._future is None or board.seed != self.seed:
+            return False
+        future, self._future, self.seed = self._future, None, None
+        try:
+            prepared, self.prepare_seconds = future.result()
+        except Exception as e:
+            logging.warning(f'Preparing the next board failed: {e}')
+            return False
+        for snake in prepared.snakes:
+            board.add_snake(snake.start_cell.number, snake.end_cell.number)
+        for ladder in prepared.ladders:
+            board.add_ladder(ladder.start_cell.number, ladder.end_cell.number)
+        board.next_seed = prepared.next_seed
+        # A board seen before keeps its cached data, which has the board layer the prepared board lacks
+        fingerprint = prepared.fingerprint()
+        if fingerprint not in cache:
+            cache.store(prepared, fingerprint)
+        logging.info(f'Swapped in the board with seed {board.seed}')
+        return True
+
+
+def build_board_layer(board: Board) -> pg.Surface:
+    """
+    Pre-renders everything on the screen that only changes when the board is regenerated.
+
+    This includes the background, the board surface, the numbered cells, the snakes and ladders and the welcome
+    message. The layer is stored in the board object and rebuilt only after handle_events regenerates the board.
+
+    board: The Board object representing the game board.
+    return: The screen-sized layer surface.
+    """
+    logging.info('Building board layer')
+    layer = pg.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+    layer.fill(Color.BLACK.value)
+    layer.blit(board.surface, BOARD_POSITION)
+    board.update_cells(layer)
+    for snake in board.snakes:
+        snake.draw(layer)
+    for ladder in board.ladders:
+        ladder.draw(layer)
+    layer.blit(font_surface, (175, 50))
+    board.layer = layer
+    derived_data_cache.store(board)
+    return layer
 
-# Created by 5590073
-font = pg.font.Font(None, 36)
-font_surface = font.render("Welcome to the Snakes and Ladders", False, Color.WHITE.value)
-clock = pg.time.Clock()
 
 # Created by 5590073, edited by 5588113
-def main():
-    """Main game loop."""
+def main(render_mode: RenderMode = RenderMode.DIRTY, rows: int = ROWS, columns: int = COLUMNS, seed: int = None,
+         history_path: str = None, replay_path: str = None, playback: ReplayPlayback = None,
+         library: BoardLibrary = None, debug: bool = False):
+    """
+    Main game loop.
+
+    render_mode: RenderMode.DIRTY updates only the changed parts of the screen and waits for input or the
+        next timer tick when nothing changes; RenderMode.FULL redraws and flips the whole screen every frame.
+    rows: The number of rows of the board.
+    columns: The number of columns of the board. Boards of any size are scaled to fit the screen.
+    seed: The seed of the first board. The seeds of the following boards are drawn from it, so a whole
+        session of boards and dice rolls can be reproduced. A random seed is used if it is None.
+    history_path: The SQLite database finished games are saved to, history.sqlite3 next to the game by default.
+    replay_path: The file the session's recording is appended to, replays.slr next to the game by default.
+    playback: A ReplayPlayback to show instead of playing. The board comes from the recording, the keyboard
+        is ignored and nothing is saved to the history or recorded.
+    library: A BoardLibrary the boards are read from instead of being generated when it holds their seeds.
+        Without a seed the session starts with the library's first board, so a library built with
+        board_library.py --chain serves every board of the session.
+    debug: Whether to show how long the next board took to prepare in the background and how long the
+        last restart took, and the stage timings overlay. F3 toggles the overlay, F4 saves the timings and
+        F5 captures a profile of the next frames.
+    """
+    init_display()
+    history = None
+    recorder = None
+    if playback is not None:
+        rows, columns, seed = playback.replay.rows, playback.replay.columns, playback.replay.seed
+        pg.event.set_blocked(pg.KEYDOWN)
+    if library is not None:
+        if playback is None:
+            rows, columns = library.rows, library.columns
+            if seed is None and len(library) > 0:
+                seed = int(library.seeds[0])
+        elif (rows, columns) != (library.rows, library.columns):
+            logging.warning(f'The board library has {library.rows}x{library.columns} boards, so it is not used')
+            library = None
     try:
         logging.info('Generating coordinates')
         # Initialize the board, player, progress bar, and timer
-        board = Board(ROWS, COLUMNS)
+        board = create_board(rows, columns, seed)
         board.set_color(Color.WHITE.value)
-        board.create_cells(generate_coordinates(board.rows, board.columns, CELL_SIZE_PIXELS))
 
-        player = Player(position=PLAYER_START_POSITION)
+        player = Player(position=board.cells_list[1].position)
+        # The player stays visible on boards with tiny cells
+        player.set_size(max(4, board.cells_list[1].rect.width))
         player.set_color(Color.PLAYER_COLOR.value)
-        player.current_cell = board.cells_list[1]
 
         progress_bar = ProgressBar((10, 10), (200, 20))
         timer = Timer()
         
-        # Asign games' scores and times as linked lists
-        past_games_scores = LinkedList()
-        past_games_times = LinkedList()
+        # Keep the best games' scores (highest first) and times (fastest first) in leaderboards, starting
+        # with the best ones saved in the history (only the top of it is read)
+        try:
+            if playback is None:
+                history = GameHistory(history_path) if history_path else GameHistory()
+            past_games_scores = Leaderboard(descending=True,
+                                            values=history.top_scores(LEADERBOARD_SIZE) if history else ())
+            past_games_times = Leaderboard(values=history.top_times(LEADERBOARD_SIZE) if history else ())
+        except sqlite3.Error as e:
+            logging.warning(f'Game history is not available: {e}')
+            history = None
+            past_games_scores = Leaderboard(descending=True)
+            past_games_times = Leaderboard()
 
         # Generate snakes and ladders
-        generator = Generator(board=board)
-        generator.create_snakes_on_board(board=board)
-        generator.create_ladders_on_board(board=board)
-
-        # Create the adjacency list
-        board.create_board_graph()
-        # Calculate the shortest path
-        shortest_path_length = board.calculate_shortest_path(start_cell_number=1, end_cell_number=ROWS*COLUMNS)
+        populate_board(board, library)
+
+        # Create the adjacency list, calculate the shortest path and the expected number of turns
+        board.calculate_derived_data(derived_data_cache)
+        start_game(player, board)
+        # Prepare the next board while this one is played
+        prefetcher = BoardPrefetcher(library)
+        prefetcher.prefetch(board)
+
+        # Record the session so it can be played back
+        if playback is None:
+            try:
+                recorder = replay.ReplayRecorder(board.rows, board.columns, board.seed,
+                                                 replay_path or replay.DEFAULT_REPLAY_PATH)
+            except (OSError, ValueError) as e:
+                logging.warning(f'The session is not recorded: {e}')
         
+        dirty_regions = DirtyRegions() if render_mode is RenderMode.DIRTY else None
+        frame_changed = True
+
         # Created by 5590073
+        # In debug mode the stage timings are measured and shown from the start; F3 toggles them
+        stage_timings.enabled = debug
         running = True
         while running:
+            stage_start = stage_timings.start()
+            if dirty_regions is not None and not frame_changed:
+                # Nothing changed in the last frame, so sleep until an input arrives, the timer shows a new second
+                # or the next frame of the recording being played back is due
+                timeout = timer.get_milliseconds_to_next_second()
+                if playback is not None and not playback.finished():
+                    # A timeout of 0 would wait forever
+                    timeout = max(1, min(timeout, playback.milliseconds_to_next_frame()))
+                event = pg.event.wait(timeout)
+                if event.type != pg.NOEVENT:
+                    pg.event.post(event)
+                stage_start = stage_timings.stop('wait', stage_start)
+            frame_start = stage_start
+            if playback is not None:
+                playback.post_due_events()
             # Handle events such as player movements, game reset and game quit
-            running = handle_events(player, board, timer, past_games_scores, past_games_times)
+            running = handle_events(player, board, timer, past_games_scores, past_games_times, history, recorder,
+                                    library, prefetcher, debug)
+            stage_start = stage_timings.stop('handle_events', stage_start)
             if running:
                 draw_game_state(player,
                                 board,
@@ -1007,162 +822,285 @@ def main():
                                 past_games_scores,
                                 progress_bar,
                                 player.moves,
-                                past_games_times)
-                update_game_state(player)
+                                past_games_times,
+                                dirty_regions,
+                                prefetcher if debug else None)
+                stage_start = stage_timings.stop('draw_game_state', stage_start)
 
             # Update the display and set the frame rate to 60 FPS to ensure smooth gameplay
-            pg.display.flip()
+            if dirty_regions is not None:
+                dirty_rects = dirty_regions.collect()
+                frame_changed = len(dirty_rects) > 0
+                pg.display.update(dirty_rects)
+                stage_start = stage_timings.stop('display.update', stage_start)
+            else:
+                pg.display.flip()
+                stage_start = stage_timings.stop('display.flip', stage_start)
+            # The time spent on the frame, without waiting for input or for the next frame
+            stage_timings.stop('frame', frame_start)
             clock.tick(60)
+            stage_timings.stop('clock.tick', stage_start)
+            if profile_capture.count_frame():
+                save_profile_capture()
         # Quit the pygame module at the end
         logging.info('Quitting game')
+        close_session(history, recorder)
         pg.quit()
         os._exit(0)
     except Exception as e:
         print(f"Error in game loop: {e}")
+        close_session(history, recorder)
         pg.quit()
         os._exit(0)
 
+
+def close_session(history, recorder) -> None:
+    """
+    Writes the games still queued to the history and the end of the recording before the process exits,
+    since os._exit doesn't wait for them.
+    """
+    if history is not None:
+        history.close()
+    if recorder is not None:
+        recorder.close()
+
 # Created by 5590073, edited by 5555194 and 5588113
-def handle_events(player, board, timer, past_games_scores, past_games_times):
+def handle_events(player, board, timer, past_games_scores, past_games_times, history=None, recorder=None,
+                  library=None, prefetcher=None, debug=False):
     """
     Handles game events such as player movements, game reset, and game quit.
 
     player: The Player object representing the player.
     board: The Board object representing the game board.
     timer: The Timer object representing the game timer.
-    past_games_scores: A list of scores from past games.
-    past_games_times: A list of times from past games.
+    past_games_scores: The leaderboard of scores from past games.
+    past_games_times: The leaderboard of times from past games.
+    history: The GameHistory finished games are saved to, or None to not save them.
+    recorder: The ReplayRecorder the key presses are recorded with, or None to not record them.
+    library: The BoardLibrary new boards are read from when it holds them, or None to generate them.
+    prefetcher: The BoardPrefetcher preparing the next board, or None to prepare it on restart.
+    debug: Whether the debug keys work: F3 shows or hides the stage timings, F4 saves them and F5 profiles
+        the next frames.
     return: False if the game is quit, True otherwise.
     """
+    if recorder is not None:
+        recorder.new_frame()
     for event in pg.event.get():
         if event.type == pg.QUIT:
             return False
-        if event.type == pg.KEYDOWN:
+        # Key presses of a recording being played back come as REPLAY_KEYDOWN events
+        if event.type in (pg.KEYDOWN, REPLAY_KEYDOWN):
             # If the key is the SPACE bar
             if event.key == pg.K_SPACE:
                 logging.info('SPACE was pressed')
-                # Change the player position based on the dice roll
-                player.moves = roll_dice()
-                current_cell_number = player.current_cell.number
-                next_cell_number = current_cell_number + player.moves
-                # Ensure that the player does not move beyond the last cell
-                if next_cell_number <= 100:
-                    player.position = change_position_to_cell(player, board.cells_list[next_cell_number])
-                else:
-                    player.position = change_position_to_cell(player, board.cells_list[100])
-                    # Special bonus (if player doesn't encounter any snakes score is doubled)
-                    if player.num_snakes == 0:
-                        player.update_score(player.get_score())
-                        # Increment the snake number so the score doesn't double if the player rolls the dice again at cell 100
-                        player.snake_encountered()
-                    # Simulate pressing the reset button to restart the game when the player reaches the last cell
-                    pg.event.post(pg.event.Event(pg.KEYDOWN, key=pg.K_r))
+                # Change the player position based on the dice roll, or the recorded roll when playing back
+                roll = getattr(event, 'roll', None) or roll_dice(board.dice_rng)
+                if recorder is not None:
+                    recorder.record(roll)
+                # Once the game has ended rolls change nothing until the restart below
+                if not player.state.finished:
+                    step_start = stage_timings.start()
+                    state = step(player.state, roll)
+                    player.play(state, board.cells_list[state.cell])
+                    stage_timings.stop('handle_events: step', step_start)
+                    if state.finished:
+                        # Simulate pressing the reset button to restart the game when the player reaches the last cell
+                        pg.event.post(pg.event.Event(event.type, key=pg.K_r, finished=True))
             # Reset button
             if event.key == pg.K_r:
                 logging.info('R was pressed')
-                # Record the total score and time only if the player reaches the last cell
-                if player.current_cell == board.cells_list[100]:
-                    # Add data to linked lists
-                    past_games_scores.add(player._score)
+                # The restart posted above follows from the roll, so only pressing R is recorded
+                if recorder is not None and not hasattr(event, 'finished'):
+                    recorder.record(replay.RESTART)
+                # Record the total score and time only if the player finished the game
+                if player.state.finished:
+                    # Add data to the leaderboards
+                    past_games_scores.add(player.state.score)
                     past_games_times.add(timer.get_elapsed_time())
-                # Clear the board
-                board.cells_list = {}
-                board.snakes = []
-                board.ladders = []
-                # Recreate cells and entities
-                board.create_cells(generate_coordinates(board.rows, board.columns, CELL_SIZE_PIXELS))
-                # Regenerate snakes and ladders
-                generator = Generator(board=board)
-                generator.create_snakes_on_board(board=board)
-                generator.create_ladders_on_board(board=board)
-                # Recreate the adjacency list
-                board.create_board_graph()
-                # Recalculate the shortest path
-                shortest_path_length = board.calculate_shortest_path(start_cell_number=1, end_cell_number=ROWS*COLUMNS)            
+                    # Save the game to the history in the background
+                    if history is not None:
+                        history.record(score=player.state.score, time=timer.get_elapsed_time(),
+                                       steps=player.state.steps, snakes=player.state.snakes,
+                                       seed=board.seed, rows=board.rows, columns=board.columns)
+                restart_start_time = time.perf_counter()
+                # Clear the board, with the seed of the next board drawn from the current one
+                board.clear(seed=board.next_seed)
+                # Swap in the board prepared in the background, or regenerate snakes and ladders (or read them
+                # from the library) if it wasn't prepared
+                if prefetcher is None or not prefetcher.swap_into(board, derived_data_cache):
+                    populate_board(board, library)
+                # Recreate the adjacency list, recalculate the shortest path and the expected number of turns,
+                # or take them from the cache if this board was prepared or generated before
+                board.calculate_derived_data(derived_data_cache)
+                if prefetcher is not None:
+                    prefetcher.restart_seconds = time.perf_counter() - restart_start_time
+                    prefetcher.prefetch(board)
+                stage_timings.stop('handle_events: restart', restart_start_time)
                 # Reset player position, score, number of snakes encountered, timer, and number of steps made
-                player.update_score((-1 * player._score) + 100)
                 timer.reset()
-                player.number_steps_made = 0
-                player.position = change_position_to_cell(player, board.cells_list[1])
-                player.reset_score()
-                player.reset_num_snakes()
+                start_game(player, board)
             # Undo button works when the player is not at the start cell (so the player can't undo the first move)
-            if event.key == pg.K_u and player.current_cell != board.cells_list[1]:
-                player.undo()
+            if event.key == pg.K_u:
+                if recorder is not None:
+                    recorder.record(replay.UNDO)
+                if player.current_cell != board.cells_list[1]:
+                    player.undo(board)
+            # Redo button brings back the last undone move
+            if event.key == pg.K_y:
+                if recorder is not None:
+                    recorder.record(replay.REDO)
+                player.redo(board)
+            # Debug keys, which don't change the game and aren't recorded
+            if debug and event.key == pg.K_F3:
+                stage_timings.enabled = not stage_timings.enabled
+                stage_timings.clear()
+            if debug and event.key == pg.K_F4:
+                export_stage_timings()
+            # F5 profiles the next frames, or saves the profile early if it is running
+            if debug and event.key == pg.K_F5:
+                if profile_capture.active:
+                    save_profile_capture()
+                else:
+                    logging.info(f'Profiling the next {profile_capture.frames} frames')
+                    profile_capture.start()
     return True
 
 
-# Created by 5590073
-def update_game_state(player):
+def populate_board(board, library=None) -> None:
     """
-    Updates the game state based on the player's current cell.
+    Puts the snakes and ladders of its seed on an empty board: read from the board library if it holds the
+    seed, generated otherwise. Both give the same board and the same next seed.
+
+    board: The Board object representing the game board, just created or cleared.
+    library: The BoardLibrary to look the seed up in, or None.
+    """
+    index = library.find_seed(board.seed) if library is not None else None
+    if index is None:
+        logging.info(f'Generating board with seed {board.seed}')
+        generate_entities(board)
+    else:
+        logging.info(f'Loading board with seed {board.seed} from the library')
+        library.load_board(index, board)
 
-    If the player's current cell contains an entity and the player is at the start of the entity, 
-    the player reacts to the entity.
+
+def start_game(player, board) -> None:
+    """
+    Starts a new game on a board whose derived data is calculated: puts the player on the first cell with
+    the starting score and forgets the moves of the previous game.
 
     player: The Player object representing the player.
+    board: The Board object representing the game board.
     """
-    if player.current_cell.contents is not None and player.current_cell == player.current_cell.contents.start_cell:
-        try:
-            player.react_to_entity(player.current_cell.contents)
-        except Exception as e:
-            print(f"Error reacting to entity: {e}")
+    player.history.clear()
+    player.set_state(new_game(board.rules), board.cells_list[1])
 
 
 # Created by 5590073, edited by 5555194
-def draw_game_state(player, board, timer, past_games_scores, progress_bar, dice_value, past_games_times):
+def draw_game_state(player, board, timer, past_games_scores, progress_bar, dice_value, past_games_times,
+                    dirty_regions=None, prefetcher=None):
     """
     Draws the current game state on the screen.
 
-    This includes the game board, player, timer, shortest distance, score, progress bar, past game scores, 
-    past game times, dice value, and restart message.
+    This includes the game board, player, timer, shortest distance, remaining moves, score, progress bar, past game scores, 
+    past game times, dice value, and restart message. The board itself is drawn from its pre-rendered layer.
 
     player: The Player object representing the player.
     board: The Board object representing the game board.
     timer: The Timer object representing the game timer.
-    past_games_scores: A list of scores from past games.
+    past_games_scores: The leaderboard of scores from past games.
     progress_bar: The ProgressBar object representing the game progress bar.
     dice_value: The current dice value.
-    past_games_times: A list of times from past games.
+    past_games_times: The leaderboard of times from past games.
+    dirty_regions: The DirtyRegions object to record the drawn elements in, or None in full render mode.
+    prefetcher: The BoardPrefetcher whose latency is shown in debug mode, or None to not show it.
     """
     try:
-        # Each frame is filled with black color, so that the previous frame is not visible
-        screen.fill((0, 0, 0))
-        # Draw the board surface on the screen
-        screen.blit(board.surface, (250, 150))
-        board.update_cells()
+        # Every draw call is timed as a stage of its own while the stage timings are enabled
+        stage_start = stage_timings.start()
+        # The static layer (background, board, cells, snakes, ladders and welcome message) covers the whole
+        # screen, so that the previous frame is not visible
+        if board.layer is None:
+            build_board_layer(board)
+            stage_start = stage_timings.stop('draw: build_board_layer', stage_start)
+        screen.blit(board.layer, (0, 0))
+        stage_start = stage_timings.stop('draw: layer', stage_start)
         # Draw the player on the screen
-        screen.blit(player.surface, player.rect)
-        # Draw the font on the screen with the welcome message
-        screen.blit(font_surface, (175, 50))
+        player_rect = screen.blit(player.surface, player.rect)
+        stage_start = stage_timings.stop('draw: player', stage_start)
         # Draw the timer on the screen
-        timer.draw()
+        timer_rect = timer.draw()
+        stage_start = stage_timings.stop('draw: timer', stage_start)
         # Draw the shortest distance on the screen
-        draw_shortest_distance(board.shortest_distance)
+        shortest_distance_rect = draw_shortest_distance(board.shortest_distance)
+        stage_start = stage_timings.stop('draw: shortest_distance', stage_start)
+        # Draw the expected number of turns left from the player's cell
+        expected_turns_rect = draw_expected_turns(board.markov_analysis, player.current_cell.number)
+        stage_start = stage_timings.stop('draw: expected_turns', stage_start)
+        # Draw the minimum number of steps left from the player's cell
+        remaining_moves_rect = draw_remaining_moves(board, player.current_cell.number)
+        stage_start = stage_timings.stop('draw: remaining_moves', stage_start)
         # Draw the score on the screen
-        draw_score(player.get_score())
-
-        # Draw the test snakes and ladders
-        for snake in board.snakes:
-            snake.draw()
-
-        for ladder in board.ladders:
-            ladder.draw()
+        score_rect = draw_score(player.get_score())
+        stage_start = stage_timings.stop('draw: score', stage_start)
 
         # Update the progress bar
         progress = player.current_cell.number / len(board.cells_list)
         progress_bar.update(progress)
         # Draw the updated progress bar on the screen
-        progress_bar.draw(screen)
-        draw_past_games_scores(past_games_scores, head_color=Color.GREEN.value)
-        draw_past_games_times(past_games_times, head_color=Color.GREEN.value)
-        draw_number_steps_made(player)
-        draw_dice_value(dice_value)
+        progress_bar_rect = progress_bar.draw(screen)
+        stage_start = stage_timings.stop('draw: progress_bar', stage_start)
+        past_games_scores_rect = draw_past_games_scores(past_games_scores, head_color=Color.GREEN.value)
+        stage_start = stage_timings.stop('draw: past_games_scores', stage_start)
+        past_games_times_rect = draw_past_games_times(past_games_times, head_color=Color.GREEN.value)
+        stage_start = stage_timings.stop('draw: past_games_times', stage_start)
+        steps_rect = draw_number_steps_made(player)
+        stage_start = stage_timings.stop('draw: steps', stage_start)
+        dice_value_rect = draw_dice_value(dice_value)
+        stage_start = stage_timings.stop('draw: dice_value', stage_start)
         draw_restart()
         draw_undo()
+        stage_start = stage_timings.stop('draw: messages', stage_start)
+        board_latency = board_latency_text(prefetcher) if prefetcher is not None else None
+        board_latency_rect = draw_board_latency(board_latency)
+        stage_start = stage_timings.stop('draw: board_latency', stage_start)
+        # The overlay shows the timings of the frames before this one
+        stage_timings_lines = stage_timings_overlay.lines() if stage_timings.enabled else None
+        stage_timings_rect = draw_stage_timings(stage_timings_lines)
+
+        # Record what each element shows and where, so only the changed parts of the screen are updated
+        if dirty_regions is not None:
+            dirty_regions.mark('layer', id(board.layer), screen.get_rect())
+            dirty_regions.mark('player', tuple(player_rect), player_rect)
+            dirty_regions.mark('timer', timer.get_elapsed_time(), timer_rect)
+            dirty_regions.mark('shortest_distance', board.shortest_distance, shortest_distance_rect)
+            dirty_regions.mark('expected_turns', player.current_cell.number, expected_turns_rect)
+            dirty_regions.mark('remaining_moves', player.current_cell.number, remaining_moves_rect)
+            dirty_regions.mark('score', player.get_score(), score_rect)
+            dirty_regions.mark('progress', progress, progress_bar_rect)
+            dirty_regions.mark('past_games_scores', past_games_scores.version, past_games_scores_rect)
+            dirty_regions.mark('past_games_times', past_games_times.version, past_games_times_rect)
+            dirty_regions.mark('steps', player.number_steps_made, steps_rect)
+            dirty_regions.mark('dice_value', dice_value, dice_value_rect)
+            if board_latency_rect is not None:
+                dirty_regions.mark('board_latency', board_latency, board_latency_rect)
+            if stage_timings_rect is not None:
+                dirty_regions.mark('stage_timings', stage_timings_lines, stage_timings_rect)
+            stage_timings.stop('draw: dirty_regions', stage_start)
     except Exception as e:
         print(f"Error drawing game state: {e}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Play Snakes and Ladders.")
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--columns", type=int, default=COLUMNS)
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the first board, random by default.")
+    parser.add_argument("--history", default=None, help="SQLite database of finished games.")
+    parser.add_argument("--record", default=None, help="File the session's recording is appended to.")
+    parser.add_argument("--library", default=None,
+                        help="Board library built by board_library.py to read boards from, with its board size.")
+    parser.add_argument("--debug", action="store_true", help="Show how long preparing the boards and each stage of a frame take.")
+    args = parser.parse_args()
+    main(rows=args.rows, columns=args.columns, seed=args.seed, history_path=args.history, replay_path=args.record,
+         library=BoardLibrary(args.library) if args.library else None, debug=args.debug)
\ No newline at end of file
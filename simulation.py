@@ -0,0 +1,242 @@
+"""Headless Monte Carlo simulation of Snakes and Ladders games.
+
+The board generated by Generator is converted into flat NumPy lookup tables (a jump table) and thousands of
+games are advanced at once in vectorized batches, following the same rules as engine.step, which the
+game is played with:
+
+    - the player starts on cell 1 with a score of 100 and rolls a six-sided dice every turn,
+    - landing on the start of a ladder gives +5 points, landing on the head of a snake gives -5 points,
+    - a roll that goes past the last cell ends the game,
+    - if the game ends without the player encountering any snakes the score is doubled.
+
+Landing exactly on the last cell doesn't end the game: like in the game itself, one more roll is needed
+from there, and it counts as a turn and a step of its own.
+"""
+import logging
+
+import numpy as np
+
+
+class JumpTable:
+    """
+    Represents a board as flat lookup tables indexed by cell number.
+
+    Attributes:
+        number_of_cells (int): The number of the last cell on the board.
+        destination (np.ndarray): The cell the player ends up on after landing on a cell (entity jumps applied).
+        score_delta (np.ndarray): The score change for landing on a cell (+5 ladder, -5 snake, 0 otherwise).
+        is_snake (np.ndarray): True for the cells which hold the head of a snake.
+    """
+    def __init__(self, number_of_cells: int, snakes=(), ladders=()):
+        """
+        Initializes the tables from (start, end) cell number pairs.
+
+        number_of_cells: The number of the last cell on the board.
+        snakes: Pairs of (head cell number, tail cell number).
+        ladders: Pairs of (bottom cell number, top cell number).
+        """
+        self.number_of_cells = number_of_cells
+        # Index 0 is unused and the last 6 entries absorb rolls past the last cell
+        size = number_of_cells + 7
+        self.destination = np.arange(size, dtype=np.int32)
+        self.destination[number_of_cells:] = number_of_cells
+        self.score_delta = np.zeros(size, dtype=np.int32)
+        self.is_snake = np.zeros(size, dtype=bool)
+        for start, end in snakes:
+            self.destination[start] = end
+            self.score_delta[start] = -5
+            self.is_snake[start] = True
+        for start, end in ladders:
+            self.destination[start] = end
+            self.score_delta[start] = 5
+
+    @classmethod
+    def from_arrays(cls, destination: np.ndarray, score_delta: np.ndarray, is_snake: np.ndarray) -> "JumpTable":
+        """
+        Wraps existing tables without copying them, e.g. the rows of a memory-mapped BoardLibrary.
+
+        destination, score_delta, is_snake: Tables laid out like the ones __init__ creates, with the 6
+            entries past the last cell.
+        return: The JumpTable using the given arrays.
+        """
+        table = cls.__new__(cls)
+        table.number_of_cells = len(destination) - 7
+        table.destination = destination
+        table.score_delta = score_delta
+        table.is_snake = is_snake
+        return table
+
+    @classmethod
+    def from_board(cls, board) -> "JumpTable":
+        """
+        Creates the jump table from the snake and ladder entities placed on a Board.
+
+        board: A Board whose snakes and ladders were created by Generator.
+        return: The JumpTable for the board.
+        """
+        if hasattr(board, 'entity_type'):
+            return cls._from_compact_board(board)
+        return cls(
+            len(board.cells_list),
+            snakes=[(snake.start_cell.number, snake.end_cell.number) for snake in board.snakes],
+            ladders=[(ladder.start_cell.number, ladder.end_cell.number) for ladder in board.ladders],
+        )
+
+    @classmethod
+    def _from_compact_board(cls, board) -> "JumpTable":
+        """Creates the jump table straight from the arrays of a CompactBoard, without a view per entity."""
+        number_of_cells = len(board.cells_list)
+        table = cls(number_of_cells)
+        cells = slice(0, number_of_cells + 1)
+        table.destination[cells] = board.destination
+        # The cells the player jumps away from are the snake heads and ladder bottoms
+        starts = board.destination != np.arange(number_of_cells + 1)
+        snake_heads = starts & (board.entity_type == board.SNAKE)
+        table.is_snake[cells] = snake_heads
+        table.score_delta[cells] = np.where(snake_heads, -5, np.where(starts, 5, 0))
+        return table
+
+
+class SimulationResult:
+    """
+    Holds the statistics of a batch of simulated games.
+
+    Attributes:
+        games (int): The number of games simulated.
+        unfinished (int): The number of games stopped by the max_turns limit.
+        turns_histogram (np.ndarray): turns_histogram[n] is the number of games finished in n dice rolls.
+        steps_histogram (np.ndarray): The same for steps made (dice moves plus snake and ladder jumps).
+        score_values (np.ndarray): The distinct final scores, in ascending order.
+        score_counts (np.ndarray): The number of games that finished with each of score_values.
+    """
+    def __init__(self, games, unfinished, turns_histogram, steps_histogram, score_values, score_counts):
+        self.games = games
+        self.unfinished = unfinished
+        self.turns_histogram = turns_histogram
+        self.steps_histogram = steps_histogram
+        self.score_values = score_values
+        self.score_counts = score_counts
+
+    def mean_turns(self) -> float:
+        """Returns the mean number of dice rolls of the finished games."""
+        return _histogram_mean(np.arange(len(self.turns_histogram)), self.turns_histogram)
+
+    def mean_steps(self) -> float:
+        """Returns the mean number of steps made in the finished games."""
+        return _histogram_mean(np.arange(len(self.steps_histogram)), self.steps_histogram)
+
+    def mean_score(self) -> float:
+        """Returns the mean final score of the finished games."""
+        return _histogram_mean(self.score_values, self.score_counts)
+
+
+def _histogram_mean(values, counts) -> float:
+    total = counts.sum()
+    if total == 0:
+        return 0.0
+    return float(np.dot(values, counts) / total)
+
+
+def _accumulate(histogram: np.ndarray, samples: np.ndarray) -> np.ndarray:
+    """Adds samples to a bincount histogram, growing it when needed."""
+    counts = np.bincount(samples)
+    if len(counts) > len(histogram):
+        counts[:len(histogram)] += histogram
+        return counts
+    histogram[:len(counts)] += counts
+    return histogram
+
+
+def _merge_counts(values: np.ndarray, counts: np.ndarray, samples: np.ndarray):
+    """Adds samples to a (values, counts) histogram of arbitrary integers."""
+    values, inverse = np.unique(np.concatenate([values, samples]), return_inverse=True)
+    weights = np.concatenate([counts, np.ones(samples.size, dtype=np.int64)])
+    return values, np.bincount(inverse, weights=weights).astype(np.int64)
+
+
+def _simulate_batch(table: JumpTable, games: int, rng: np.random.Generator, max_turns: int):
+    """
+    Plays one batch of games to the end.
+
+    Only the games still in progress are kept in the state arrays, so each turn costs time proportional
+    to the number of players still on the board. The ladders climbed and snakes encountered by each
+    player are packed into a single int64 counter, so one table lookup per turn updates both.
+
+    return: The turns, steps and final scores of the finished games, and the number of unfinished games.
+    """
+    last_cell = table.number_of_cells
+    # Bits 0-31 count the ladders climbed, bits 32-63 count the snakes encountered
+    packed_counts = np.where(table.is_snake, np.int64(1) << 32, (table.score_delta > 0).astype(np.int64))
+    position = np.ones(games, dtype=np.int32)
+    counts = np.zeros(games, dtype=np.int64)
+
+    finished_turns = []
+    finished_counts = []
+    turn = 0
+    while position.size and turn < max_turns:
+        turn += 1
+        next_cell = position + rng.integers(1, 7, size=position.size, dtype=np.int32)
+        # Only rolls past the last cell end the game; no entity can start on the last cell
+        done = next_cell > last_cell
+        if done.any():
+            finished_counts.append(counts[done])
+            finished_turns.append(np.full(finished_counts[-1].size, turn, dtype=np.int64))
+            playing = ~done
+            next_cell = next_cell[playing]
+            counts = counts[playing]
+        position = table.destination[next_cell]
+        counts += packed_counts[next_cell]
+
+    if not finished_turns:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, position.size
+    turns = np.concatenate(finished_turns)
+    counts = np.concatenate(finished_counts)
+    ladders = counts & 0xFFFFFFFF
+    snakes = counts >> 32
+    scores = 100 + 5 * (ladders - snakes)
+    # Special bonus (if player doesn't encounter any snakes score is doubled)
+    scores[snakes == 0] *= 2
+    # Every roll is one step, the final one past the last cell included, plus one step per entity jump
+    steps = turns + ladders + snakes
+    return turns, steps, scores, position.size
+
+
+def simulate_games(board_or_table, games: int = 1_000_000, batch_size: int = 1 << 16, seed=None,
+                   max_turns: int = None) -> SimulationResult:
+    """
+    Simulates many games on one board and returns move count and score histograms.
+
+    board_or_table: A Board with snakes and ladders on it, or a JumpTable built from one.
+    games: The number of games to simulate.
+    batch_size: The number of games advanced together in one vectorized batch.
+    seed: The seed for the NumPy random generator, for reproducible results.
+    max_turns: Games that haven't finished after this many dice rolls are stopped and reported as unfinished.
+        Defaults to 10,000, or 10 rolls per cell for boards with more than 1,000 cells.
+    return: A SimulationResult with the statistics of all games.
+    """
+    if isinstance(board_or_table, JumpTable):
+        table = board_or_table
+    else:
+        table = JumpTable.from_board(board_or_table)
+    if max_turns is None:
+        max_turns = max(10_000, 10 * table.number_of_cells)
+    logging.info(f'Simulating {games} games')
+    rng = np.random.default_rng(seed)
+
+    turns_histogram = np.zeros(1, dtype=np.int64)
+    steps_histogram = np.zeros(1, dtype=np.int64)
+    score_values = np.zeros(0, dtype=np.int32)
+    score_counts = np.zeros(0, dtype=np.int64)
+    unfinished = 0
+    remaining = games
+    while remaining > 0:
+        batch = min(batch_size, remaining)
+        turns, steps, scores, batch_unfinished = _simulate_batch(table, batch, rng, max_turns)
+        turns_histogram = _accumulate(turns_histogram, turns)
+        steps_histogram = _accumulate(steps_histogram, steps)
+        score_values, score_counts = _merge_counts(score_values, score_counts, scores)
+        unfinished += batch_unfinished
+        remaining -= batch
+
+    return SimulationResult(games, unfinished, turns_histogram, steps_histogram, score_values, score_counts)
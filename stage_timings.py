@@ -0,0 +1,107 @@
+"""Per-frame timings of the stages of the game loop, kept as rolling percentiles.
+
+Every stage (handling events, each draw call, updating the display, ...) has a fixed-size ring buffer of its
+last durations, so the p50/p95/p99 always describe the last few seconds and the memory used never grows.
+Timing a stage is two calls around it; while the timings are disabled both return at once without reading
+the clock, so the instrumentation can stay in the game loop.
+
+Usage:
+    timings = StageTimings(enabled=True)
+    start = timings.start()
+    handle_events(...)
+    start = timings.stop("handle_events", start)
+    print(timings.summary())
+    timings.export_csv("timings.csv")
+"""
+import csv
+import json
+import time
+
+import numpy as np
+
+# About 10 seconds of frames at 60 FPS
+DEFAULT_CAPACITY = 600
+PERCENTILES = (50, 95, 99)
+
+
+class StageTimings:
+    """
+    Rolling durations of named stages.
+
+    Attributes:
+        enabled (bool): Whether stages are timed. Can be switched at any time.
+        capacity (int): The number of durations kept per stage.
+    """
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, enabled: bool = False):
+        self.enabled = enabled
+        self.capacity = capacity
+        # stage -> [ring buffer of durations in seconds, number of durations recorded]
+        self._stages = {}
+
+    def start(self) -> float:
+        """Returns the time a stage starts at, for stop(); 0.0 while disabled."""
+        if not self.enabled:
+            return 0.0
+        return time.perf_counter()
+
+    def stop(self, stage: str, start: float) -> float:
+        """
+        Records the duration of a stage.
+
+        stage: The name of the stage.
+        start: The time from start(), or from the stop() of the stage before it. A start of 0.0, from while
+            the timings were disabled, records nothing.
+        return: The current time, so it can be the start of the next stage; 0.0 while disabled.
+        """
+        if not self.enabled:
+            return 0.0
+        now = time.perf_counter()
+        if start:
+            self.record(stage, now - start)
+        return now
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Adds a duration to a stage, replacing its oldest one once the buffer is full."""
+        entry = self._stages.get(stage)
+        if entry is None:
+            entry = self._stages[stage] = [np.zeros(self.capacity), 0]
+        entry[0][entry[1] % self.capacity] = seconds
+        entry[1] += 1
+
+    def clear(self) -> None:
+        """Forgets all durations."""
+        self._stages.clear()
+
+    def summary(self) -> dict:
+        """
+        Returns the statistics of every stage, in the order the stages were first timed.
+
+        return: A dictionary of stage names to the number of durations recorded and the mean, p50, p95, p99
+            and maximum of the durations kept, in milliseconds.
+        """
+        summary = {}
+        for stage, (buffer, count) in self._stages.items():
+            durations = buffer[:min(count, self.capacity)] * 1000
+            percentiles = np.percentile(durations, PERCENTILES)
+            summary[stage] = {
+                "count": count,
+                "mean": float(durations.mean()),
+                **{f"p{p}": float(value) for p, value in zip(PERCENTILES, percentiles)},
+                "max": float(durations.max()),
+            }
+        return summary
+
+    def export_json(self, path: str) -> None:
+        """Writes the summary to a JSON file."""
+        with open(path, "w") as output:
+            json.dump({"capacity": self.capacity, "unit": "ms", "stages": self.summary()}, output, indent=2)
+
+    def export_csv(self, path: str) -> None:
+        """Writes the summary to a CSV file, one row per stage."""
+        with open(path, "w", newline="") as output:
+            writer = csv.writer(output)
+            columns = ["count", "mean", *(f"p{p}" for p in PERCENTILES), "max"]
+            writer.writerow(["stage", *(column if column == "count" else f"{column}_ms" for column in columns)])
+            for stage, stats in self.summary().items():
+                writer.writerow([stage, *(stats["count"] if column == "count" else f"{stats[column]:.4f}"
+                                          for column in columns)])
@@ -0,0 +1,46 @@
+"""Shared fonts and a bounded cache of rendered text surfaces.
+
+Creating a pygame Font and rendering text are the most expensive parts of drawing a frame, and almost all
+of the text on the screen is the same from one frame to the next. Fonts are created once per size and
+rendered surfaces are kept in an LRU cache keyed by (text, size, color, antialias), so static labels like
+"Press R to restart" are rendered once per process and changing ones (the timer, the score) only when
+their value changes.
+
+The returned surfaces are shared between callers and must only be blitted, never drawn on.
+"""
+from functools import lru_cache
+
+# Enough for the 100 cell labels, the HUD and the leaderboards with plenty of room for changing values
+TEXT_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=None)
+def get_font(size: int) -> "pygame.font.Font":
+    """
+    Returns the default font in the given size, creating it on first use.
+
+    size: The font size in pixels.
+    return: The shared pygame Font object.
+    """
+    import pygame as pg
+    return pg.font.Font(None, size)
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_text(text: str, size: int, color: tuple, antialias: bool = True) -> "pygame.Surface":
+    """
+    Renders text with the default font, reusing the surface if the same text was rendered recently.
+
+    text: The text to render.
+    size: The font size in pixels.
+    color: The RGB color of the text, as a tuple.
+    antialias: Whether the text is rendered with smooth edges.
+    return: The rendered text surface.
+    """
+    return get_font(size).render(text, antialias, color)
+
+
+def clear_text_cache() -> None:
+    """Forgets all fonts and rendered text, e.g. after pygame.quit() made them invalid."""
+    render_text.cache_clear()
+    get_font.cache_clear()
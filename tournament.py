@@ -0,0 +1,253 @@
+"""Tournament runner: plays many games headless with different player policies and compares them.
+
+Every policy plays the same games: the same boards (one per board seed) and the same dice (one stream per
+game), so the differences between the policies come from their decisions alone. A policy decides after every
+roll whether to undo the move and roll again, like a player pressing U in the game. Games are played with
+engine.step, the rules the game uses.
+
+The boards are split into chunks across a ProcessPoolExecutor. Each worker sends back only histograms of
+its games' scores and turns per policy, which are merged as the chunks complete, so a tournament of any size
+takes the same memory. The number of rolls a game takes stands in for its time, which headless games don't have.
+
+Usage:
+    python tournament.py --boards 1000 --games 100 --policies never undo-snakes undo-snakes:3
+"""
+import argparse
+from collections import Counter
+from concurrent.futures import as_completed
+import json
+import logging
+import random as rd
+import time
+
+from batch import generate_board, split_chunks, worker_pool
+from board_library import BoardLibrary
+from core import ROWS, COLUMNS, roll_dice
+from engine import Rules, new_game, step
+
+# Games still unfinished after this many rolls are stopped, so a policy that undoes too much can't loop forever
+MAX_ROLLS = 10_000
+
+
+class Policy:
+    """
+    A player who never undoes a move. The base of all policies.
+
+    Attributes:
+        name (str): The name the policy is chosen by, see make_policy().
+    """
+    name = "never"
+
+    def wants_undo(self, before, after, undos_used: int) -> bool:
+        """
+        Decides whether to undo a move.
+
+        before: The GameState before the move.
+        after: The GameState after the move.
+        undos_used: The number of moves undone so far in this game.
+        return: True to undo the move and roll again.
+        """
+        return False
+
+
+class UndoSnakes(Policy):
+    """A player who undoes every move that hit a snake, or only the first few if there is a budget."""
+    def __init__(self, budget: int = None):
+        """
+        budget: The largest number of undos per game, unlimited if None.
+        """
+        self.budget = budget
+        self.name = "undo-snakes" if budget is None else f"undo-snakes:{budget}"
+
+    def wants_undo(self, before, after, undos_used: int) -> bool:
+        return after.snakes > before.snakes and (self.budget is None or undos_used < self.budget)
+
+
+def make_policy(name: str) -> Policy:
+    """
+    Creates a policy from its name: "never", "undo-snakes" or "undo-snakes:N" for at most N undos per game.
+    """
+    kind, _, budget = name.partition(":")
+    if kind == "never" and not budget:
+        return Policy()
+    if kind == "undo-snakes":
+        return UndoSnakes(int(budget) if budget else None)
+    raise ValueError(f"Unknown policy {name}")
+
+
+def play_game(rules: Rules, policy: Policy, dice: rd.Random, max_rolls: int = MAX_ROLLS) -> tuple:
+    """
+    Plays a game with a policy.
+
+    rules: The rules of the board.
+    policy: The policy deciding on undos.
+    dice: The random generator the dice are rolled with.
+    max_rolls: The number of rolls after which the game is stopped.
+    return: The last GameState, the number of rolls (undone ones included) and the number of undos.
+    """
+    state = new_game(rules)
+    rolls = undos = 0
+    while not state.finished and rolls < max_rolls:
+        after = step(state, roll_dice(dice))
+        rolls += 1
+        # The game doesn't allow undoing on the first cell, and restarts as soon as a game is finished
+        if not after.finished and after.cell != 1 and policy.wants_undo(state, after, undos):
+            undos += 1
+        else:
+            state = after
+    return state, rolls, undos
+
+
+class PolicyStats:
+    """
+    The results of a policy, as histograms that can be merged.
+
+    Attributes:
+        games (int): The number of games played.
+        unfinished (int): The number of games stopped after max_rolls.
+        undos (int): The total number of moves undone.
+        scores (Counter): The number of finished games with each final score.
+        turns (Counter): The number of finished games with each number of rolls, undone ones included.
+    """
+    def __init__(self):
+        self.games = 0
+        self.unfinished = 0
+        self.undos = 0
+        self.scores = Counter()
+        self.turns = Counter()
+
+    def add(self, state, rolls: int, undos: int) -> None:
+        """Adds a game played with play_game()."""
+        self.games += 1
+        self.undos += undos
+        if state.finished:
+            self.scores[state.score] += 1
+            self.turns[rolls] += 1
+        else:
+            self.unfinished += 1
+
+    def merge(self, other: "PolicyStats") -> None:
+        """Adds the games of another PolicyStats to this one."""
+        self.games += other.games
+        self.unfinished += other.unfinished
+        self.undos += other.undos
+        self.scores.update(other.scores)
+        self.turns.update(other.turns)
+
+    def summary(self) -> dict:
+        """Returns the mean and percentiles of the scores and turns and the undos per game."""
+        return {
+            "games": self.games,
+            "unfinished": self.unfinished,
+            "undos_per_game": round(self.undos / self.games, 3) if self.games else 0.0,
+            "score": _distribution(self.scores),
+            "turns": _distribution(self.turns),
+        }
+
+
+def _distribution(histogram: Counter) -> dict:
+    """Returns the mean, minimum, 10th, 50th and 90th percentiles and maximum of a histogram."""
+    total = sum(histogram.values())
+    if total == 0:
+        return {}
+    values = sorted(histogram)
+    percentiles = {}
+    targets = [(name, fraction * total) for name, fraction in (("p10", 0.1), ("p50", 0.5), ("p90", 0.9))]
+    seen = 0
+    for value in values:
+        seen += histogram[value]
+        while targets and seen >= targets[0][1]:
+            percentiles[targets.pop(0)[0]] = value
+    return {
+        "mean": round(sum(value * count for value, count in histogram.items()) / total, 3),
+        "min": values[0],
+        **percentiles,
+        "max": values[-1],
+    }
+
+
+def _play_chunk(boards: range, games_per_board: int, policy_names: list, rows: int, columns: int,
+                max_rolls: int, library: BoardLibrary = None) -> dict:
+    """Plays all games on a chunk of boards with every policy. Called in the worker processes."""
+    policies = [make_policy(name) for name in policy_names]
+    results = {name: PolicyStats() for name in policy_names}
+    for board in boards:
+        if library is None:
+            board_seed = board
+            rules = Rules.from_board(generate_board(board_seed, rows, columns))
+        else:
+            # The board is read from the shared library instead of being generated again
+            board_seed = int(library.seeds[board])
+            rules = library.rules(board)
+        for game in range(games_per_board):
+            for policy in policies:
+                # Every policy gets the same dice for the same game
+                dice = rd.Random(f"tournament-{board_seed}-{game}")
+                results[policy.name].add(*play_game(rules, policy, dice, max_rolls))
+    return results
+
+
+def run_tournament(boards: range, games_per_board: int, policy_names: list, rows: int = ROWS,
+                   columns: int = COLUMNS, workers: int = None, chunk_size: int = 16,
+                   max_rolls: int = MAX_ROLLS, library: BoardLibrary = None) -> dict:
+    """
+    Plays games_per_board games on every board with every policy across a pool of processes.
+
+    boards: The seeds of the boards, or the indices of the boards in the library if there is one.
+    games_per_board: The number of games played on each board by each policy.
+    policy_names: The names of the policies, see make_policy().
+    rows: The number of rows of the boards.
+    columns: The number of columns of the boards.
+    workers: The number of worker processes. Defaults to the number of CPUs.
+    chunk_size: The number of boards sent to a worker at a time.
+    max_rolls: The number of rolls after which a game is stopped.
+    library: A BoardLibrary the boards are read from, which the workers share instead of generating the
+        boards. rows and columns are ignored then.
+    return: A dictionary of policy names to their merged PolicyStats.
+    """
+    # Fail on a wrong policy name here rather than in every worker
+    policy_names = [make_policy(name).name for name in policy_names]
+    logging.info(f'Playing {len(boards) * games_per_board} games with {len(policy_names)} policies')
+    chunks = split_chunks(boards, chunk_size)
+    results = {name: PolicyStats() for name in policy_names}
+    with worker_pool(workers) as executor:
+        futures = [executor.submit(_play_chunk, chunk, games_per_board, policy_names, rows, columns, max_rolls,
+                                   library)
+                   for chunk in chunks]
+        # Merge the chunks in the order they finish, so a slow chunk doesn't hold back the others
+        for future in as_completed(futures):
+            for name, stats in future.result().items():
+                results[name].merge(stats)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare Snakes and Ladders player policies.")
+    parser.add_argument("--boards", type=int, default=100, help="Number of boards, with seeds from --start.")
+    parser.add_argument("--start", type=int, default=0, help="First board seed, or first board of --library.")
+    parser.add_argument("--library", default=None, help="Board library built by board_library.py to play on.")
+    parser.add_argument("--games", type=int, default=100, help="Games per board and policy.")
+    parser.add_argument("--policies", nargs="+", default=["never", "undo-snakes", "undo-snakes:3"])
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--columns", type=int, default=COLUMNS)
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes, defaults to the CPU count.")
+    parser.add_argument("--chunk-size", type=int, default=16)
+    parser.add_argument("--output", default=None, help="JSON file for the summaries.")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    library = BoardLibrary(args.library) if args.library else None
+    boards = range(args.start, args.start + args.boards)
+    if library is not None:
+        boards = boards[:max(0, len(library) - args.start)]
+    results = run_tournament(boards, args.games, args.policies, args.rows, args.columns, args.workers,
+                             args.chunk_size, library=library)
+    elapsed = time.perf_counter() - start_time
+    summaries = {name: stats.summary() for name, stats in results.items()}
+    games = sum(stats.games for stats in results.values())
+    print(f"Played {games} games in {elapsed:.1f} s ({games / elapsed:.0f} games/s)")
+    for name, summary in summaries.items():
+        print(f"{name}: {json.dumps(summary)}")
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(summaries, output, indent=2)